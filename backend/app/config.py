@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Get the absolute path to the project root
@@ -9,4 +10,95 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Create conversations directory if it doesn't exist
 CONVERSATION_DIR = BASE_DIR / "conversations"
-CONVERSATION_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+CONVERSATION_DIR.mkdir(parents=True, exist_ok=True)
+
+# Summary index of the conversations directory (JSON Lines journal)
+CONVERSATION_INDEX_PATH = CONVERSATION_DIR / "_index.jsonl"
+
+# Conversation storage backend: "json" (files in CONVERSATION_DIR) or "sqlite"
+# (CONVERSATION_DB_PATH; fill it from the JSON files with migrate_conversations.py)
+CONVERSATION_BACKEND = os.environ.get("CONVERSATION_BACKEND", "json")
+CONVERSATION_DB_PATH = Path(os.environ.get("CONVERSATION_DB_PATH", BASE_DIR / "conversations.db"))
+
+# Parsed conversations kept in memory per worker process, as an approximate byte budget
+CONVERSATION_CACHE_BYTES = int(os.environ.get("CONVERSATION_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Production server (serve.py): bind address, worker processes and the
+# seconds a worker gets to finish in-flight requests after SIGTERM
+WEB_HOST = os.environ.get("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.environ.get("WEB_PORT", 8001))
+WEB_WORKERS = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+
+# Lowest level of the log records the app writes (a logging level name)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Chat answers (POST /conversations/{id}/chat): the answer generator, "rag" for the RAG
+# service's /ask pipeline (at CHAT_RAG_URL, waiting up to CHAT_RAG_TIMEOUT seconds), "local"
+# for the deterministic stand-in used in tests, or "module:factory"; the local one's seconds per token
+CHAT_GENERATOR = os.environ.get("CHAT_GENERATOR", "rag")
+CHAT_RAG_URL = os.environ.get("CHAT_RAG_URL", "http://127.0.0.1:8000")
+CHAT_RAG_TIMEOUT = float(os.environ.get("CHAT_RAG_TIMEOUT", 120))
+CHAT_LOCAL_TOKEN_DELAY = float(os.environ.get("CHAT_LOCAL_TOKEN_DELAY", 0))
+
+# Request profiling: share of requests sampled at random (0 disables), seconds between
+# stack samples, profiles kept, and the header with which an admin profiles a request
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.005))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Profile")
+
+# Storage I/O thread pool: concurrent file operations and how many may wait
+STORAGE_IO_WORKERS = int(os.environ.get("STORAGE_IO_WORKERS", 8))
+STORAGE_IO_MAX_QUEUE = int(os.environ.get("STORAGE_IO_MAX_QUEUE", 256))
+
+# Content-addressed PDF storage and upload limits
+BLOB_DIR = UPLOAD_DIR / "blobs"
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# PDF ingestion: extracted text chunks per stored file and the worker pool.
+# Every server worker has its own pool, so by default they share the CPUs
+CHUNK_DIR = BASE_DIR / "chunks"
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", 1000))  # characters
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", 200))
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", max(1, (os.cpu_count() or 1) // WEB_WORKERS)))
+
+# Chunk embeddings for retrieval: index location and vector width
+VECTOR_DIR = BASE_DIR / "vectors"
+EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", 256))
+
+# Full-text search index (JSON Lines journal)
+SEARCH_DIR = BASE_DIR / "search"
+TEXT_INDEX_PATH = SEARCH_DIR / "text_index.jsonl"
+
+# Hybrid retrieval result cache: entries kept and their lifetime in seconds
+RETRIEVAL_CACHE_SIZE = int(os.environ.get("RETRIEVAL_CACHE_SIZE", 1024))
+RETRIEVAL_CACHE_TTL = float(os.environ.get("RETRIEVAL_CACHE_TTL", 300))
+
+# Auth database: the rag_app schema created by manage.py create-tables, and its connection pool
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'app.db'}")
+DB_SCHEMA = os.environ.get("DB_SCHEMA", "rag_app")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))  # seconds before a connection is replaced
+
+# Seconds a process trusts its role -> permission map before checking the database for changes
+PERMISSION_CHECK_INTERVAL = float(os.environ.get("PERMISSION_CHECK_INTERVAL", 5))
+
+def engine_options(url=DATABASE_URL):
+    """SQLAlchemy engine options (SQLALCHEMY_ENGINE_OPTIONS) for the auth database"""
+    if url.startswith("sqlite"):
+        # SQLite connections are local files; pool sizing does not apply
+        return {"connect_args": {"check_same_thread": False}}
+    
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        # Unqualified table names resolve in the app schema
+        "connect_args": {"options": f"-csearch_path={DB_SCHEMA}"},
+    }
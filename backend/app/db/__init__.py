@@ -0,0 +1 @@
+# Auth database package
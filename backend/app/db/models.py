@@ -0,0 +1,83 @@
+# backend/app/db/models.py
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table, Text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+class Base(DeclarativeBase):
+    """Declarative base of the auth tables; ``Base.metadata.create_all`` creates them"""
+
+
+# Which permissions each role grants
+role_permissions = Table(
+    "role_permissions",
+    Base.metadata,
+    Column("role_id", ForeignKey("roles.role_id"), primary_key=True),
+    Column("permission_id", ForeignKey("permissions.permission_id"), primary_key=True),
+)
+
+
+class Role(Base):
+    __tablename__ = "roles"
+
+    role_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    role_name: Mapped[str] = mapped_column(String, unique=True)
+
+    permissions: Mapped[List["Permission"]] = relationship(secondary=role_permissions, lazy="selectin")
+
+
+class Permission(Base):
+    __tablename__ = "permissions"
+
+    permission_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+
+
+class PermissionVersion(Base):
+    """Single row counting changes to roles and permissions; running servers poll it"""
+
+    __tablename__ = "permission_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # ix_users_email: login looks users up by email and registration relies on it to reject duplicates
+    email: Mapped[str] = mapped_column(String, unique=True, index=True)
+    password_hash: Mapped[str] = mapped_column(String)
+    role_id: Mapped[int] = mapped_column(Integer, ForeignKey("roles.role_id"), default=2)
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, default=utcnow)
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class Profile(Base):
+    __tablename__ = "profiles"
+
+    profile_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.user_id"))
+    full_name: Mapped[Optional[str]] = mapped_column(String)
+    avatar_url: Mapped[Optional[str]] = mapped_column(String)
+    bio: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, default=utcnow)
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+class ResetToken(Base):
+    __tablename__ = "reset_tokens"
+
+    token_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.user_id"))
+    token: Mapped[str] = mapped_column(String, unique=True, index=True)
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime)
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, default=utcnow)
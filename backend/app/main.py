@@ -1,12 +1,58 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+import logging
 import os
 from pathlib import Path
 
 # Import shared configuration
-from .config import BASE_DIR, UPLOAD_DIR, CONVERSATION_DIR
+from .config import BASE_DIR, UPLOAD_DIR, CONVERSATION_DIR, MAX_UPLOAD_BYTES, LOG_LEVEL, PROFILE_HEADER, PROFILE_SAMPLE_RATE
 
-app = FastAPI(title="Chat History API")
+# App log records go to stderr next to the server's own; a server that configures
+# the root logger itself (gunicorn --log-config) keeps its handlers
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+from .middleware.auth_middleware import is_admin
+from .middleware.metrics_middleware import MetricsMiddleware
+from .middleware.profiler_middleware import ProfilerMiddleware
+from .services.conversation_storage import VersionConflict
+from .services.document_store import UploadTooLarge
+from .services.ingestion import ingestion_queue
+from .services.io_pool import IOPoolBusy, io_pool
+from .services.metrics import registry
+from .services.profiler import profiler
+from .services.vector_index import vector_index
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Started per server worker, not at import, so a preloading master runs no sender thread;
+    # drains messages left over from a previous run
+    mail_outbox.start()
+    yield
+    password_hasher.shutdown()
+    mail_outbox.stop()
+    # Runs after the server has finished in-flight requests (SIGTERM drain under gunicorn):
+    # let parses, index appends and storage calls already queued complete before the worker exits
+    ingestion_queue.shutdown()
+    vector_index.shutdown()
+    io_pool.shutdown()
+
+app = FastAPI(title="Chat History API", lifespan=lifespan)
+
+# Room for multipart boundaries and form fields on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Reject oversized uploads from their Content-Length before the body is read.
+# Registered before CORS so that CORS wraps it and its 413s carry CORS headers.
+@app.middleware("http")
+async def upload_size_limit(request: Request, call_next):
+    if request.method == "POST":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+            return JSONResponse(status_code=413, content={"detail": "Upload exceeds the size limit"})
+    return await call_next(request)
 
 # Configure CORS
 app.add_middleware(
@@ -15,13 +61,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Profile-Id"],  # Conversation list paging, conversation versions, request profiles
+)
+
+# Per-route latency, status and body size metrics; it times every layer below the profiler
+app.add_middleware(MetricsMiddleware)
+
+# A PROFILE_SAMPLE_RATE share of requests is profiled, as is any request an admin sends
+# with the profile header; only the latter checks the caller. Outermost, so a profile
+# covers metrics and every other layer too
+app.add_middleware(
+    ProfilerMiddleware, profiler=profiler, sample_rate=PROFILE_SAMPLE_RATE, header=PROFILE_HEADER, authorize=is_admin
 )
 
 # Import and include routers
-from .routes import conversations, documents
+from .routes import conversations, documents, search
 
 app.include_router(conversations.router)
 app.include_router(documents.router)
+app.include_router(search.router)
+
+# Auth routes and dependencies; a missing module stops startup rather than disabling auth.
+# lifespan above starts and stops the mail sender and hashing pool imported here
+from .routes import auth_routes, profiles
+from .middleware.auth_middleware import AuthError
+from .services.mail_outbox import mail_outbox
+from .services.password_hasher import HasherBusy, password_hasher
+
+app.include_router(auth_routes.router)
+app.include_router(profiles.router)
+
+@app.exception_handler(AuthError)
+async def auth_error_handler(request: Request, exc: AuthError):
+    return JSONResponse(status_code=exc.status_code, content={"success": False, "message": exc.message})
+
+@app.exception_handler(HasherBusy)
+async def hasher_busy_handler(request: Request, exc: HasherBusy):
+    # Password hashing is saturated; ask the client to back off
+    return JSONResponse(status_code=429, content={"success": False, "message": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(IOPoolBusy)
+async def storage_busy_handler(request: Request, exc: IOPoolBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    # If-Match named another version; the client re-reads and retries
+    headers = {"ETag": f'"{exc.current}"'} if exc.current is not None else None
+    return JSONResponse(status_code=412, content={"detail": str(exc)}, headers=headers)
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/storage/stats")
+async def storage_stats():
+    return io_pool.stats()
 
 @app.get("/")
 async def root():
@@ -1,105 +1,84 @@
 # backend/app/middleware/auth_middleware.py
-from functools import wraps
-from flask import request, jsonify, g
-from app.services.auth_service import AuthService
-from app.db.models import User, Role, Permission
-
-def token_required(f):
-    """Decorator to check if JWT token is valid"""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        
-        # Check if Authorization header exists
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            # Bearer token format: "Bearer <token>"
-            parts = auth_header.split()
-            if len(parts) == 2 and parts[0].lower() == 'bearer':
-                token = parts[1]
-        
-        # No token provided
-        if not token:
-            return jsonify({
-                'success': False,
-                'message': 'Authentication token is missing'
-            }), 401
-        
-        try:
-            # Decode token
-            payload = AuthService.verify_token(token)
-            if not payload:
-                return jsonify({
-                    'success': False,
-                    'message': 'Invalid authentication token'
-                }), 401
-            
-            user_id = payload['sub']
-            
-            # Get user from database
-            current_user = User.query.get(user_id)
-            if not current_user:
-                return jsonify({
-                    'success': False,
-                    'message': 'User associated with token not found'
-                }), 401
-            
-            # Store current user in context
-            g.current_user = current_user
-            
-            # Pass current user to the decorated function
-            return f(current_user, *args, **kwargs)
-            
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Authentication failed: {str(e)}'
-            }), 401
-    
-    return decorated
-
-def role_required(role_id):
-    """Decorator to check if user has required role"""
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(current_user, *args, **kwargs):
-            # Check if user has the required role
-            if current_user.role_id != role_id:
-                return jsonify({
-                    'success': False,
-                    'message': 'Access denied: Insufficient privileges'
-                }), 403
-            
-            return f(current_user, *args, **kwargs)
-        return decorated_function
-    return decorator
-
-def permission_required(permission_name):
-    """Decorator to check if user has required permission"""
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(current_user, *args, **kwargs):
-            # Get user's role
-            role = Role.query.get(current_user.role_id)
-            if not role:
-                return jsonify({
-                    'success': False,
-                    'message': 'User role not found'
-                }), 403
-            
-            # Check if role has the required permission
-            permission_exists = False
-            for permission in role.permissions:
-                if permission.name == permission_name:
-                    permission_exists = True
-                    break
-            
-            if not permission_exists:
-                return jsonify({
-                    'success': False,
-                    'message': f'Access denied: Required permission {permission_name} not found'
-                }), 403
-            
-            return f(current_user, *args, **kwargs)
-        return decorated_function
-    return decorator
\ No newline at end of file
+from typing import Optional
+from fastapi import Depends, Header
+from starlette.concurrency import run_in_threadpool
+from app.services.auth_service import AuthService, CachedUser, user_cache
+from app.services.permission_map import permission_map
+
+class AuthError(Exception):
+    """Failed authentication or authorization, answered as {'success': False, 'message': ...}"""
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+async def token_required(authorization: Optional[str] = Header(None)) -> CachedUser:
+    """Dependency to check if JWT token is valid; returns the current user"""
+    token = None
+
+    # Check if Authorization header exists
+    if authorization:
+        # Bearer token format: "Bearer <token>"
+        parts = authorization.split()
+        if len(parts) == 2 and parts[0].lower() == 'bearer':
+            token = parts[1]
+
+    # No token provided
+    if not token:
+        raise AuthError(401, 'Authentication token is missing')
+
+    try:
+        # Decode token (cached, so repeat requests skip the HMAC check)
+        payload = AuthService.verify_token_cached(token)
+        if not payload:
+            raise AuthError(401, 'Invalid authentication token')
+
+        user_id = payload['sub']
+
+        # Get user from the cache; only a miss reads the database, off the event loop
+        current_user = user_cache.get(user_id)
+        if current_user is None:
+            current_user = await run_in_threadpool(AuthService.load_user, user_id)
+        if not current_user:
+            raise AuthError(401, 'User associated with token not found')
+
+        return current_user
+
+    except AuthError:
+        raise
+    except Exception as e:
+        raise AuthError(401, f'Authentication failed: {str(e)}')
+
+def role_required(role_id: int):
+    """Dependency factory to check if user has required role"""
+    async def check_role(current_user: CachedUser = Depends(token_required)) -> CachedUser:
+        # Check if user has the required role
+        if current_user.role_id != role_id:
+            raise AuthError(403, 'Access denied: Insufficient privileges')
+
+        return current_user
+    return check_role
+
+def permission_required(permission_name: str):
+    """Dependency factory to check if user has required permission"""
+    async def check_permission(current_user: CachedUser = Depends(token_required)) -> CachedUser:
+        # Role permissions come from the in-memory bitset map; it rechecks the stored version now and then
+        if permission_map.stale():
+            await run_in_threadpool(permission_map.snapshot)
+
+        if not permission_map.role_exists(current_user.role_id):
+            raise AuthError(403, 'User role not found')
+
+        if not permission_map.has_permission(current_user.role_id, permission_name):
+            raise AuthError(403, f'Access denied: Required permission {permission_name} not found')
+
+        return current_user
+    return check_permission
+
+async def is_admin(authorization: Optional[str]) -> bool:
+    """Whether an Authorization header value belongs to an admin, for checks outside a route's dependencies"""
+    try:
+        current_user = await token_required(authorization)
+    except AuthError:
+        return False
+    return current_user.role_id == 1
@@ -0,0 +1,75 @@
+# backend/app/middleware/metrics_middleware.py
+import time
+
+from app.services.metrics import registry
+
+requests_total = registry.counter(
+    "http_requests_total", "HTTP requests answered", ["method", "route", "status"]
+)
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte of its response",
+    ["method", "route"]
+)
+requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+response_bytes = registry.counter(
+    "http_response_body_bytes_total", "Response body bytes sent", ["method", "route"]
+)
+request_bytes = registry.counter(
+    "http_request_body_bytes_total", "Request body bytes received, uploads included", ["method", "route"]
+)
+
+
+def route_label(scope) -> str:
+    # The route template, not the raw path, so conversation IDs do not each get a series
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request per method and route.
+
+    A plain ASGI wrapper rather than ``@app.middleware("http")``, so that
+    streamed and file responses pass through untouched and are counted
+    until their last byte is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        received = 0
+        sent = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            requests_in_flight.dec()
+            labels = (scope["method"], route_label(scope))
+            request_seconds.observe(time.perf_counter() - started, labels)
+            requests_total.inc(1, labels + (str(status),))
+            if sent:
+                response_bytes.inc(sent, labels)
+            if received:
+                request_bytes.inc(received, labels)
@@ -0,0 +1,55 @@
+# backend/app/middleware/profiler_middleware.py
+import random
+from typing import Awaitable, Callable, Optional
+
+from app.services.profiler import SamplingProfiler
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling a share of requests, and those an admin asks for.
+
+    A request is profiled when it falls in the random ``sample_rate`` share,
+    or when it carries the ``header`` and ``authorize`` accepts its
+    Authorization header. An asked-for profile's ID is returned in the
+    ``X-Profile-Id`` response header, to be fetched from ``/profiles``.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler, sample_rate: float, header: str,
+                 authorize: Callable[[Optional[str]], Awaitable[bool]]):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        requested = False
+        if self.header in headers:
+            authorization = headers.get(b"authorization")
+            requested = await self.authorize(authorization.decode("latin-1") if authorization else None)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.profiler.start(scope["method"], scope["path"])
+        status = None
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (b"x-profile-id", str(profile.id).encode("latin-1"))
+                    ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            self.profiler.stop(profile, status)
@@ -1,7 +1,10 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Union, Any
 from datetime import datetime
-from pydantic import validator
+from pydantic import field_validator
+
+# Timestamps are Union[datetime, str]: pydantic's smart union keeps a string as the
+# string it is, so they need no validator
 
 class Message(BaseModel):
     id: Union[str, int]  # Accept both string and integer IDs
@@ -9,13 +12,8 @@ class Message(BaseModel):
     content: str
     timestamp: Union[datetime, str]
     
-    @validator('timestamp', pre=True)
-    def parse_timestamp(cls, value):
-        if isinstance(value, str):
-            return value  # Keep string format
-        return value
-    
-    @validator('id', pre=True)
+    @field_validator('id', mode='before')
+    @classmethod
     def ensure_id_serializable(cls, value):
         # Ensure ID can be serialized to JSON
         return str(value) if isinstance(value, int) else value
@@ -27,18 +25,35 @@ class Conversation(BaseModel):
     timestamp: Union[datetime, str]
     messages: List[Message]
     pdf_file: Optional[str] = None  # Path to the PDF file if attached
-    
-    @validator('timestamp', pre=True)
-    def parse_timestamp(cls, value):
-        if isinstance(value, str):
-            return value  # Keep string format
-        return value
+    version: Optional[int] = None  # Bumped on every change; sent as the ETag
+
+class ConversationSummary(BaseModel):
+    # Every field but id is optional so the list endpoint can project fields
+    id: str
+    title: Optional[str] = None
+    lastMessage: Optional[str] = None
+    timestamp: Optional[Union[datetime, str]] = None
+    pdf_file: Optional[str] = None
+    message_count: Optional[int] = None
+    version: Optional[int] = None
+    messages: Optional[List[Message]] = None
 
 class ConversationCreate(BaseModel):
     title: str
     lastMessage: str
     messages: List[Message] = Field(default_factory=list)
     
+class MessageAppend(BaseModel):
+    messages: List[Message]
+    title: Optional[str] = None
+    lastMessage: Optional[str] = None  # Defaults to the last appended message
+    timestamp: Optional[Union[datetime, str]] = None  # Defaults to now
+
+class ChatRequest(BaseModel):
+    content: str
+    id: Optional[Union[str, int]] = None  # The question's message ID; generated when absent
+    title: Optional[str] = None  # Title of a conversation this question starts
+
 class ConversationUpdate(BaseModel):
     title: Optional[str] = None
     lastMessage: Optional[str] = None
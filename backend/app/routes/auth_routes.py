@@ -1,151 +1,162 @@
 # backend/app/routes/auth_routes.py
-from flask import Blueprint, request, jsonify
-from app.services.auth_service import AuthService
+from fastapi import APIRouter, Body, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, Optional
+
+from app.db.models import User
+from app.services.auth_db import get_session
+from app.services.auth_service import AuthService, CachedUser
 from app.middleware.auth_middleware import token_required, role_required
 
-auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+router = APIRouter(prefix="/api/auth", tags=["auth"])
+
+# Helper function registering a user and issuing their first token
+async def register_account(session: Session, email: str, password: str, full_name: str):
+    success, message, user = await AuthService.register_user(session, email, password, full_name)
+    if not success:
+        return success, message, None
+
+    # Generate token for auto-login
+    token = AuthService.generate_token(user.user_id, user.email, user.role_id)
+    return success, message, {
+        'token': token,
+        'user': {
+            'id': user.user_id,
+            'email': user.email,
+            'fullName': full_name,
+            'role_id': user.role_id
+        }
+    }
+
+# Helper function loading the /me payload with one joined query (blocking; runs in the thread pool)
+def load_me(session: Session, user_id: int) -> Optional[Dict]:
+    row = AuthService.get_user_with_profile(session, User.user_id == user_id)
+    if not row:
+        return None
+
+    user, profile = row
+    return {
+        'id': user.user_id,
+        'email': user.email,
+        'role_id': user.role_id,
+        'full_name': profile.full_name if profile else "",
+        'avatar_url': profile.avatar_url if profile else None,
+        'bio': profile.bio if profile else None
+    }
 
-@auth_bp.route('/register', methods=['POST'])
-def register():
-    data = request.get_json()
-    
+@router.post('/register')
+async def register(data: Optional[Dict[str, Any]] = Body(None), session: Session = Depends(get_session)):
     # Validate request data
     if not data or not data.get('email') or not data.get('password'):
-        return jsonify({'success': False, 'message': 'Missing required fields'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Missing required fields'})
+
     email = data.get('email')
     password = data.get('password')
     full_name = data.get('fullName', '')
-    
+
     # Validate email format
     # (Basic validation, you might want a more comprehensive one)
     if '@' not in email or '.' not in email:
-        return jsonify({'success': False, 'message': 'Invalid email format'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Invalid email format'})
+
     # Validate password strength
     if len(password) < 8:
-        return jsonify({'success': False, 'message': 'Password must be at least 8 characters'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Password must be at least 8 characters'})
+
     # Register user
-    success, message, user = AuthService.register_user(email, password, full_name)
-    
+    success, message, result = await register_account(session, email, password, full_name)
+
     if success:
-        # Generate token for auto-login
-        token = AuthService.generate_token(user.user_id, user.email, user.role_id)
-        return jsonify({
+        return JSONResponse(status_code=201, content={
             'success': True,
             'message': message,
-            'token': token,
-            'user': {
-                'id': user.user_id,
-                'email': user.email,
-                'fullName': full_name,
-                'role_id': user.role_id
-            }
-        }), 201
+            'token': result['token'],
+            'user': result['user']
+        })
     else:
-        return jsonify({'success': False, 'message': message}), 400
+        return JSONResponse(status_code=400, content={'success': False, 'message': message})
 
-@auth_bp.route('/login', methods=['POST'])
-def login():
-    data = request.get_json()
-    
+@router.post('/login')
+async def login(data: Optional[Dict[str, Any]] = Body(None), session: Session = Depends(get_session)):
     # Validate request data
     if not data or not data.get('email') or not data.get('password'):
-        return jsonify({'success': False, 'message': 'Missing email or password'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Missing email or password'})
+
     email = data.get('email')
     password = data.get('password')
-    
+
     # Login user
-    success, message, result = AuthService.login_user(email, password)
-    
+    success, message, result = await AuthService.login_user(session, email, password)
+
     if success:
-        return jsonify({
+        return JSONResponse(status_code=200, content={
             'success': True,
             'message': message,
             'token': result['token'],
             'user': result['user']
-        }), 200
+        })
     else:
-        return jsonify({'success': False, 'message': message}), 401
+        return JSONResponse(status_code=401, content={'success': False, 'message': message})
 
-@auth_bp.route('/forgot-password', methods=['POST'])
-def forgot_password():
-    data = request.get_json()
-    
+@router.post('/forgot-password')
+async def forgot_password(data: Optional[Dict[str, Any]] = Body(None), session: Session = Depends(get_session)):
     # Validate request data
     if not data or not data.get('email'):
-        return jsonify({'success': False, 'message': 'Email is required'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Email is required'})
+
     email = data.get('email')
-    
-    # Send password reset email
-    success, message = AuthService.send_password_reset_email(email)
-    
+
+    # Queue the password reset email
+    success, message = await run_in_threadpool(AuthService.send_password_reset_email, session, email)
+
     # Always return 200 to prevent email enumeration
-    return jsonify({'success': success, 'message': message}), 200
+    return JSONResponse(status_code=200, content={'success': success, 'message': message})
 
-@auth_bp.route('/reset-password', methods=['POST'])
-def reset_password():
-    data = request.get_json()
-    
+@router.post('/reset-password')
+async def reset_password(data: Optional[Dict[str, Any]] = Body(None), session: Session = Depends(get_session)):
     # Validate request data
     if not data or not data.get('token') or not data.get('password'):
-        return jsonify({'success': False, 'message': 'Token and new password are required'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Token and new password are required'})
+
     token = data.get('token')
     password = data.get('password')
-    
+
     # Validate password strength
     if len(password) < 8:
-        return jsonify({'success': False, 'message': 'Password must be at least 8 characters'}), 400
-    
+        return JSONResponse(status_code=400, content={'success': False, 'message': 'Password must be at least 8 characters'})
+
     # Reset password
-    success, message = AuthService.reset_password(token, password)
-    
+    success, message = await AuthService.reset_password(session, token, password)
+
     if success:
-        return jsonify({'success': True, 'message': message}), 200
+        return JSONResponse(status_code=200, content={'success': True, 'message': message})
     else:
-        return jsonify({'success': False, 'message': message}), 400
+        return JSONResponse(status_code=400, content={'success': False, 'message': message})
 
-@auth_bp.route('/me', methods=['GET'])
-@token_required
-def get_me(current_user):
+@router.get('/me')
+async def get_me(current_user: CachedUser = Depends(token_required), session: Session = Depends(get_session)):
     """Get current user info"""
-    from app.db.models import Profile
-    
-    profile = Profile.query.filter_by(user_id=current_user.user_id).first()
-    
-    return jsonify({
-        'success': True,
-        'user': {
-            'id': current_user.user_id,
-            'email': current_user.email,
-            'role_id': current_user.role_id,
-            'full_name': profile.full_name if profile else "",
-            'avatar_url': profile.avatar_url if profile else None,
-            'bio': profile.bio if profile else None
-        }
-    }), 200
+    user = await run_in_threadpool(load_me, session, current_user.user_id)
+    if user is None:
+        return JSONResponse(status_code=404, content={'success': False, 'message': 'User not found'})
+
+    return {'success': True, 'user': user}
 
 # Test protected routes for different roles
-@auth_bp.route('/admin-test', methods=['GET'])
-@token_required
-@role_required(1)  # Admin role
-def admin_test(current_user):
-    return jsonify({
+@router.get('/admin-test')
+async def admin_test(current_user: CachedUser = Depends(role_required(1))):  # Admin role
+    return {
         'success': True,
         'message': 'You have admin access',
         'user_id': current_user.user_id
-    }), 200
+    }
 
-@auth_bp.route('/user-test', methods=['GET'])
-@token_required
-@role_required(2)  # User role
-def user_test(current_user):
-    return jsonify({
+@router.get('/user-test')
+async def user_test(current_user: CachedUser = Depends(role_required(2))):  # User role
+    return {
         'success': True,
         'message': 'You have user access',
         'user_id': current_user.user_id
-    }), 200
\ No newline at end of file
+    }
@@ -1,73 +1,216 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Body, Query, Response, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional, Dict, Any
+import anyio
+import asyncio
+import base64
 import json
+import logging
 import os
 from pathlib import Path
 import uuid
+import weakref
 from datetime import datetime
-import shutil
 
-from ..models import Conversation, ConversationCreate, ConversationUpdate, Message
-from ..config import BASE_DIR, UPLOAD_DIR, CONVERSATION_DIR
+from ..models import ChatRequest, Conversation, ConversationCreate, ConversationSummary, ConversationUpdate, Message, MessageAppend
+from ..config import BASE_DIR, UPLOAD_DIR, CONVERSATION_DIR, CONVERSATION_INDEX_PATH, CONVERSATION_BACKEND, CONVERSATION_DB_PATH, CHAT_GENERATOR, CHAT_LOCAL_TOKEN_DELAY, CHAT_RAG_TIMEOUT, CHAT_RAG_URL
+from ..services import json_codec
+from ..services.answer_generator import open_answer_generator
+from ..services.conversation_cache import conversation_cache
+from ..services.conversation_index import is_conversation_empty
+from ..services.conversation_storage import VersionConflict, open_conversation_storage
+from ..services.document_store import document_store
+from ..services.ingestion import ingestion_queue
+from ..services.io_pool import io_pool
+from ..services.json_codec import CodecJSONResponse
+from ..services.text_index import track_conversations
 
-router = APIRouter(prefix="/conversations", tags=["conversations"])
+logger = logging.getLogger(__name__)
 
-# Helper function to check if a conversation is empty
-def is_conversation_empty(conversation):
-    # A conversation is considered empty if it has no messages
-    # or all messages are empty strings
-    if not conversation.get("messages"):
-        return True
-    
-    return all(
-        not msg.get("content") or msg.get("content").strip() == "" 
-        for msg in conversation.get("messages", [])
-    )
+router = APIRouter(prefix="/conversations", tags=["conversations"], default_response_class=CodecJSONResponse)
+
+conversation_store = open_conversation_storage(
+    CONVERSATION_BACKEND, CONVERSATION_DIR, CONVERSATION_INDEX_PATH, CONVERSATION_DB_PATH
+)
+conversation_index = conversation_store.index
+# Messages are searchable through /search; the index follows every store write
+track_conversations(conversation_store)
+# GET serves hot conversations from memory; the cache drops whatever the store changes
+conversation_cache.track(conversation_store)
+
+# Writes the assistant's side of POST /{id}/chat
+answer_generator = open_answer_generator(CHAT_GENERATOR, CHAT_LOCAL_TOKEN_DELAY, CHAT_RAG_URL, CHAT_RAG_TIMEOUT)
+
+# Fields the list endpoint can return; "messages" is read from disk per page
+LIST_FIELDS = ("id", "title", "lastMessage", "timestamp", "pdf_file", "message_count", "version", "messages")
+DEFAULT_LIST_FIELDS = ("id", "title", "lastMessage", "timestamp", "pdf_file", "message_count")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Per-conversation asyncio locks: requests for the same conversation queue on the event
+# loop instead of each holding an I/O thread while it waits for the file lock
+conversation_locks = weakref.WeakValueDictionary()
+
+def conversation_lock(conversation_id):
+    lock = conversation_locks.get(conversation_id)
+    if lock is None:
+        lock = conversation_locks[conversation_id] = asyncio.Lock()
+    return lock
+
+# Helpers for version ETags: a conversation's ETag is its quoted version number
+def version_etag(version):
+    return f'"{version}"'
+
+def parse_if_match(if_match):
+    """Version an If-Match header requires: None when absent, "*" for any existing version"""
+    if if_match is None:
+        return None
+    value = if_match.strip()
+    if value == "*":
+        return "*"
+    value = value[2:] if value.startswith("W/") else value
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        # No version can match an ETag this API never issued
+        raise VersionConflict(None)
+
+def check_precondition(conversation_id, expected):
+    if expected == "*":
+        if not conversation_store.exists(conversation_id):
+            raise VersionConflict(None)
+    else:
+        conversation_store.check_version(conversation_id, expected)
+
+# Helper function to decide whether an index entry shows up in the list
+def is_listed(entry):
+    # Skip empty conversations unless they carry a PDF
+    return not (entry["is_empty"] and not entry.get("pdf_file"))
 
-# Helper function to load conversations
+# Helper function to load the conversation list from the summary index
 def load_conversations():
-    conversations = []
-    for file_path in CONVERSATION_DIR.glob("*.json"):
-        try:
-            with open(file_path, "r") as f:
-                conversation = json.load(f)
-                
-                # Skip empty conversations
-                if is_conversation_empty(conversation) and not conversation.get("pdf_file"):
-                    continue
-                
-                # Ensure message IDs are strings for compatibility
-                if "messages" in conversation and conversation["messages"]:
-                    for msg in conversation["messages"]:
-                        if "id" in msg and not isinstance(msg["id"], str):
-                            msg["id"] = str(msg["id"])
-                
-                conversations.append(conversation)
-        except Exception as e:
-            print(f"Error loading conversation {file_path}: {e}")
-    return conversations
-
-@router.get("/", response_model=List[Conversation])
-async def get_conversations():
-    return load_conversations()
+    return [entry for entry in conversation_index.list_entries() if is_listed(entry)]
+
+# Helper function to read a conversation with its appended messages
+def read_conversation(conversation_id):
+    return conversation_store.read(conversation_id)
+
+# Helper function returning a conversation's version and JSON body (blocking; runs in the I/O pool).
+# The body is None when the version is one of ``cached_etags``, and both are None when there is
+# no such conversation. A conversation cached at its current version is encoded from memory.
+# Otherwise response-shaped snapshots are sent as stored and anything else is validated against
+# the model; either way the result is cached for the next request.
+def read_conversation_body(conversation_id, cached_etags=()):
+    version = conversation_store.version(conversation_id)
+    if version is None:
+        return None, None
+    if version_etag(version) in cached_etags:
+        return version, None
+    
+    cached = conversation_cache.get(conversation_id, version)
+    if cached is not None:
+        return version, cached.body()
+    
+    raw = conversation_store.read_raw(conversation_id)
+    if raw is not None:
+        body, version = raw
+        conversation_cache.put(json_codec.loads(body))
+        return version, body
+    
+    conversation = read_conversation(conversation_id)
+    if conversation is None:
+        return None, None
+    conversation = Conversation.model_validate(conversation).model_dump(mode="json")
+    return conversation["version"], conversation_cache.put(conversation).body()
+
+# Helper function to find the messages a full-list update adds to the stored ones.
+# Returns None when the list does not start with the stored messages unchanged
+# (an edit or a removal), which needs a full rewrite.
+def new_message_tail(stored, messages):
+    count = len(stored)
+    if len(messages) < count:
+        return None
+    for old, new in zip(stored, messages):
+        if not isinstance(new, dict):
+            return None
+        if not isinstance(new.get("id", ""), str):
+            new = dict(new, id=str(new["id"]))
+        if old != new:
+            return None
+    return messages[count:]
+
+# Helpers for the opaque list cursor, an encoded (timestamp, id) key
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (str(timestamp), str(conversation_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields):
+    if not fields:
+        return DEFAULT_LIST_FIELDS
+    
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    # The id is always returned so clients can fetch the full conversation
+    return ["id"] + [name for name in selected if name != "id"]
+
+def project_entry(entry, selected):
+    item = {name: entry.get(name) for name in selected if name != "messages"}
+    if "messages" in selected:
+        conversation = read_conversation(entry["id"])
+        item["messages"] = conversation.get("messages", []) if conversation else []
+    return item
+
+# Helper function to read one page of the list (blocking; runs in the I/O pool)
+def list_conversations(limit, before, selected):
+    # Without paging parameters return the whole list, newest first
+    if limit is None and before is None:
+        entries, next_key = load_conversations(), None
+    else:
+        entries, next_key = conversation_index.page(limit or DEFAULT_PAGE_SIZE, before=before, include=is_listed)
+    
+    return [project_entry(entry, selected) for entry in entries], next_key
+
+@router.get("/", response_model=List[ConversationSummary], response_model_exclude_unset=True)
+async def get_conversations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    selected = parse_fields(fields)
+    before = decode_cursor(cursor) if cursor else None
+    
+    items, next_key = await io_pool.run(list_conversations, limit, before, selected)
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+    
+    return items
 
 @router.get("/{conversation_id}", response_model=Conversation)
-async def get_conversation(conversation_id: str):
-    file_path = CONVERSATION_DIR / f"{conversation_id}.json"
-    if not file_path.exists():
+async def get_conversation(
+    conversation_id: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    cached_etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] if if_none_match else []
+    version, body = await io_pool.run(read_conversation_body, conversation_id, cached_etags)
+    if version is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    with open(file_path, "r") as f:
-        conversation = json.load(f)
-        
-        # Ensure message IDs are strings for compatibility
-        if "messages" in conversation and conversation["messages"]:
-            for msg in conversation["messages"]:
-                if "id" in msg and not isinstance(msg["id"], str):
-                    msg["id"] = str(msg["id"])
-        
-        return conversation
+    etag = version_etag(version)
+    if body is None:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.post("/", response_model=Conversation)
 async def create_conversation(
@@ -93,32 +236,201 @@ async def create_conversation(
     
     # Handle PDF file upload if present
     if pdf_file:
-        # Save the file
+        # Store the file under the conversation's ID; identical content is kept once
+        document = await document_store.save_upload(pdf_file, conversation_id)
+        await io_pool.run(ingestion_queue.submit, conversation_id, document["sha256"])
+        
+        # The path names the document ID that /documents/{id} serves
         file_extension = os.path.splitext(pdf_file.filename)[1]
         file_name = f"{conversation_id}{file_extension}"
-        file_path = UPLOAD_DIR / file_name
-        
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(pdf_file.file, f)
-        
-        conversation["pdf_file"] = str(file_path)
+        conversation["pdf_file"] = str(UPLOAD_DIR / file_name)
     
     # Save conversation
-    with open(CONVERSATION_DIR / f"{conversation_id}.json", "w") as f:
-        json.dump(conversation, f)
+    await io_pool.run(conversation_store.write, conversation)
     
     return conversation
 
+@router.post("/{conversation_id}/messages", response_model=ConversationSummary, response_model_exclude_unset=True)
+async def append_messages(
+    conversation_id: str,
+    payload: MessageAppend,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    expected = parse_if_match(if_match)
+    messages = jsonable_encoder(payload.messages)
+    
+    fields = {"timestamp": jsonable_encoder(payload.timestamp) or datetime.now().isoformat()}
+    if payload.title is not None:
+        fields["title"] = payload.title
+    if payload.lastMessage is not None:
+        fields["lastMessage"] = payload.lastMessage
+    elif messages:
+        fields["lastMessage"] = messages[-1]["content"]
+    
+    async with conversation_lock(conversation_id):
+        entry = await io_pool.run(
+            conversation_store.append, conversation_id, messages, fields, None if expected == "*" else expected
+        )
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    response.headers["ETag"] = version_etag(entry["version"])
+    return project_entry(entry, DEFAULT_LIST_FIELDS)
+
+# Helper function formatting one Server-Sent Event with a JSON payload
+def sse_event(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + json_codec.dumps(data) + b"\n\n"
+
+# Helper function appending a message and making it the conversation's last one;
+# returns the index entry, or None once the conversation is gone
+async def append_message(conversation_id, message, expected=None):
+    fields = {"lastMessage": message["content"], "timestamp": message["timestamp"]}
+    async with conversation_lock(conversation_id):
+        return await io_pool.run(conversation_store.append, conversation_id, [message], fields, expected)
+
+@router.post("/{conversation_id}/chat")
+async def chat(
+    conversation_id: str,
+    payload: ChatRequest,
+    if_match: Optional[str] = Header(None)
+):
+    """Append a question and stream the answer to it as Server-Sent Events.
+    
+    A conversation that does not exist yet is started with the question (as
+    PUT creates one), unless If-Match is given.
+    
+    Events: ``start`` with the question and answer message IDs, one ``token``
+    per piece of the answer as the generator produces it, then ``done`` with
+    the stored answer and the conversation's version. The answer is appended
+    once it is complete; if the generator fails or the client goes away, the
+    part written so far is stored instead (and ``error`` ends the stream).
+    The client keeps its copy of the conversation in step from these events
+    and never sends the history back.
+    """
+    if not payload.content.strip():
+        raise HTTPException(status_code=400, detail="Message content is empty")
+    expected = parse_if_match(if_match)
+    
+    question = {
+        "id": str(payload.id) if payload.id is not None else str(uuid.uuid4()),
+        "role": "user",
+        "content": payload.content,
+        "timestamp": datetime.now().isoformat()
+    }
+    async with conversation_lock(conversation_id):
+        entry = await io_pool.run(append_question, conversation_id, question, payload.title, expected)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    conversation = await io_pool.run(read_conversation, conversation_id)
+    messages = conversation["messages"] if conversation is not None else [question]
+    
+    return StreamingResponse(
+        stream_answer(conversation_id, messages, question["id"], entry["version"]),
+        media_type="text/event-stream",
+        # Tokens are flushed as they come: no caching, no proxy buffering
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Helper function appending a chat question, or starting the conversation with it when
+# it does not exist and no If-Match was given (blocking; runs in the I/O pool).
+# Returns the index entry, or None for a missing conversation.
+def append_question(conversation_id, question, title, expected):
+    fields = {"lastMessage": question["content"], "timestamp": question["timestamp"]}
+    with conversation_store.locks(conversation_id):
+        entry = conversation_store.append(conversation_id, [question], fields, None if expected == "*" else expected)
+        if entry is not None or expected is not None:
+            return entry
+        return conversation_store.write({
+            "id": conversation_id,
+            "title": title or f"Conversation {conversation_id}",
+            "messages": [question],
+            "pdf_file": None,
+            **fields
+        })
+
+# Helper function generating the chat event stream and storing the answer
+async def stream_answer(conversation_id, messages, question_id, version):
+    answer_id = str(uuid.uuid4())
+    pieces = []
+    failed = False
+    yield sse_event("start", {"question_id": question_id, "answer_id": answer_id, "version": version})
+    try:
+        async for token in answer_generator.stream(messages):
+            pieces.append(token)
+            yield sse_event("token", {"text": token})
+    except Exception:
+        logger.exception("Answer generation failed for conversation %s", conversation_id)
+        failed = True
+    finally:
+        # Also runs when the response is cancelled because the client disconnected;
+        # the shield lets the partial answer be stored all the same
+        answer = None
+        if pieces:
+            answer = {"id": answer_id, "role": "assistant", "content": "".join(pieces), "timestamp": datetime.now().isoformat()}
+            with anyio.CancelScope(shield=True):
+                entry = await append_message(conversation_id, answer)
+            if entry is None:
+                answer = None
+            else:
+                version = entry["version"]
+    
+    if failed:
+        yield sse_event("error", {"detail": "Answer generation failed", "message": answer, "version": version})
+    else:
+        yield sse_event("done", {"message": answer, "version": version})
+
 @router.put("/{conversation_id}")
 async def update_conversation(
     conversation_id: str,
-    update_data: Dict[str, Any] = Body(...)
+    response: Response,
+    update_data: Dict[str, Any] = Body(...),
+    if_match: Optional[str] = Header(None)
 ):
-    file_path = CONVERSATION_DIR / f"{conversation_id}.json"
+    # With If-Match the update only applies to the version the client last saw (412 otherwise),
+    # so a client can retry it safely; without it the last write wins
+    expected = parse_if_match(if_match)
+    async with conversation_lock(conversation_id):
+        result, version = await io_pool.run(locked_update, conversation_id, update_data, expected)
+    
+    if version is not None:
+        (result if isinstance(result, Response) else response).headers["ETag"] = version_etag(version)
+    return result
+
+# Helper function holding the conversation's file lock for the whole read-modify-write,
+# so a PUT handled by another worker process cannot interleave with this one.
+# Returns the response and the conversation's version afterwards (None once deleted).
+def locked_update(conversation_id, update_data, expected=None):
+    with conversation_store.locks(conversation_id):
+        check_precondition(conversation_id, expected)
+        result = apply_update(conversation_id, update_data)
+        return result, conversation_store.version(conversation_id)
+
+# Helper function applying a PUT to storage (blocking; runs in the I/O pool)
+def apply_update(conversation_id, update_data):
+    fields = {key: update_data[key] for key in ("title", "lastMessage", "timestamp") if key in update_data}
+    conversation = read_conversation(conversation_id)
+    
+    # Fast path: the client sent the stored messages unchanged plus new ones, so only the tail is appended
+    if conversation is not None:
+        tail = new_message_tail(conversation["messages"], update_data["messages"]) if "messages" in update_data else []
+        if tail is not None:
+            if is_conversation_empty({"messages": conversation["messages"] + tail}) and not conversation.get("pdf_file"):
+                conversation_store.delete(conversation_id)
+                return JSONResponse(content={"detail": "Conversation is empty, not saving"})
+            
+            # Nothing new: no log record and no version bump
+            if tail or any(conversation.get(key) != value for key, value in fields.items()):
+                entry = conversation_store.append(conversation_id, tail, fields)
+                conversation.update(fields)
+                conversation["messages"].extend(tail)
+                conversation["version"] = entry["version"]
+            return conversation
     
     # Check if conversation exists, create it if not
-    if not file_path.exists():
-        print(f"Creating new conversation with ID: {conversation_id}")
+    if conversation is None:
+        logger.info("Creating new conversation with ID: %s", conversation_id)
         timestamp = datetime.now().isoformat()
         
         # Create a new conversation with the given ID
@@ -134,54 +446,46 @@ async def update_conversation(
         # Check if the new conversation is empty without PDF
         if is_conversation_empty(conversation) and not conversation.get("pdf_file"):
             return JSONResponse(content={"detail": "Skipping empty conversation"})
-    else:
-        # Load existing conversation
-        with open(file_path, "r") as f:
-            conversation = json.load(f)
     
     # Update fields
-    if "title" in update_data:
-        conversation["title"] = update_data["title"]
-    
-    if "lastMessage" in update_data:
-        conversation["lastMessage"] = update_data["lastMessage"]
+    conversation.update(fields)
     
     if "messages" in update_data:
         conversation["messages"] = update_data["messages"]
-        
-    if "timestamp" in update_data:
-        conversation["timestamp"] = update_data["timestamp"]
     
     # Check if the updated conversation is empty
     if is_conversation_empty(conversation) and not conversation.get("pdf_file"):
         # If the file exists, we might want to delete it since it's now empty
-        if file_path.exists():
-            file_path.unlink()
+        conversation_store.delete(conversation_id)
         return JSONResponse(content={"detail": "Conversation is empty, not saving"})
     
     # Save updated conversation
-    with open(file_path, "w") as f:
-        json.dump(conversation, f)
+    conversation_store.write(conversation)
     
     return conversation
 
 @router.delete("/{conversation_id}")
-async def delete_conversation(conversation_id: str):
-    file_path = CONVERSATION_DIR / f"{conversation_id}.json"
-    if not file_path.exists():
+async def delete_conversation(conversation_id: str, if_match: Optional[str] = Header(None)):
+    expected = parse_if_match(if_match)
+    async with conversation_lock(conversation_id):
+        removed = await io_pool.run(remove_conversation, conversation_id, expected)
+    if not removed:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    # Load conversation to check if there's an associated PDF
-    with open(file_path, "r") as f:
-        conversation = json.load(f)
-    
-    # Delete the PDF file if it exists
-    if conversation.get("pdf_file"):
-        pdf_path = Path(conversation["pdf_file"])
-        if pdf_path.exists():
-            pdf_path.unlink()
-    
-    # Delete the conversation file
-    file_path.unlink()
-    
-    return JSONResponse(content={"message": "Conversation deleted successfully"}) 
\ No newline at end of file
+    return JSONResponse(content={"message": "Conversation deleted successfully"})
+
+# Helper function deleting a conversation and its PDF (blocking; runs in the I/O pool)
+def remove_conversation(conversation_id, expected=None):
+    with conversation_store.locks(conversation_id):
+        conversation = read_conversation(conversation_id)
+        if conversation is None:
+            return False
+        check_precondition(conversation_id, expected)
+        
+        # Release the PDF; files saved before content-addressed storage are deleted directly
+        if conversation.get("pdf_file") and not document_store.release(conversation_id):
+            document_store.remove_legacy(conversation_id)
+        
+        # Delete the conversation files
+        conversation_store.delete(conversation_id)
+        return True
\ No newline at end of file
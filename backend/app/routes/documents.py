@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Query
+from fastapi.responses import JSONResponse
 from typing import List
 import os
 from pathlib import Path
 import uuid
-import shutil
 
 from ..config import BASE_DIR, UPLOAD_DIR
+from ..services.document_store import document_store
+from ..services.file_responses import file_response
+from ..services.ingestion import ingestion_queue
+from ..services.io_pool import io_pool
+from ..services.retrieval import invalidate as invalidate_retrieval, retrieve
+from ..services.vector_index import vector_index
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
@@ -20,39 +25,110 @@ async def upload_document(file: UploadFile = File(...)):
     file_id = str(uuid.uuid4())
     file_extension = os.path.splitext(file.filename)[1]
     file_name = f"{file_id}{file_extension}"
-    file_path = UPLOAD_DIR / file_name
     
-    # Save the file
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # Stream the file to content-addressed storage
+    document = await document_store.save_upload(file, file_id)
+    
+    # Extract and chunk the text in the background
+    job = await io_pool.run(ingestion_queue.submit, file_id, document["sha256"])
     
     return {
         "id": file_id,
         "filename": file.filename,
         "stored_filename": file_name,
-        "path": str(file_path)
+        "path": str(document_store.blob_path(document["sha256"])),
+        "sha256": document["sha256"],
+        "size": document["size"],
+        "deduplicated": document["deduplicated"],
+        "ingestion": job
     }
 
-@router.get("/{file_id}")
-async def get_document(file_id: str):
-    # Look for files with the given ID (regardless of extension)
-    matching_files = list(UPLOAD_DIR.glob(f"{file_id}.*"))
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    job = await io_pool.run(ingestion_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+@router.get("/{file_id}/ingestion")
+async def get_document_ingestion(file_id: str):
+    job = await io_pool.run(ingestion_queue.latest_for, file_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No ingestion job for this document")
+    
+    return job
+
+# Helper function to run a vector search and attach the matching chunks
+def search_chunks(sha256: str, queries: List[str], k: int):
+    if not vector_index.has(sha256):
+        # Chunks from before the index existed are embedded on first use
+        vector_index.add(sha256, [chunk["text"] for chunk in ingestion_queue.read_chunks(sha256)])
     
-    if not matching_files:
+    results = []
+    for query, matches in zip(queries, vector_index.search(queries, k, sha256)):
+        chunks = ingestion_queue.read_chunks(sha256, [chunk for _, _, chunk in matches])
+        results.append({
+            "query": query,
+            "matches": [
+                {**chunk, "score": round(score, 6)}
+                for (score, _, _), chunk in zip(matches, chunks)
+            ]
+        })
+    return results
+
+@router.get("/{file_id}/search")
+async def search_document(file_id: str, q: List[str] = Query(...), k: int = Query(5, ge=1, le=100)):
+    document = await io_pool.run(document_store.get, file_id)
+    if document is None:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    file_path = matching_files[0]
-    return FileResponse(path=file_path, filename=file_path.name)
+    if not ingestion_queue.chunks_path(document["sha256"]).exists():
+        raise HTTPException(status_code=409, detail="Document has not been ingested yet")
+    
+    # Several q parameters are scored together in one batch
+    results = await io_pool.run(search_chunks, document["sha256"], q, k)
+    return {"id": file_id, "results": results}
+
+@router.get("/{file_id}/retrieve")
+async def retrieve_document(file_id: str, q: str = Query(..., min_length=1), k: int = Query(5, ge=1, le=50)):
+    document = await io_pool.run(document_store.get, file_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    if not ingestion_queue.chunks_path(document["sha256"]).exists():
+        raise HTTPException(status_code=409, detail="Document has not been ingested yet")
+    
+    # Keyword and vector rankings fused with RRF; repeated queries come from the cache
+    results, cached = await retrieve(document["sha256"], q, k)
+    return {"id": file_id, "sha256": document["sha256"], "query": q, "cached": cached, "results": results}
+
+@router.get("/{file_id}")
+async def get_document(file_id: str, request: Request):
+    located = await io_pool.run(document_store.locate, file_id)
+    if located is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    # Supports If-None-Match/If-Modified-Since (304) and byte ranges (206)
+    file_path, file_name, etag = located
+    try:
+        return await file_response(request, file_path, file_name, etag)
+    except FileNotFoundError:
+        # Deleted by another worker since it was located
+        raise HTTPException(status_code=404, detail="Document not found")
 
 @router.delete("/{file_id}")
 async def delete_document(file_id: str):
-    # Look for files with the given ID (regardless of extension)
-    matching_files = list(UPLOAD_DIR.glob(f"{file_id}.*"))
+    document = await io_pool.run(document_store.get, file_id)
+    if document is not None:
+        invalidate_retrieval(document["sha256"])
     
-    if not matching_files:
-        raise HTTPException(status_code=404, detail="Document not found")
+    # Drop the reference; the stored file goes once nothing else uses it
+    if await io_pool.run(document_store.release, file_id):
+        return JSONResponse(content={"message": "Document deleted successfully"})
     
-    file_path = matching_files[0]
-    os.remove(file_path)
+    # Files saved before content-addressed storage are deleted directly
+    if not await io_pool.run(document_store.remove_legacy, file_id):
+        raise HTTPException(status_code=404, detail="Document not found")
     
-    return JSONResponse(content={"message": "Document deleted successfully"}) 
\ No newline at end of file
+    return JSONResponse(content={"message": "Document deleted successfully"})
\ No newline at end of file
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..middleware.auth_middleware import role_required
+from ..services.profiler import profiler
+
+# Request profiles hold code paths and timings; admins only
+router = APIRouter(prefix="/profiles", tags=["profiles"], dependencies=[Depends(role_required(1))])
+
+@router.get("")
+async def list_profiles():
+    """Summaries of the kept request profiles, newest first"""
+    return profiler.profiles()
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int):
+    """One profile as collapsed stacks, for flamegraph.pl, speedscope or inferno"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
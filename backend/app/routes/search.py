@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from ..services.document_store import document_store
+from ..services.ingestion import ingestion_queue
+from ..services.io_pool import io_pool
+from ..services.text_index import make_snippet, text_index
+from .conversations import read_conversation
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# Helper function turning index hits into results with snippets (blocking; runs in the I/O pool)
+def build_results(query, hits):
+    conversations = {}
+    chunks = {}
+    results = []
+    for score, group, key in hits:
+        kind, _, owner = group.partition(":")
+        if kind == "conversation":
+            if owner not in conversations:
+                conversations[owner] = read_conversation(owner)
+            conversation = conversations[owner]
+            message = next((msg for msg in (conversation or {}).get("messages", []) if str(msg.get("id")) == key), None)
+            if message is None:
+                continue
+            results.append({
+                "type": "conversation",
+                "conversation_id": owner,
+                "title": conversation.get("title"),
+                "message_id": key,
+                "role": message.get("role"),
+                "timestamp": message.get("timestamp"),
+                "snippet": make_snippet(message.get("content") or "", query),
+                "score": round(score, 6)
+            })
+        else:
+            chunks.setdefault(owner, []).append((len(results), key))
+            results.append({"type": "document", "sha256": owner, "chunk": key, "score": round(score, 6)})
+    
+    # Chunk texts are read once per document for all of its hits
+    for sha256, wanted in chunks.items():
+        found = {chunk["chunk"]: chunk for chunk in ingestion_queue.read_chunks(sha256, [key for _, key in wanted])}
+        document_ids = document_store.documents_for(sha256)
+        for position, key in wanted:
+            chunk = found.get(key)
+            results[position].update(
+                document_ids=document_ids,
+                page=chunk["page"] if chunk else None,
+                snippet=make_snippet(chunk["text"], query) if chunk else ""
+            )
+    
+    return results
+
+@router.get("/")
+async def search(
+    q: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=100),
+    type: Optional[str] = Query(None, pattern="^(conversation|document)$")
+):
+    # Ranked by BM25 over the inverted index; no conversation files are scanned
+    hits = await io_pool.run(text_index.search, q, k, f"{type}:" if type else None)
+    results = await io_pool.run(build_results, q, hits)
+    return {"query": q, "results": results}
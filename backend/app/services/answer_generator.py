@@ -0,0 +1,100 @@
+# backend/app/services/answer_generator.py
+import asyncio
+import importlib
+import json
+import re
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List
+
+# A word with the whitespace after it, so the tokens join back into the text
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class AnswerGenerator(ABC):
+    """Produces an assistant answer as a stream of text tokens.
+
+    ``stream`` receives the conversation's messages, the question last, and
+    yields pieces of the answer as they become available; the answer is
+    their concatenation. A generator that calls a model should await it
+    (or run it in a thread) rather than block the event loop.
+    """
+
+    @abstractmethod
+    def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+class RAGServiceAnswerGenerator(AnswerGenerator):
+    """Answers from the RAG service's ``POST /ask`` (the PDF question answering pipeline).
+
+    The service returns the whole answer at once, so it is asked in a
+    thread and the answer is then yielded word by word. A failed request
+    raises, which ends the chat stream with an ``error`` event.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def ask(self, question: str) -> str:
+        request = urllib.request.Request(
+            f"{self.url}/ask", data=json.dumps({"query": question}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())["answer"]
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read()).get("detail")
+            except ValueError:
+                detail = None
+            raise RuntimeError(f"RAG service answered {e.code}: {detail or e.reason}") from e
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        question = messages[-1]["content"] if messages else ""
+        answer = await asyncio.get_running_loop().run_in_executor(None, self.ask, question)
+        for token in TOKEN_PATTERN.findall(answer or ""):
+            yield token
+
+
+class LocalAnswerGenerator(AnswerGenerator):
+    """Deterministic stand-in answering from the question alone, for development and tests.
+
+    The same messages always give the same tokens; ``delay`` seconds pass
+    before each token to mimic a model's pace.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def answer(self, messages: List[Dict]) -> str:
+        question = messages[-1]["content"].strip() if messages else ""
+        earlier = len(messages) - 1
+        return (
+            f"You asked: {question} "
+            f"This is a placeholder answer from the local generator, "
+            f"written after {earlier} earlier message{'' if earlier == 1 else 's'}."
+        )
+
+    async def stream(self, messages: List[Dict]) -> AsyncIterator[str]:
+        for token in TOKEN_PATTERN.findall(self.answer(messages)):
+            # Yield to the event loop between tokens even without a delay
+            await asyncio.sleep(self.delay)
+            yield token
+
+
+def open_answer_generator(name: str, local_delay: float = 0.0, rag_url: str = "", rag_timeout: float = 120.0) -> AnswerGenerator:
+    """Create the generator named by CHAT_GENERATOR: ``rag``, ``local``, or
+    ``module:factory`` for any other, where ``factory()`` returns an AnswerGenerator"""
+    if name == "rag":
+        return RAGServiceAnswerGenerator(rag_url, rag_timeout)
+    if name == "local":
+        return LocalAnswerGenerator(local_delay)
+    module_name, _, attribute = name.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Unknown answer generator: {name}")
+    factory = getattr(importlib.import_module(module_name), attribute)
+    return factory()
@@ -0,0 +1,30 @@
+# backend/app/services/auth_db.py
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.config import DATABASE_URL, engine_options
+
+# One pooled engine per process, shared by every auth request
+engine = create_engine(DATABASE_URL, **engine_options())
+SessionLocal = sessionmaker(bind=engine)
+
+# A forked worker must not reuse the parent's pooled connections; it opens its own
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+
+async def get_session() -> AsyncIterator[Session]:
+    """FastAPI dependency: a session for one request, closed afterwards.
+
+    Sessions connect lazily, so creating one does no I/O; closing returns
+    the connection to the pool and runs off the event loop.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        await run_in_threadpool(session.close)
@@ -1,42 +1,73 @@
 # backend/app/services/auth_service.py
 import os
+import logging
 import jwt
 import bcrypt
 import datetime
 from typing import Dict, Optional, Tuple
 from datetime import timedelta
-from passlib.hash import pbkdf2_sha256
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import secrets
 import string
+import time
+from dataclasses import dataclass
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 # Database models will be imported from db module
-from app.db.models import db, User, Profile, ResetToken
+from app.db.models import User, Profile, ResetToken
+from app.services.auth_db import SessionLocal
+from app.services.cache import TTLCache
+from app.services.mail_outbox import mail_outbox
+from app.services.metrics import registry
+from app.services.password_hasher import HasherBusy, password_hasher
+
+logger = logging.getLogger(__name__)
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'JWT_SECRET_KEY')  # Should be in env
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION = 24  # hours
 
-# Email Service Configuration (should be in env)
-EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
-EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
-EMAIL_USER = os.environ.get('EMAIL_USER', 'demotestmot@gmail.com')
-EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD', 'app-password')
-EMAIL_FROM = os.environ.get('EMAIL_FROM', 'no-reply@ragvlangchain.com')
+# Auth cache configuration: entries kept and their lifetime in seconds
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', 30))
+
+# Decoded tokens (keyed by token) and user snapshots (keyed by user_id), so
+# authenticated requests normally skip both the HMAC check and the database.
+# Every server worker has its own caches and invalidate_user() only clears
+# the calling worker's, so a user changed or deleted elsewhere (another
+# worker, manage.py, the database directly) may be served from a cache for
+# up to AUTH_CACHE_TTL seconds
+token_cache = TTLCache(AUTH_TOKEN_CACHE_SIZE, AUTH_CACHE_TTL)
+user_cache = TTLCache(AUTH_USER_CACHE_SIZE, AUTH_CACHE_TTL)
+
+def is_duplicate_email(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is the unique email index rejecting a row.
+
+    PostgreSQL and MySQL name the violated index (ix_users_email); SQLite
+    names the column (users.email).
+    """
+    message = str(error.orig)
+    return 'ix_users_email' in message or 'users.email' in message
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Read-only copy of the User columns request handlers use"""
+    user_id: int
+    email: str
+    role_id: int
 
 class AuthService:
-    @staticmethod
-    def hash_password(password: str) -> str:
-        """Hash a password using pbkdf2_sha256"""
-        return pbkdf2_sha256.hash(password)
+    # register_user, login_user and reset_password are coroutines: they await the
+    # hashing pool on the event loop and run their database work in the thread pool,
+    # so no thread waits while a password is hashed
     
     @staticmethod
-    def verify_password(password: str, password_hash: str) -> bool:
-        """Verify password against hash"""
-        return pbkdf2_sha256.verify(password, password_hash)
+    def hash_password(password: str) -> str:
+        """Hash a password using pbkdf2_sha256 (on the hashing process pool; blocks, for scripts)"""
+        return password_hasher.hash(password)
     
     @staticmethod
     def generate_token(user_id: int, email: str, role_id: int) -> str:
@@ -58,17 +89,56 @@ class AuthService:
             return None
     
     @staticmethod
-    def register_user(email: str, password: str, full_name: str = None) -> Tuple[bool, str, Optional[User]]:
+    def verify_token_cached(token: str) -> Optional[Dict]:
+        """Verify a JWT, reusing the decoded payload of a token seen recently"""
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+        
+        payload = AuthService.verify_token(token)
+        if payload:
+            # Never keep a payload past the token's own expiry
+            remaining = payload['exp'] - time.time() if 'exp' in payload else AUTH_CACHE_TTL
+            token_cache.set(token, payload, ttl=min(AUTH_CACHE_TTL, remaining))
+        return payload
+    
+    @staticmethod
+    def load_user(user_id: int) -> Optional[CachedUser]:
+        """Read a user from the database and cache it"""
+        with SessionLocal() as session:
+            user = session.get(User, user_id)
+        if not user:
+            return None
+        
+        cached = CachedUser(user_id=user.user_id, email=user.email, role_id=user.role_id)
+        user_cache.set(user_id, cached)
+        return cached
+    
+    @staticmethod
+    def invalidate_user(user_id: int):
+        """Drop a user's cached row and every cached token issued to them"""
+        user_cache.pop(user_id)
+        token_cache.invalidate(lambda token, payload: payload.get('sub') == user_id)
+    
+    @staticmethod
+    def get_user_with_profile(session: Session, criterion) -> Optional[Tuple[User, Optional[Profile]]]:
+        """Load a user and their profile (None if missing) in one joined query"""
+        return (
+            session.query(User, Profile)
+            .outerjoin(Profile, Profile.user_id == User.user_id)
+            .filter(criterion)
+            .first()
+        )
+    
+    @staticmethod
+    async def register_user(session: Session, email: str, password: str, full_name: str = None) -> Tuple[bool, str, Optional[CachedUser]]:
         """Register a new user"""
+        password_hash = await password_hasher.hash_async(password)
+        return await run_in_threadpool(AuthService._create_user, session, email, password_hash, full_name)
+    
+    @staticmethod
+    def _create_user(session: Session, email: str, password_hash: str, full_name: str) -> Tuple[bool, str, Optional[CachedUser]]:
         try:
-            # Check if user exists
-            existing_user = User.query.filter_by(email=email).first()
-            if existing_user:
-                return False, "Email already registered", None
-            
-            # Hash password
-            password_hash = AuthService.hash_password(password)
-            
             # Create user with default role_id=2 (user role)
             new_user = User(
                 email=email,
@@ -76,63 +146,88 @@ class AuthService:
                 role_id=2,  # Default user role
                 created_at=datetime.datetime.utcnow()
             )
+            session.add(new_user)
             
-            db.session.add(new_user)
-            db.session.commit()
-            
-            # Create user profile
+            # One flush assigns user_id; the profile goes into the same transaction
+            session.flush()
             profile = Profile(
                 user_id=new_user.user_id,
                 full_name=full_name or ""
             )
+            session.add(profile)
+            session.commit()
             
-            db.session.add(profile)
-            db.session.commit()
-            
-            return True, "Registration successful", new_user
+            return True, "Registration successful", CachedUser(
+                user_id=new_user.user_id, email=new_user.email, role_id=new_user.role_id
+            )
+        except IntegrityError as e:
+            # The unique index on email rejects duplicates, so no lookup is needed first;
+            # any other constraint (e.g. a missing role) is a failed registration
+            session.rollback()
+            if is_duplicate_email(e):
+                return False, "Email already registered", None
+            logger.error("Registration failed: %s", e.orig)
+            return False, f"Registration failed: {str(e.orig)}", None
         except Exception as e:
-            db.session.rollback()
+            session.rollback()
             return False, f"Registration failed: {str(e)}", None
     
     @staticmethod
-    def login_user(email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
+    async def login_user(session: Session, email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
         """Login a user"""
         try:
-            # Find user
-            user = User.query.filter_by(email=email).first()
+            # Find user and profile together
+            row = await run_in_threadpool(AuthService.get_user_with_profile, session, User.email == email)
             
-            if not user:
+            if not row:
                 return False, "Invalid email or password", None
             
+            user, profile = row
+            
             # Verify password
-            if not AuthService.verify_password(password, user.password_hash):
+            if not await password_hasher.verify_async(password, user.password_hash):
                 return False, "Invalid email or password", None
             
-            # Generate token
-            token = AuthService.generate_token(user.user_id, user.email, user.role_id)
-            
-            # Get user profile
-            profile = Profile.query.filter_by(user_id=user.user_id).first()
-            
-            return True, "Login successful", {
-                "token": token,
-                "user": {
-                    "id": user.user_id,
-                    "email": user.email,
-                    "role_id": user.role_id,
-                    "full_name": profile.full_name if profile else "",
-                    "avatar_url": profile.avatar_url if profile else None
-                }
-            }
+            # Upgrade hashes made with older parameters while the password is at hand
+            new_hash = None
+            if password_hasher.needs_rehash(user.password_hash):
+                new_hash = await password_hasher.hash_async(password)
+            
+            return True, "Login successful", await run_in_threadpool(AuthService._finish_login, session, user, profile, new_hash)
+        except HasherBusy:
+            raise
         except Exception as e:
             return False, f"Login failed: {str(e)}", None
     
     @staticmethod
-    def send_password_reset_email(email: str) -> Tuple[bool, str]:
+    def _finish_login(session: Session, user: User, profile: Optional[Profile], new_hash: Optional[str]) -> Dict:
+        if new_hash is not None:
+            user.password_hash = new_hash
+            session.commit()
+        
+        # Generate token
+        token = AuthService.generate_token(user.user_id, user.email, user.role_id)
+        
+        # The first authenticated request after login finds the user cached
+        user_cache.set(user.user_id, CachedUser(user_id=user.user_id, email=user.email, role_id=user.role_id))
+        
+        return {
+            "token": token,
+            "user": {
+                "id": user.user_id,
+                "email": user.email,
+                "role_id": user.role_id,
+                "full_name": profile.full_name if profile else "",
+                "avatar_url": profile.avatar_url if profile else None
+            }
+        }
+    
+    @staticmethod
+    def send_password_reset_email(session: Session, email: str) -> Tuple[bool, str]:
         """Send password reset email"""
         try:
             # Check if user exists
-            user = User.query.filter_by(email=email).first()
+            user = session.query(User).filter_by(email=email).first()
             if not user:
                 # Always return success to prevent email enumeration
                 return True, "If your email exists in our system, you will receive a password reset link shortly"
@@ -141,7 +236,7 @@ class AuthService:
             token = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(64))
             
             # Store token in the database (replace old token if exists)
-            reset_record = ResetToken.query.filter_by(user_id=user.user_id).first()
+            reset_record = session.query(ResetToken).filter_by(user_id=user.user_id).first()
             if reset_record:
                 reset_record.token = token
                 reset_record.expires_at = datetime.datetime.utcnow() + timedelta(hours=1)
@@ -151,9 +246,9 @@ class AuthService:
                     token=token,
                     expires_at=datetime.datetime.utcnow() + timedelta(hours=1)
                 )
-                db.session.add(reset_record)
+                session.add(reset_record)
             
-            db.session.commit()
+            session.commit()
             
             # Send email
             subject = "Password Reset Request"
@@ -170,56 +265,64 @@ class AuthService:
             </html>
             """
             
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = EMAIL_FROM
-            message["To"] = email
-            
-            # Add HTML content
-            message.attach(MIMEText(body, "html"))
-            
-            # Send email
-            with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
-                server.starttls()
-                server.login(EMAIL_USER, EMAIL_PASSWORD)
-                server.sendmail(EMAIL_FROM, email, message.as_string())
+            # Queue the email; the outbox sender delivers it in the background
+            mail_outbox.enqueue(email, subject, body)
             
             return True, "If your email exists in our system, you will receive a password reset link shortly"
             
         except Exception as e:
-            print(f"Error sending reset email: {str(e)}")
+            logger.exception("Error sending reset email: %s", e)
             return False, "Failed to send password reset email"
     
     @staticmethod
-    def reset_password(token: str, new_password: str) -> Tuple[bool, str]:
+    async def reset_password(session: Session, token: str, new_password: str) -> Tuple[bool, str]:
         """Reset user password using token"""
+        # Hashed up front, off the thread pool; the token is checked and used in one transaction
+        password_hash = await password_hasher.hash_async(new_password)
+        return await run_in_threadpool(AuthService._apply_password_reset, session, token, password_hash)
+    
+    @staticmethod
+    def _apply_password_reset(session: Session, token: str, password_hash: str) -> Tuple[bool, str]:
         try:
             # Find token in database
-            reset_record = ResetToken.query.filter_by(token=token).first()
+            reset_record = session.query(ResetToken).filter_by(token=token).first()
             
             if not reset_record:
                 return False, "Invalid or expired reset token"
             
             # Check if token is expired
             if reset_record.expires_at < datetime.datetime.utcnow():
-                db.session.delete(reset_record)
-                db.session.commit()
+                session.delete(reset_record)
+                session.commit()
                 return False, "Reset token has expired"
             
             # Update user password
-            user = User.query.get(reset_record.user_id)
+            user = session.get(User, reset_record.user_id)
             if not user:
                 return False, "User not found"
             
-            user.password_hash = AuthService.hash_password(new_password)
+            user.password_hash = password_hash
             user.updated_at = datetime.datetime.utcnow()
             
             # Delete the token
-            db.session.delete(reset_record)
-            db.session.commit()
+            session.delete(reset_record)
+            session.commit()
+            
+            # Sessions cached before the reset must be looked up again
+            AuthService.invalidate_user(user.user_id)
             
             return True, "Password has been reset successfully"
             
         except Exception as e:
-            db.session.rollback()
-            return False, f"Password reset failed: {str(e)}"
\ No newline at end of file
+            session.rollback()
+            return False, f"Password reset failed: {str(e)}"
+
+
+registry.function_counter(
+    "auth_cache_lookups_total", "Auth token and user cache lookups by result",
+    lambda: {
+        ("token", "hit"): token_cache.hits, ("token", "miss"): token_cache.misses,
+        ("user", "hit"): user_cache.hits, ("user", "miss"): user_cache.misses,
+    },
+    ["cache", "result"]
+)
@@ -0,0 +1,177 @@
+# backend/app/services/conversation_cache.py
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import CONVERSATION_CACHE_BYTES
+from app.services import json_codec
+from app.services.metrics import registry
+
+# Approximate bytes of a cached conversation besides its strings and message tuples
+ENTRY_OVERHEAD = 200
+
+
+class CachedConversation:
+    """A conversation in response shape, kept compact.
+
+    Messages are ``(id, role, content, timestamp)`` tuples rather than
+    dicts, and roles are interned, so a long conversation costs little
+    more than its strings.
+    """
+
+    __slots__ = ("id", "title", "lastMessage", "timestamp", "pdf_file", "version", "messages", "size")
+
+    def __init__(self, conversation: Dict):
+        self.id = conversation["id"]
+        self.title = conversation["title"]
+        self.lastMessage = conversation["lastMessage"]
+        self.timestamp = conversation["timestamp"]
+        self.pdf_file = conversation.get("pdf_file")
+        self.version = conversation["version"]
+        self.messages: Tuple[Tuple[str, str, str, str], ...] = tuple(
+            (msg["id"], sys.intern(msg["role"]), msg["content"], msg["timestamp"])
+            for msg in conversation["messages"]
+        )
+        size = ENTRY_OVERHEAD + sum(
+            sys.getsizeof(value) for value in (self.id, self.title, self.lastMessage, self.timestamp, self.pdf_file)
+        )
+        for message in self.messages:
+            # The interned role is shared, so only the tuple and its other strings count
+            size += sys.getsizeof(message) + sys.getsizeof(message[0]) + sys.getsizeof(message[2]) + sys.getsizeof(message[3])
+        self.size = size
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "lastMessage": self.lastMessage,
+            "timestamp": self.timestamp,
+            "messages": [
+                {"id": message_id, "role": role, "content": content, "timestamp": timestamp}
+                for message_id, role, content, timestamp in self.messages
+            ],
+            "pdf_file": self.pdf_file,
+            "version": self.version,
+        }
+
+    def body(self) -> bytes:
+        """The JSON response body"""
+        return json_codec.dumps(self.to_dict())
+
+
+class ConversationCache:
+    """Thread-safe LRU cache of parsed conversations within a byte budget.
+
+    Entries are kept until their estimated sizes add up to more than
+    ``max_bytes``; the least recently used are evicted first, and a
+    conversation larger than the whole budget is not kept. An entry is
+    identified by the conversation ID and its version, which the stores
+    never reuse, not even when a conversation is deleted and re-created.
+    ``get`` names the version the caller expects (the store's current
+    one), so an entry left stale by another worker process is never
+    served; ``track`` also drops entries as soon as this process changes
+    them. Hits, misses and evictions are counted for monitoring.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._reset()
+
+    def _reset(self):
+        self._entries: "OrderedDict[str, CachedConversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, conversation_id: str, version: int) -> Optional[CachedConversation]:
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return entry
+
+    def put(self, conversation: Dict) -> CachedConversation:
+        """Cache a response-shaped conversation dict; returns its compact form either way"""
+        entry = CachedConversation(conversation)
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            current = self._entries.get(entry.id)
+            if current is not None:
+                # A slower reader must not replace a newer version with the one it read
+                if current.version > entry.version:
+                    return entry
+                self._remove(entry.id)
+            self._entries[entry.id] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return entry
+
+    def discard(self, conversation_id: str):
+        with self._lock:
+            self._remove(conversation_id)
+
+    def _remove(self, conversation_id: str):
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def track(self, store):
+        """Drop a conversation when ``store`` writes, appends to or deletes it"""
+        store.written_listeners.append(lambda conversation: self.discard(conversation["id"]))
+        store.appended_listeners.append(lambda conversation_id, messages: self.discard(conversation_id))
+        store.deleted_listeners.append(self.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock at fork; the child starts empty
+        self._reset()
+
+
+conversation_cache = ConversationCache(CONVERSATION_CACHE_BYTES)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=conversation_cache._after_fork)
+
+registry.function_counter(
+    "conversation_cache_lookups_total", "Conversation cache lookups by result",
+    lambda: {("hit",): conversation_cache.hits, ("miss",): conversation_cache.misses}, ["result"]
+)
+registry.function_counter(
+    "conversation_cache_evictions_total", "Conversations evicted from the cache to stay within its byte budget",
+    lambda: {(): conversation_cache.evictions}
+)
+registry.function_gauge(
+    "conversation_cache_bytes", "Estimated size of the cached conversations",
+    lambda: {(): conversation_cache.bytes}
+)
+registry.function_gauge(
+    "conversation_cache_entries", "Conversations in the cache",
+    lambda: {(): len(conversation_cache._entries)}
+)
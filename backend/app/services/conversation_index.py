@@ -0,0 +1,216 @@
+# backend/app/services/conversation_index.py
+import bisect
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services import json_codec
+from app.services.conversation_storage import SummaryIndex
+from app.services.file_lock import FileLock, JournalTail
+
+# Fields kept in the index for every conversation
+SUMMARY_FIELDS = ("id", "title", "lastMessage", "timestamp", "pdf_file", "message_count", "last_message_id", "is_empty", "version")
+
+# Rewrite the journal once it holds this many more records than live entries
+COMPACT_SLACK = 64
+
+
+def is_conversation_empty(conversation: Dict) -> bool:
+    """Check if a conversation has no messages or only empty ones"""
+    if not conversation.get("messages"):
+        return True
+
+    return all(
+        not msg.get("content") or msg.get("content").strip() == ""
+        for msg in conversation.get("messages", [])
+    )
+
+
+def sort_key(entry: Dict) -> Tuple[str, str]:
+    """Ordering key of an index entry: (timestamp, id)"""
+    return (str(entry.get("timestamp") or ""), entry["id"])
+
+
+def summarize_conversation(conversation: Dict) -> Dict:
+    """Build the index entry for a full conversation dict"""
+    messages = conversation.get("messages") or []
+    return {
+        "id": str(conversation["id"]),
+        "title": conversation.get("title", ""),
+        "lastMessage": conversation.get("lastMessage", ""),
+        "timestamp": conversation.get("timestamp"),
+        "pdf_file": conversation.get("pdf_file"),
+        "message_count": len(messages),
+        "last_message_id": str(messages[-1].get("id")) if messages else None,
+        "is_empty": is_conversation_empty(conversation),
+        "version": conversation.get("version", 0),
+    }
+
+
+class ConversationIndex(SummaryIndex):
+    """Persistent summary index of the conversations stored in a directory.
+
+    The index is an append-only JSON Lines journal of ``put``/``delete``
+    records that is replayed into memory on first use and compacted when it
+    grows well past the number of live entries. If the journal is missing it
+    is rebuilt once from ``scan``, which yields every stored conversation. A sorted list of
+    ``(timestamp, id)`` keys is kept alongside the entries so pages can be
+    read in timestamp order without sorting the whole index.
+
+    Several worker processes may share the journal: writes hold a file
+    lock, and every access first applies the records other processes have
+    appended since (or replays the journal after one compacted it).
+    """
+
+    def __init__(self, index_path: Path, scan: Callable[[], Iterable[Dict]]):
+        self.index_path = Path(index_path)
+        self.scan = scan
+        self._entries: Dict[str, Dict] = {}
+        self._order: List[Tuple[str, str]] = []
+        self._journal_records = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._tail = JournalTail(self.index_path)
+        self._file_lock = FileLock(self.index_path.with_suffix(".lock"))
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock, self._file_lock:
+            if self._loaded:
+                return
+            if self.index_path.exists():
+                self._replay()
+            else:
+                self._rebuild()
+            self._loaded = True
+
+    def _replay(self):
+        entries = {}
+        records = self._tail.read_all()
+        for record in records:
+            if record.get("op") == "put":
+                entry = record["entry"]
+                entries[entry["id"]] = entry
+            elif record.get("op") == "delete":
+                entries.pop(record["id"], None)
+        self._entries = entries
+        self._order = sorted(sort_key(entry) for entry in entries.values())
+        self._journal_records = len(records)
+
+    def _refresh(self):
+        """Apply what other processes appended to the journal; callers hold the lock"""
+        records = self._tail.read_new()
+        if records is None:
+            self._replay()
+            return
+        for record in records:
+            if record.get("op") == "put":
+                entry = record["entry"]
+                self._unlink_order(self._entries.get(entry["id"]))
+                self._entries[entry["id"]] = entry
+                bisect.insort(self._order, sort_key(entry))
+            elif record.get("op") == "delete":
+                self._unlink_order(self._entries.pop(record["id"], None))
+        self._journal_records += len(records)
+
+    def _sync(self):
+        self._ensure_loaded()
+        self._refresh()
+
+    def rebuild(self):
+        """Rebuild the index by scanning every stored conversation once"""
+        with self._lock, self._file_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            entries = {}
+            for conversation in self.scan():
+                entry = summarize_conversation(conversation)
+                entries[entry["id"]] = entry
+            self._entries = entries
+            self._order = sorted(sort_key(entry) for entry in entries.values())
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self._tail.header().encode("utf-8"))
+            for entry in self._entries.values():
+                f.write(json_codec.dumps({"op": "put", "entry": entry}) + b"\n")
+        os.replace(tmp_path, self.index_path)
+        self._tail.mark()
+        self._journal_records = len(self._entries)
+
+    def _append(self, record: Dict):
+        with open(self.index_path, "ab") as f:
+            f.write(json_codec.dumps(record) + b"\n")
+        self._tail.mark()
+        self._journal_records += 1
+        if self._journal_records > 2 * len(self._entries) + COMPACT_SLACK:
+            self._write_snapshot()
+
+    def upsert(self, conversation: Dict) -> Dict:
+        """Add or replace the entry for a full conversation dict"""
+        return self.put_entry(summarize_conversation(conversation))
+
+    def put_entry(self, entry: Dict) -> Dict:
+        """Add or replace an already summarized entry"""
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._unlink_order(self._entries.get(entry["id"]))
+            self._entries[entry["id"]] = entry
+            bisect.insort(self._order, sort_key(entry))
+            self._append({"op": "put", "entry": entry})
+        return entry
+
+    def remove(self, conversation_id: str):
+        """Drop a conversation from the index"""
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            entry = self._entries.pop(conversation_id, None)
+            if entry is not None:
+                self._unlink_order(entry)
+                self._append({"op": "delete", "id": conversation_id})
+
+    def _unlink_order(self, entry: Optional[Dict]):
+        if entry is None:
+            return
+        key = sort_key(entry)
+        pos = bisect.bisect_left(self._order, key)
+        if pos < len(self._order) and self._order[pos] == key:
+            del self._order[pos]
+
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._sync()
+            return self._entries.get(conversation_id)
+
+    def list_entries(self) -> List[Dict]:
+        """Return a snapshot of all index entries, newest first"""
+        with self._lock:
+            self._sync()
+            return [self._entries[key[1]] for key in reversed(self._order)]
+
+    def page(self, limit: int, before: Optional[Tuple[str, str]] = None, include=None) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        """Return up to ``limit`` entries older than ``before``, newest first.
+
+        ``include`` optionally filters entries. The second element of the
+        result is the key to pass as ``before`` for the next page, or None
+        when there are no more entries.
+        """
+        with self._lock:
+            self._sync()
+            pos = len(self._order) if before is None else bisect.bisect_left(self._order, tuple(before))
+            items = []
+            while pos > 0 and len(items) < limit:
+                pos -= 1
+                entry = self._entries[self._order[pos][1]]
+                if include is None or include(entry):
+                    items.append(entry)
+            next_key = self._order[pos] if pos > 0 and items else None
+            return items, next_key
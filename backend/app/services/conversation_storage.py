@@ -0,0 +1,159 @@
+# backend/app/services/conversation_storage.py
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.file_lock import LockStripes
+
+# Metadata fields an appended record may change
+META_FIELDS = ("title", "lastMessage", "timestamp", "pdf_file")
+
+# Keys of a conversation, and of its messages, as the Conversation response model returns them,
+# with their exact types (bool is not an int here)
+RESPONSE_FIELDS = {"id": (str,), "title": (str,), "lastMessage": (str,), "timestamp": (str,), "messages": (list,),
+                   "pdf_file": (str, type(None)), "version": (int,)}
+MESSAGE_RESPONSE_FIELDS = {"id": (str,), "role": (str,), "content": (str,), "timestamp": (str,)}
+
+
+class VersionConflict(Exception):
+    """Raised when a change expects another version than the stored one"""
+
+    def __init__(self, current: Optional[int]):
+        super().__init__(
+            "Conversation has changed since the version given in If-Match" if current is not None
+            else "No stored conversation matches If-Match"
+        )
+        self.current = current
+
+
+def normalize_message_ids(conversation: Dict) -> Dict:
+    """Ensure message IDs are strings for compatibility"""
+    for msg in conversation.get("messages") or []:
+        if "id" in msg and not isinstance(msg["id"], str):
+            msg["id"] = str(msg["id"])
+    return conversation
+
+
+def _has_response_shape(item: Dict, fields: Dict) -> bool:
+    return len(item) == len(fields) and all(
+        name in item and type(item[name]) in types for name, types in fields.items()
+    )
+
+
+def is_response_shaped(conversation: Dict) -> bool:
+    """Whether a conversation, encoded as it is, is already what the Conversation model would return.
+
+    Such conversations can be sent to clients from their stored bytes
+    without being decoded, validated and encoded again.
+    """
+    return _has_response_shape(conversation, RESPONSE_FIELDS) and all(
+        type(msg) is dict and _has_response_shape(msg, MESSAGE_RESPONSE_FIELDS) for msg in conversation["messages"]
+    )
+
+
+class SummaryIndex(ABC):
+    """Conversation summaries in ``(timestamp, id)`` order, as used by the list endpoint.
+
+    Entries are the dicts built by ``summarize_conversation``.
+    """
+
+    @abstractmethod
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_entries(self) -> List[Dict]:
+        """All entries, newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def page(self, limit: int, before: Optional[Tuple[str, str]] = None, include=None) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        """Up to ``limit`` entries older than ``before`` (newest first) that pass
+        ``include``, and the key to pass as ``before`` for the next page"""
+        raise NotImplementedError
+
+
+class ConversationStorage(ABC):
+    """Interface shared by the conversation storage backends.
+
+    A backend stores conversations (metadata plus an ordered message list),
+    keeps a ``SummaryIndex`` of them in ``index`` and bumps a
+    conversation's ``version`` on every change. Versions are never reused
+    for an ID, not even after a delete and re-create, so a version names
+    one content. Changes may name the
+    version they expect and fail with VersionConflict otherwise.
+    ``locks(conversation_id)`` is a cross-process lock for callers that
+    read, modify and write a conversation. The listeners are called with
+    the conversation after each ``write``, with ``(conversation_id,
+    messages)`` after each ``append`` and with the conversation ID after
+    a ``delete``.
+    """
+
+    index: SummaryIndex
+
+    def __init__(self, lock_dir: Path):
+        self.locks = LockStripes(lock_dir)
+        self.written_listeners = []
+        self.appended_listeners = []
+        self.deleted_listeners = []
+
+    @abstractmethod
+    def exists(self, conversation_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self, conversation_id: str) -> Optional[Dict]:
+        """The full conversation, or None if it does not exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def version(self, conversation_id: str) -> Optional[int]:
+        """Current version of a conversation, or None if it does not exist"""
+        raise NotImplementedError
+
+    def read_raw(self, conversation_id: str) -> Optional[Tuple[bytes, int]]:
+        """The stored JSON of a conversation and its version, when those bytes are
+        already the response body (see ``is_response_shaped``); None otherwise,
+        and callers fall back to ``read``"""
+        return None
+
+    @abstractmethod
+    def iter_conversations(self) -> Iterable[Dict]:
+        """Yield every stored conversation (full scan)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, conversation: Dict, expected_version: Optional[int] = None) -> Dict:
+        """Create or replace a conversation at the next version"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def append(self, conversation_id: str, messages: List[Dict], fields: Optional[Dict] = None,
+               expected_version: Optional[int] = None) -> Optional[Dict]:
+        """Append messages and META_FIELDS changes; returns the updated index
+        entry, or None if the conversation does not exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, conversation_id: str, expected_version: Optional[int] = None):
+        """Remove a conversation; its last version is remembered so a re-created one continues after it"""
+        raise NotImplementedError
+
+    def check_version(self, conversation_id: str, expected: Optional[int]):
+        """Raise VersionConflict unless the conversation is at ``expected`` (None skips the check)"""
+        if expected is None:
+            return
+        current = self.version(conversation_id)
+        if current != expected:
+            raise VersionConflict(current)
+
+
+def open_conversation_storage(backend: str, conversation_dir: Path, index_path: Path, db_path: Path) -> ConversationStorage:
+    """Create the backend named by CONVERSATION_BACKEND (``json`` or ``sqlite``)"""
+    if backend == "json":
+        from app.services.conversation_store import ConversationStore
+        return ConversationStore(conversation_dir, index_path)
+    if backend == "sqlite":
+        from app.services.sqlite_conversation_store import SQLiteConversationStore
+        return SQLiteConversationStore(db_path)
+    raise ValueError(f"Unknown conversation storage backend: {backend}")
@@ -0,0 +1,264 @@
+# backend/app/services/conversation_store.py
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services import json_codec
+from app.services.conversation_index import ConversationIndex, summarize_conversation
+from app.services.conversation_storage import META_FIELDS, ConversationStorage, is_response_shaped, normalize_message_ids
+from app.services.file_lock import write_atomic
+from app.services.metrics import timed, timed_operation
+
+logger = logging.getLogger(__name__)
+
+# Never compact a log smaller than this many bytes
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+class ConversationStore(ConversationStorage):
+    """Conversation storage backend: JSON files plus an append-only log per conversation.
+
+    ``{id}.json`` holds the last compacted snapshot and ``{id}.log.jsonl``
+    holds the records appended since, one JSON object per line with new
+    ``messages`` and changed metadata ``fields``. Reads replay the log over
+    the snapshot; once the log outgrows the snapshot it is folded back in,
+    which keeps appends O(message size) amortized. The summary index is kept
+    in step with every write.
+
+    Every change bumps the conversation's ``version``, which is stored in
+    the snapshot and in each log record. Snapshots are replaced atomically
+    (temp file, fsync, rename) and replay skips log records the snapshot
+    already holds, so a crash or a concurrent reader sees either the old
+    or the new state, never a truncated or doubled one. Changes to a
+    conversation hold its file lock (one of a fixed set of lock files
+    under ``.locks``), so worker processes sharing the directory never
+    interleave writes to the same conversation, and a change can name
+    the version it expects to fail with VersionConflict instead of
+    overwriting a newer one. A delete leaves ``{id}.deleted`` holding the
+    last version, so a conversation re-created with the same ID carries
+    on from it and an ETag never names two different contents.
+
+    Files are encoded with ``json_codec``. Snapshots written in the exact
+    shape of the response model are flagged ``response_shaped`` in the
+    index, and while no log is pending ``read_raw`` hands out their bytes
+    as they are.
+    """
+
+    def __init__(self, conversation_dir: Path, index_path: Path):
+        super().__init__(Path(conversation_dir) / ".locks")
+        self.conversation_dir = Path(conversation_dir)
+        self.index = ConversationIndex(index_path, self.iter_conversations)
+
+    def snapshot_path(self, conversation_id: str) -> Path:
+        return self.conversation_dir / f"{conversation_id}.json"
+
+    def log_path(self, conversation_id: str) -> Path:
+        return self.conversation_dir / f"{conversation_id}.log.jsonl"
+
+    def tombstone_path(self, conversation_id: str) -> Path:
+        return self.conversation_dir / f"{conversation_id}.deleted"
+
+    def _deleted_version(self, conversation_id: str) -> int:
+        """Last version of a deleted conversation with this ID (0 if there was none)"""
+        try:
+            return int(self.tombstone_path(conversation_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def exists(self, conversation_id: str) -> bool:
+        return self.snapshot_path(conversation_id).exists()
+
+    @timed_operation("conversation.read")
+    def read(self, conversation_id: str) -> Optional[Dict]:
+        """Load a conversation with its pending log records applied"""
+        file_path = self.snapshot_path(conversation_id)
+        if not file_path.exists():
+            return None
+
+        conversation = json_codec.loads(file_path.read_bytes())
+
+        version = conversation.setdefault("version", 0)
+        for record in self._read_log(conversation_id):
+            # Records folded into the snapshot before its log was removed
+            if record.get("version", version + 1) <= version:
+                continue
+            conversation.setdefault("messages", []).extend(record.get("messages", []))
+            conversation.update(record.get("fields", {}))
+            version = conversation["version"] = record.get("version", version)
+
+        return normalize_message_ids(conversation)
+
+    def version(self, conversation_id: str) -> Optional[int]:
+        """Current version of a conversation, or None if it does not exist"""
+        if not self.exists(conversation_id):
+            return None
+        entry = self.index.get(conversation_id)
+        if entry is not None and "version" in entry:
+            return entry["version"]
+        conversation = self.read(conversation_id)
+        return None if conversation is None else conversation["version"]
+
+    @timed_operation("conversation.read_raw")
+    def read_raw(self, conversation_id: str) -> Optional[Tuple[bytes, int]]:
+        """The snapshot's bytes and version, if it is response-shaped and no log is pending"""
+        # Under the lock, so the entry, the log and the snapshot belong to the same version
+        with self.locks(conversation_id):
+            entry = self.index.get(conversation_id)
+            if entry is None or not entry.get("response_shaped") or self.log_path(conversation_id).exists():
+                return None
+            try:
+                return self.snapshot_path(conversation_id).read_bytes(), entry["version"]
+            except FileNotFoundError:
+                return None
+
+    def _read_log(self, conversation_id: str) -> Iterator[Dict]:
+        log_path = self.log_path(conversation_id)
+        if not log_path.exists():
+            return
+        with open(log_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json_codec.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted append; ignore it
+                    continue
+
+    def iter_conversations(self) -> Iterable[Dict]:
+        """Yield every stored conversation (full scan, used to rebuild the index)"""
+        with timed("conversation.glob"):
+            file_paths = list(self.conversation_dir.glob("*.json"))
+        for file_path in file_paths:
+            try:
+                conversation = self.read(file_path.stem)
+                if conversation is not None:
+                    yield conversation
+            except Exception as e:
+                logger.error("Error loading conversation %s: %s", file_path, e)
+
+    def iter_deleted_versions(self) -> Iterable[Tuple[str, int]]:
+        """Yield ``(conversation_id, last version)`` of every deleted conversation"""
+        for path in self.conversation_dir.glob("*.deleted"):
+            version = self._deleted_version(path.stem)
+            if version:
+                yield path.stem, version
+
+    @timed_operation("conversation.write")
+    def write(self, conversation: Dict, expected_version: Optional[int] = None) -> Dict:
+        """Replace a conversation with a fresh snapshot at the next version"""
+        conversation_id = conversation["id"]
+        with self.locks(conversation_id):
+            self.check_version(conversation_id, expected_version)
+            version = self.version(conversation_id)
+            if version is None:
+                # Re-created after a delete: continue from the deleted conversation's version
+                version = self._deleted_version(conversation_id)
+            conversation["version"] = version + 1
+            normalize_message_ids(conversation)
+            write_atomic(self.snapshot_path(conversation_id), json_codec.dumps(conversation))
+            self.tombstone_path(conversation_id).unlink(missing_ok=True)
+
+            log_path = self.log_path(conversation_id)
+            if log_path.exists():
+                log_path.unlink()
+
+            self.index.put_entry(dict(summarize_conversation(conversation), response_shaped=is_response_shaped(conversation)))
+            for listener in self.written_listeners:
+                listener(conversation)
+        return conversation
+
+    @timed_operation("conversation.append")
+    def append(self, conversation_id: str, messages: List[Dict], fields: Optional[Dict] = None,
+               expected_version: Optional[int] = None) -> Optional[Dict]:
+        """Append messages and metadata changes to a conversation's log.
+
+        Returns the updated index entry, or None if the conversation does
+        not exist. The record is fsynced before this returns.
+        """
+        with self.locks(conversation_id):
+            if not self.exists(conversation_id):
+                return None
+            self.check_version(conversation_id, expected_version)
+
+            fields = {key: value for key, value in (fields or {}).items() if key in META_FIELDS}
+            version = self.version(conversation_id) + 1
+            record = {"messages": messages, "fields": fields, "version": version}
+            line = json_codec.dumps(record) + b"\n"
+            with open(self.log_path(conversation_id), "a+b") as f:
+                # After a torn last line from an interrupted append, start a line of our own
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = self.index.get(conversation_id)
+            if entry is None:
+                # The index predates this conversation; summarize it once
+                entry = self.index.upsert(self.read(conversation_id))
+            else:
+                entry = dict(entry, **fields)
+                entry["version"] = version
+                entry["message_count"] = entry.get("message_count", 0) + len(messages)
+                if messages:
+                    entry["last_message_id"] = str(messages[-1].get("id"))
+                    entry["is_empty"] = entry.get("is_empty", True) and all(
+                        not msg.get("content") or msg.get("content").strip() == "" for msg in messages
+                    )
+                self.index.put_entry(entry)
+
+            if messages:
+                for listener in self.appended_listeners:
+                    listener(conversation_id, messages)
+
+            self._maybe_compact(conversation_id)
+            return entry
+
+    def _maybe_compact(self, conversation_id: str):
+        try:
+            log_size = os.path.getsize(self.log_path(conversation_id))
+            snapshot_size = os.path.getsize(self.snapshot_path(conversation_id))
+        except OSError:
+            return
+        if log_size >= max(COMPACT_MIN_BYTES, snapshot_size):
+            self.compact(conversation_id)
+
+    @timed_operation("conversation.compact")
+    def compact(self, conversation_id: str):
+        """Fold a conversation's log into its snapshot"""
+        with self.locks(conversation_id):
+            conversation = self.read(conversation_id)
+            if conversation is None:
+                return
+            # The snapshot keeps the version, so the log it replaces is skipped
+            # on replay even if a crash leaves the log behind
+            write_atomic(self.snapshot_path(conversation_id), json_codec.dumps(conversation))
+            log_path = self.log_path(conversation_id)
+            if log_path.exists():
+                log_path.unlink()
+
+            entry = self.index.get(conversation_id)
+            shaped = is_response_shaped(conversation)
+            if entry is not None and entry.get("response_shaped") != shaped:
+                self.index.put_entry(dict(entry, response_shaped=shaped))
+
+    @timed_operation("conversation.delete")
+    def delete(self, conversation_id: str, expected_version: Optional[int] = None):
+        """Remove a conversation's snapshot, log and index entry"""
+        with self.locks(conversation_id):
+            self.check_version(conversation_id, expected_version)
+            version = self.version(conversation_id)
+            if version is not None:
+                # Written before the files go, so a conversation re-created with this ID never reuses a version
+                write_atomic(self.tombstone_path(conversation_id), str(version).encode())
+            for path in (self.snapshot_path(conversation_id), self.log_path(conversation_id)):
+                if path.exists():
+                    path.unlink()
+            self.index.remove(conversation_id)
+            for listener in self.deleted_listeners:
+                listener(conversation_id)
@@ -0,0 +1,219 @@
+# backend/app/services/document_store.py
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.config import BLOB_DIR, MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+from app.services.file_lock import FileLock, file_signature
+from app.services.io_pool import io_pool
+from app.services.metrics import timed_operation
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES"""
+
+
+class DocumentStore:
+    """Content-addressed PDF storage with reference counts.
+
+    Each distinct file is stored once as ``blobs/<sha[:2]>/<sha>.pdf``.
+    ``manifest.json`` maps document IDs (upload IDs and conversation IDs) to
+    the blob they reference and counts references per blob; a blob is only
+    removed when its last document is released.
+
+    Files saved as ``{id}.<ext>`` in the upload directory before this
+    storage existed are found through a lookup table built by one directory
+    scan, so no request has to glob the upload directory.
+
+    Worker processes share the manifest: changes are made under a file
+    lock, and a process reloads the manifest whenever another one has
+    replaced it since its last read.
+    """
+
+    def __init__(self, blob_dir: Path, legacy_dir: Path):
+        self.blob_dir = Path(blob_dir)
+        self.legacy_dir = Path(legacy_dir)
+        self._legacy_files = None
+        self.tmp_dir = self.blob_dir / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.blob_dir / "manifest.json"
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._signature = None
+        self._file_lock = FileLock(self.blob_dir / "manifest.lock")
+        # Called with the SHA-256 of each blob that is deleted
+        self.blob_removed_listeners = []
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256[:2] / f"{sha256}.pdf"
+
+    def _load(self, reload: bool = False) -> Dict:
+        # Changes pass reload=True: under the file lock the manifest is always
+        # read afresh, since a rewrite can keep the same stat signature
+        signature = file_signature(self.manifest_path)
+        if reload or self._manifest is None or signature != self._signature:
+            if signature is not None:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {"documents": {}, "blobs": {}}
+            self._signature = signature
+        return self._manifest
+
+    def _save(self):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._signature = file_signature(self.manifest_path)
+
+    async def save_upload(self, upload: UploadFile, document_id: str) -> Dict:
+        """Stream an upload to disk in chunks, hashing as it goes, and register it.
+
+        Raises UploadTooLarge as soon as more than MAX_UPLOAD_BYTES have
+        been read; nothing is kept in that case.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        f = await io_pool.run(open, tmp_path, "wb")
+        try:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"File exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
+                await io_pool.run(_write_chunk, f, hasher, chunk)
+        except BaseException:
+            await io_pool.run(f.close)
+            await io_pool.run(tmp_path.unlink)
+            raise
+        await io_pool.run(f.close)
+
+        return await io_pool.run(self._commit, tmp_path, hasher.hexdigest(), size, document_id, upload.filename)
+
+    @timed_operation("document.commit")
+    def _commit(self, tmp_path: Path, sha256: str, size: int, document_id: str, filename: str) -> Dict:
+        with self._lock, self._file_lock:
+            manifest = self._load(reload=True)
+            blob = manifest["blobs"].get(sha256)
+            if blob is None:
+                blob_path = self.blob_path(sha256)
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob_path)
+                blob = manifest["blobs"][sha256] = {"size": size, "refs": 0}
+            else:
+                # Same content is already stored; keep the existing blob
+                tmp_path.unlink()
+
+            previous = manifest["documents"].get(document_id)
+            if previous is not None:
+                self._drop_ref(previous["sha256"])
+            blob["refs"] += 1
+            document = manifest["documents"][document_id] = {
+                "sha256": sha256,
+                "filename": filename,
+                "size": size,
+                "created": datetime.now().isoformat(),
+            }
+            self._save()
+            return dict(document, id=document_id, deduplicated=blob["refs"] > 1)
+
+    def _drop_ref(self, sha256: str):
+        blob = self._manifest["blobs"].get(sha256)
+        if blob is None:
+            return
+        blob["refs"] -= 1
+        if blob["refs"] <= 0:
+            del self._manifest["blobs"][sha256]
+            blob_path = self.blob_path(sha256)
+            if blob_path.exists():
+                blob_path.unlink()
+            for listener in self.blob_removed_listeners:
+                listener(sha256)
+
+    def get(self, document_id: str) -> Optional[Dict]:
+        with self._lock:
+            document = self._load()["documents"].get(document_id)
+            return dict(document, id=document_id) if document else None
+
+    def documents_for(self, sha256: str) -> List[str]:
+        """IDs of the documents that reference a blob"""
+        with self._lock:
+            return [
+                document_id for document_id, document in self._load()["documents"].items()
+                if document["sha256"] == sha256
+            ]
+
+    def _legacy_table(self) -> Dict[str, Path]:
+        if self._legacy_files is None:
+            self._legacy_files = {
+                path.stem: path for path in self.legacy_dir.iterdir() if path.is_file()
+            }
+        return self._legacy_files
+
+    def locate(self, document_id: str) -> Optional[Tuple[Path, str, Optional[str]]]:
+        """Return ``(path, download filename, etag)`` for a document ID.
+
+        Stored blobs use their SHA-256 as a strong ETag; for legacy files the
+        ETag is None and callers derive one from the file's stat.
+        """
+        document = self.get(document_id)
+        if document:
+            file_name = f"{document_id}{os.path.splitext(document['filename'] or '')[1]}"
+            return self.blob_path(document["sha256"]), file_name, f'"{document["sha256"]}"'
+
+        with self._lock:
+            path = self._legacy_table().get(document_id)
+        if path is None:
+            return None
+        if not path.exists():
+            # Another worker removed it after this one built its table
+            self._forget_legacy(document_id)
+            return None
+        return path, path.name, None
+
+    def _forget_legacy(self, document_id: str) -> Optional[Path]:
+        with self._lock:
+            return self._legacy_table().pop(document_id, None)
+
+    def remove_legacy(self, document_id: str) -> bool:
+        """Delete a file saved before content-addressed storage"""
+        path = self._forget_legacy(document_id)
+        if path is None:
+            return False
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, document_id: str) -> bool:
+        """Drop a document's reference; the blob goes when no references remain"""
+        with self._lock, self._file_lock:
+            manifest = self._load(reload=True)
+            document = manifest["documents"].pop(document_id, None)
+            if document is None:
+                return False
+            self._drop_ref(document["sha256"])
+            self._save()
+            return True
+
+
+@timed_operation("document.write_chunk")
+def _write_chunk(f, hasher, chunk: bytes):
+    # hashlib releases the GIL on large buffers, so hashing here stays off the event loop
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+document_store = DocumentStore(BLOB_DIR, UPLOAD_DIR)
@@ -0,0 +1,210 @@
+# backend/app/services/file_lock.py
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.services import json_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """``(inode, size, mtime_ns)`` of a file, or None if it does not exist.
+
+    Files replaced with ``os.replace`` get a new inode, so comparing
+    signatures tells a process whether another one has rewritten a file
+    since it last read it.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def write_atomic(path: Path, data: bytes):
+    """Replace a file so that readers, and a crash, only ever see the old or the new content.
+
+    The data goes to a temporary file in the same directory, is fsynced,
+    renamed over ``path``, and the rename itself is synced by fsyncing the
+    directory (POSIX only).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    if os.name != "nt":
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class FileLock:
+    """Exclusive lock shared by the threads of this process and by other processes.
+
+    Threads queue on an in-process lock first, so only one descriptor per
+    process ever waits on the OS lock (``flock`` on Unix, ``msvcrt.locking``
+    on Windows), and a thread may take the lock again while holding it.
+    The lock file is opened lazily in each process: a descriptor inherited
+    across ``fork`` would share its lock with the parent instead of
+    excluding it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+    def _descriptor(self) -> int:
+        if self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            fd = self._descriptor()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after about ten seconds; keep waiting
+                        time.sleep(0.05)
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth = 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth:
+            self._lock.release()
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class LockStripes:
+    """A fixed set of file locks keyed by hash, for per-item locking.
+
+    Items sharing a stripe also share a lock, which only costs some
+    concurrency, while the number of lock files stays bounded no matter
+    how many items are created and deleted.
+    """
+
+    def __init__(self, lock_dir: Path, count: int = 64):
+        self._stripes = [FileLock(Path(lock_dir) / f"{number:02d}.lock") for number in range(count)]
+
+    def __call__(self, key: str) -> FileLock:
+        return self._stripes[zlib.crc32(key.encode("utf-8")) % len(self._stripes)]
+
+
+class JournalTail:
+    """Follows a JSON Lines journal that other processes append to.
+
+    Remembers which journal it has read, identified by its first line, and
+    how many bytes of it have been applied. ``read_new`` returns only the
+    complete records added since; it returns None once the journal has been
+    replaced (compacted) by another process, and the caller replays it in
+    full with ``read_all``. Compacted journals start with a ``header()``
+    record so that a rewrite never looks like the file it replaced, even
+    when the file system reuses the inode; readers skip that record.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._head = None
+        self._offset = 0
+
+    @staticmethod
+    def header() -> str:
+        return json.dumps({"op": "journal", "id": uuid.uuid4().hex}) + "\n"
+
+    def read_all(self) -> List[Dict]:
+        self._head = None
+        self._offset = 0
+        return self.read_new() or []
+
+    def read_new(self) -> Optional[List[Dict]]:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None if self._head else []
+        with f:
+            head = f.readline()
+            if self._head is not None and head != self._head:
+                return None
+            if os.fstat(f.fileno()).st_size == self._offset:
+                return []
+            f.seek(self._offset)
+            data = f.read()
+        # Bytes after the last newline belong to a record still being written
+        end = data.rfind(b"\n") + 1
+        if self._head is None:
+            self._head = head if head.endswith(b"\n") else None
+            if self._head is None:
+                return []
+        self._offset += end
+        records = []
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                # A torn line from an interrupted append; ignore it
+                continue
+            if record.get("op") != "journal":
+                records.append(record)
+        return records
+
+    def mark(self):
+        """Record the journal as fully applied (after this process wrote it)"""
+        with open(self.path, "rb") as f:
+            self._head = f.readline()
+            self._offset = os.fstat(f.fileno()).st_size
@@ -0,0 +1,121 @@
+# backend/app/services/file_responses.py
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.services.io_pool import io_pool
+
+# Size of the reads used to stream a byte range
+RANGE_CHUNK_SIZE = 256 * 1024
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)`` offsets.
+
+    Returns None for headers that should be ignored (other units, several
+    ranges) and raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    if size == 0:
+        # An empty file has no bytes for any range to select
+        raise ValueError("Range not satisfiable")
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError("Malformed range")
+
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as required for If-None-Match
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == bare for tag in candidates
+    )
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def _iter_file_range(path: Path, start: int, end: int):
+    f = await io_pool.run(open, path, "rb")
+    try:
+        await io_pool.run(f.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await io_pool.run(f.read, min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await io_pool.run(f.close)
+
+
+async def file_response(request: Request, path: Path, filename: str, etag: Optional[str] = None) -> Response:
+    """Serve a file with ETag/Last-Modified validators, 304s and single byte ranges"""
+    stat = await io_pool.run(os.stat, path)
+    if etag is None:
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+
+    # Conditional GET; If-None-Match takes precedence over If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range != etag and if_range != headers["Last-Modified"]:
+        # The client's copy is stale, so send the whole file
+        range_header = None
+
+    if range_header:
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{stat.st_size}", **headers})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return StreamingResponse(
+                _iter_file_range(path, start, end),
+                status_code=206,
+                headers=headers,
+                media_type=guess_type(filename)[0] or "application/octet-stream",
+            )
+
+    return FileResponse(path=path, filename=filename, headers=headers, stat_result=stat)
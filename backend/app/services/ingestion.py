@@ -0,0 +1,260 @@
+# backend/app/services/ingestion.py
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import CHUNK_DIR, CHUNK_OVERLAP, CHUNK_SIZE, INGEST_WORKERS
+from app.services.document_store import document_store
+from app.services.file_lock import write_atomic
+from app.services.metrics import timed_operation
+
+# Finished jobs beyond this many are forgotten, oldest first
+MAX_TRACKED_JOBS = 1000
+
+
+def split_text(text: str, chunk_size: int, overlap: int) -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` offsets of overlapping chunks of ``text``.
+
+    Chunks end on whitespace where possible so words are not cut in half.
+    """
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            cut = text.rfind(" ", start + chunk_size // 2, end)
+            if cut != -1:
+                end = cut
+        yield start, end
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+
+
+def ingest_pdf(pdf_path: str, chunks_path: str, chunk_size: int, overlap: int) -> Dict:
+    """Extract a PDF page by page and write its chunks as JSON Lines.
+
+    Runs in a worker process. Pages are processed one at a time and their
+    chunks written immediately, so memory stays flat for large files. Each
+    chunk records its page number and character offsets within the page.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("pypdf is not installed; PDF ingestion is unavailable")
+
+    reader = PdfReader(pdf_path)
+    # Worker processes may parse the same upload at once; each writes its own temp file
+    tmp_path = f"{chunks_path}.{os.getpid()}.tmp"
+    pages = 0
+    chunks = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for page_number, page in enumerate(reader.pages, start=1):
+            pages += 1
+            text = " ".join((page.extract_text() or "").split())
+            for start, end in split_text(text, chunk_size, overlap):
+                f.write(json.dumps({
+                    "chunk": chunks,
+                    "page": page_number,
+                    "start": start,
+                    "end": end,
+                    "text": text[start:end],
+                }, ensure_ascii=False) + "\n")
+                chunks += 1
+    os.replace(tmp_path, chunks_path)
+    return {"pages": pages, "chunks": chunks}
+
+
+class IngestionQueue:
+    """Background PDF ingestion on a bounded process pool.
+
+    Chunks are stored per blob (``{sha256}.jsonl``), so content that is
+    already ingested is not parsed again. Job records are kept as files
+    under ``jobs/`` next to the chunks, so any worker process of the
+    server can answer a poll by job ID or by document ID; the process that
+    runs a job also tracks it in memory until it finishes.
+    """
+
+    def __init__(self, chunk_dir: Path, max_workers: int):
+        self.chunk_dir = Path(chunk_dir)
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        self.job_dir = self.chunk_dir / "jobs"
+        self.job_dir.mkdir(exist_ok=True)
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._futures: Dict[str, Future] = {}
+        self._inflight: Dict[str, Future] = {}
+        # Called with the SHA-256 of each blob whose chunks are ready
+        self.completed_listeners = []
+
+    def chunks_path(self, sha256: str) -> Path:
+        return self.chunk_dir / f"{sha256}.jsonl"
+
+    def job_path(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def latest_path(self, document_id: str) -> Path:
+        # Holds the ID of the document's latest job
+        return self.job_dir / f"latest-{document_id}"
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _save(self, job: Dict):
+        write_atomic(self.job_path(job["id"]), json.dumps(job).encode("utf-8"))
+
+    def submit(self, document_id: str, sha256: str) -> Dict:
+        """Queue ingestion of a stored document and return its job record"""
+        job = {
+            "id": uuid.uuid4().hex,
+            "document_id": document_id,
+            "sha256": sha256,
+            "status": "queued",
+            "pages": None,
+            "chunks": None,
+            "error": None,
+            "created": datetime.now().isoformat(),
+            "finished": None,
+        }
+        chunks_path = self.chunks_path(sha256)
+        with self._lock:
+            self._forget_finished()
+            if chunks_path.exists():
+                # Same content was ingested before
+                job["status"] = "done"
+                job["finished"] = job["created"]
+                future = None
+            else:
+                # Concurrent uploads of the same content share one parse
+                future = self._inflight.get(sha256)
+                if future is None:
+                    future = self._pool().submit(
+                        ingest_pdf, str(document_store.blob_path(sha256)), str(chunks_path), CHUNK_SIZE, CHUNK_OVERLAP
+                    )
+                    self._inflight[sha256] = future
+                self._jobs[job["id"]] = job
+                self._futures[job["id"]] = future
+            # Saved before the job can finish, so the finished record is the one left
+            self._save(job)
+            write_atomic(self.latest_path(document_id), job["id"].encode("ascii"))
+        if future is None:
+            self._notify(sha256)
+            return dict(job)
+        future.add_done_callback(lambda done, job_id=job["id"]: self._finish(job_id, done))
+        return self.get(job["id"])
+
+    def _forget_finished(self):
+        job_paths = list(self.job_dir.glob("*.json"))
+        excess = len(job_paths) - MAX_TRACKED_JOBS + 1
+        if excess <= 0:
+            return
+        job_paths.sort(key=lambda path: path.stat().st_mtime)
+        for path in job_paths:
+            if excess <= 0:
+                break
+            job = self._load(path.stem)
+            if job is None or job["status"] in ("queued", "running"):
+                continue
+            path.unlink(missing_ok=True)
+            latest_path = self.latest_path(job["document_id"])
+            try:
+                if latest_path.read_text() == job["id"]:
+                    latest_path.unlink()
+            except FileNotFoundError:
+                pass
+            excess -= 1
+
+    def _finish(self, job_id: str, future: Future):
+        with self._lock:
+            job = self._jobs.pop(job_id)
+            self._futures.pop(job_id, None)
+            self._inflight.pop(job["sha256"], None)
+            job["finished"] = datetime.now().isoformat()
+            error = future.exception()
+            if error is not None:
+                job["status"] = "failed"
+                job["error"] = str(error)
+            else:
+                job.update(future.result(), status="done")
+            self._save(job)
+        if error is None:
+            self._notify(job["sha256"])
+
+    def _notify(self, sha256: str):
+        for listener in self.completed_listeners:
+            listener(sha256)
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        try:
+            return json.loads(self.job_path(job_id).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if self._futures[job_id].running():
+                    job["status"] = "running"
+                return dict(job)
+        # A job of another worker process: its record, "running" while a parse writes its chunks
+        job = self._load(job_id)
+        if job is not None and job["status"] == "queued" and any(self.chunk_dir.glob(f"{job['sha256']}.jsonl.*.tmp")):
+            job["status"] = "running"
+        return job
+
+    def latest_for(self, document_id: str) -> Optional[Dict]:
+        try:
+            job_id = self.latest_path(document_id).read_text()
+        except FileNotFoundError:
+            return None
+        return self.get(job_id)
+
+    @timed_operation("chunks.read")
+    def read_chunks(self, sha256: str, numbers: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Load the stored chunks of a blob (empty if not ingested yet).
+
+        With ``numbers``, only those chunks are parsed, in the given order.
+        """
+        chunks_path = self.chunks_path(sha256)
+        if not chunks_path.exists():
+            return []
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            if numbers is None:
+                return [json.loads(line) for line in f if line.strip()]
+            wanted = list(numbers)
+            found = {}
+            remaining = set(wanted)
+            for number, line in enumerate(f):
+                if number in remaining:
+                    found[number] = json.loads(line)
+                    remaining.discard(number)
+                    if not remaining:
+                        break
+        return [found[number] for number in wanted if number in found]
+
+    def shutdown(self):
+        """Wait for running and queued jobs to finish"""
+        with self._lock:
+            executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def discard(self, sha256: str):
+        """Remove the chunks of a blob that is no longer stored"""
+        chunks_path = self.chunks_path(sha256)
+        if chunks_path.exists():
+            chunks_path.unlink()
+
+
+ingestion_queue = IngestionQueue(CHUNK_DIR, INGEST_WORKERS)
+document_store.blob_removed_listeners.append(ingestion_queue.discard)
@@ -0,0 +1,102 @@
+# backend/app/services/io_pool.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config import STORAGE_IO_MAX_QUEUE, STORAGE_IO_WORKERS
+from app.services.metrics import registry
+
+
+class IOPoolBusy(Exception):
+    """Raised when too many storage calls are already waiting for a worker"""
+
+
+class IOPool:
+    """Bounded thread pool that runs blocking file I/O off the event loop.
+
+    At most ``max_workers`` calls run at once; callers beyond that wait in
+    the executor queue, and once ``max_queue`` calls are waiting new ones
+    are rejected with IOPoolBusy instead of piling up. Queue depth, wait
+    time and rejections are counted for monitoring.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-io")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` on a pool thread and await its result"""
+        submitted = time.perf_counter()
+        with self._lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise IOPoolBusy("Storage is busy, please retry")
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_seconds += started - submitted
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.total_run_seconds += time.perf_counter() - started
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, task)
+
+    def shutdown(self):
+        """Wait for the calls already submitted"""
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 3) if finished else 0.0,
+                "avg_run_ms": round(self.total_run_seconds / finished * 1000, 3) if finished else 0.0,
+            }
+
+
+io_pool = IOPool(STORAGE_IO_WORKERS, STORAGE_IO_MAX_QUEUE)
+registry.function_gauge(
+    "storage_io_calls", "Storage calls waiting for or running on an I/O thread",
+    lambda: {("queued",): io_pool.queued, ("active",): io_pool.active}, ["state"]
+)
+registry.function_counter(
+    "storage_io_calls_finished_total", "Storage calls finished or turned away",
+    lambda: {("completed",): io_pool.completed, ("failed",): io_pool.failed, ("rejected",): io_pool.rejected},
+    ["outcome"]
+)
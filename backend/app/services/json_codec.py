@@ -0,0 +1,35 @@
+# backend/app/services/json_codec.py
+import json
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is used instead
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode ``obj`` as compact UTF-8 JSON.
+
+    Uses orjson when it is installed. The standard library fallback writes
+    the same compact form, so data written by either can be read by both.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes or text; raises ValueError on malformed input"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with ``dumps`` instead of ``json.dumps``"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
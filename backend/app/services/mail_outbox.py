@@ -0,0 +1,323 @@
+# backend/app/services/mail_outbox.py
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional
+
+from app.config import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Email Service Configuration (should be in env)
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USER = os.environ.get('EMAIL_USER', 'demotestmot@gmail.com')
+EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD', 'app-password')
+EMAIL_FROM = os.environ.get('EMAIL_FROM', 'no-reply@ragvlangchain.com')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') not in ('0', 'false', 'False')
+
+# Outbox configuration: database file, messages per SMTP session, retries
+MAIL_OUTBOX_PATH = os.environ.get('MAIL_OUTBOX_PATH', str(BASE_DIR / 'outbox.db'))
+MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 20))
+MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 6))
+MAIL_RETRY_BASE_SECONDS = float(os.environ.get('MAIL_RETRY_BASE_SECONDS', 5))
+MAIL_RETRY_MAX_SECONDS = float(os.environ.get('MAIL_RETRY_MAX_SECONDS', 900))
+# Idle SMTP sessions are kept open this long for the next batch
+MAIL_SMTP_IDLE_SECONDS = float(os.environ.get('MAIL_SMTP_IDLE_SECONDS', 60))
+
+# A claimed message returns to the queue if its sender dies for this long
+CLAIM_LEASE_SECONDS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body_html TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    sent REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+
+class SMTPPool:
+    """Reuses authenticated SMTP sessions instead of connecting per message.
+
+    Idle sessions are checked with NOOP before reuse and closed once they
+    have been idle for ``idle_seconds``.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, use_tls: bool,
+                 max_idle: int = 2, idle_seconds: float = MAIL_SMTP_IDLE_SECONDS):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.max_idle = max_idle
+        self.idle_seconds = idle_seconds
+        self._idle: List[tuple] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _after_fork(self):
+        # Sessions inherited from the parent are its sockets; never reuse them
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        self.opened += 1
+        return server
+
+    def acquire(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, released = self._idle.pop()
+            if now - released < self.idle_seconds:
+                try:
+                    if server.noop()[0] == 250:
+                        self.reused += 1
+                        return server
+                except smtplib.SMTPException:
+                    pass
+                except OSError:
+                    pass
+            _quit(server)
+        return self._connect()
+
+    def release(self, server: smtplib.SMTP, healthy: bool = True):
+        with self._lock:
+            if healthy and len(self._idle) < self.max_idle:
+                self._idle.append((server, time.monotonic()))
+                return
+        _quit(server)
+
+    def close_idle(self, force: bool = False):
+        """Close sessions idle past ``idle_seconds`` (all of them with ``force``)"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [item for item in self._idle if force or now - item[1] >= self.idle_seconds]
+            self._idle = [item for item in self._idle if item not in stale]
+        for server, _ in stale:
+            _quit(server)
+
+
+def _quit(server: smtplib.SMTP):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+def build_message(recipient: str, subject: str, body_html: str) -> str:
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = EMAIL_FROM
+    message["To"] = recipient
+
+    # Add HTML content
+    message.attach(MIMEText(body_html, "html"))
+    return message.as_string()
+
+
+class MailOutbox:
+    """Persistent outgoing mail queue in SQLite, drained by a background thread.
+
+    ``enqueue`` only inserts a row, so requests never wait on the mail
+    server. The sender claims due messages in batches (a claim is a lease,
+    so several processes can share one outbox and a crashed sender's
+    messages are picked up again), sends each batch over one pooled SMTP
+    session and reschedules failures with exponential backoff until
+    MAIL_MAX_ATTEMPTS is reached; when the server cannot be reached the
+    whole batch is rescheduled after one failed connect. Sent and failed
+    messages keep their row but not their body. An attempt is counted when a message is
+    claimed, so one whose delivery keeps killing the sender also ends up
+    failed once its lease has run out that many times.
+    """
+
+    def __init__(self, db_path: str, pool: SMTPPool):
+        self.db_path = db_path
+        self.pool = pool
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, recipient: str, subject: str, body_html: str) -> int:
+        """Queue a message for delivery and return its outbox ID"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (recipient, subject, body_html, next_attempt, created) VALUES (?, ?, ?, ?, ?)",
+                (recipient, subject, body_html, now, now),
+            )
+        self.start()
+        self._wake.set()
+        return cursor.lastrowid
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="mail-outbox", daemon=True)
+                self._thread.start()
+
+    def _after_fork(self):
+        # The sender thread and idle SMTP sessions belong to the parent; a
+        # forked process gets fresh locks and starts its own sender at app
+        # startup or on its first enqueue
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self.pool._after_fork()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.pool.close_idle(force=True)
+
+    def _claim(self, conn: sqlite3.Connection) -> List[Dict]:
+        """Lease a batch of due messages, counting an attempt for each; returns
+        them with their new attempt counts"""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE status IN ('pending', 'sending') AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?",
+                (now, MAIL_BATCH_SIZE),
+            ).fetchall()
+            # Out of attempts while still claimed: every sender that took it stopped before finishing
+            abandoned = [row for row in rows if row["attempts"] >= MAIL_MAX_ATTEMPTS]
+            conn.executemany(
+                "UPDATE outbox SET status = 'failed', body_html = '', last_error = ? WHERE id = ?",
+                [(f"Sender stopped during delivery {row['attempts']} times", row["id"]) for row in abandoned],
+            )
+            claimed = [dict(row, attempts=row["attempts"] + 1) for row in rows if row["attempts"] < MAIL_MAX_ATTEMPTS]
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', attempts = ?, next_attempt = ? WHERE id = ?",
+                [(row["attempts"], now + CLAIM_LEASE_SECONDS, row["id"]) for row in claimed],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for row in abandoned:
+            logger.error("Giving up on email %s to %s: sender stopped during delivery", row["id"], row["recipient"])
+        return claimed
+
+    def _next_due(self, conn: sqlite3.Connection) -> Optional[float]:
+        row = conn.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE status IN ('pending', 'sending')"
+        ).fetchone()
+        return row[0]
+
+    def _send_batch(self, conn: sqlite3.Connection, rows: List[Dict]):
+        server = None
+        for index, row in enumerate(rows):
+            if server is None:
+                try:
+                    server = self.pool.acquire()
+                except (smtplib.SMTPException, OSError) as e:
+                    # The mail server is unreachable: the rest of the batch fails
+                    # on this one connect and is retried together
+                    for unsent in rows[index:]:
+                        self._failed(conn, unsent, e)
+                    return
+            try:
+                server.sendmail(EMAIL_FROM, row["recipient"], build_message(row["recipient"], row["subject"], row["body_html"]))
+            except (smtplib.SMTPException, OSError) as e:
+                self._failed(conn, row, e)
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    # The session may be broken; open a fresh one for the rest
+                    self.pool.release(server, healthy=False)
+                    server = None
+                continue
+            # Bodies can hold secrets such as reset links; a delivered one is not kept
+            conn.execute(
+                "UPDATE outbox SET status = 'sent', sent = ?, body_html = '', last_error = NULL WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+        if server is not None:
+            self.pool.release(server)
+
+    def _failed(self, conn: sqlite3.Connection, row: Dict, error: Exception):
+        # The attempt was counted when the message was claimed
+        attempts = row["attempts"]
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE outbox SET status = 'failed', body_html = '', last_error = ? WHERE id = ?",
+                (str(error), row["id"]),
+            )
+            logger.error("Giving up on email %s to %s: %s", row["id"], row["recipient"], error)
+            return
+        delay = min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS)
+        conn.execute(
+            "UPDATE outbox SET status = 'pending', next_attempt = ?, last_error = ? WHERE id = ?",
+            (time.time() + delay, str(error), row["id"]),
+        )
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    rows = self._claim(conn)
+                    if rows:
+                        self._send_batch(conn, rows)
+                        continue
+                    next_due = self._next_due(conn)
+                except Exception as e:
+                    # Claimed messages return to the queue when their lease ends
+                    logger.exception("Mail outbox error: %s", e)
+                    next_due = time.time() + MAIL_RETRY_BASE_SECONDS
+                self.pool.close_idle()
+                timeout = MAIL_SMTP_IDLE_SECONDS if next_due is None else max(next_due - time.time(), 0)
+                self._wake.wait(timeout)
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        with closing(self._connect()) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {"messages": counts, "smtp_opened": self.pool.opened, "smtp_reused": self.pool.reused}
+
+
+mail_outbox = MailOutbox(
+    MAIL_OUTBOX_PATH,
+    SMTPPool(EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_USE_TLS),
+)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=mail_outbox._after_fork)
@@ -0,0 +1,257 @@
+# backend/app/services/metrics.py
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """A metric family whose samples are recorded without a lock.
+
+    Every thread records into its own shard (a dict keyed by label
+    values), so recording is a dict update that no other thread writes;
+    ``samples`` adds the shards up. Copying a shard is a single dict
+    operation under the GIL, so reading never races a recording thread.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _copies(self) -> List[Dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def reset(self):
+        self._local = threading.local()
+        with self._shards_lock:
+            self._shards = []
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A total that only goes up"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        totals = {}
+        for shard in self._copies():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.samples().items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, kept as the sum of increments and decrements"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, labels: Tuple[str, ...] = ()):
+        self.inc(-amount, labels)
+
+
+class FunctionGauge(_Metric):
+    """A gauge read from ``function`` at scrape time; it returns ``{label values: value}``"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], Dict], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.function().items())
+        ]
+
+
+class FunctionCounter(FunctionGauge):
+    """A total read from ``function`` at scrape time, for counts another object keeps"""
+
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Dict[Tuple[str, ...], List[float]]:
+        totals = {}
+        for shard in self._copies():
+            for labels, counts in shard.items():
+                # The list itself is still updated in place by its thread; copy it too
+                counts = list(counts)
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = counts
+                else:
+                    totals[labels] = [a + b for a, b in zip(total, counts)]
+        return totals
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for labels, counts in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of this process, rendered in the Prometheus text format.
+
+    Each worker process keeps its own values (they start from zero after
+    ``fork``), so under several workers a scrape shows the worker that
+    answered it.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def function_gauge(self, name: str, documentation: str, function: Callable[[], Dict],
+                       labelnames: Sequence[str] = ()) -> FunctionGauge:
+        return self._register(FunctionGauge(name, documentation, function, labelnames))
+
+    def function_counter(self, name: str, documentation: str, function: Callable[[], Dict],
+                         labelnames: Sequence[str] = ()) -> FunctionCounter:
+        return self._register(FunctionCounter(name, documentation, function, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _after_fork(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry._after_fork)
+
+storage_seconds = registry.histogram(
+    "storage_operation_seconds", "Time spent in storage operations", ["operation"]
+)
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """Record the time the block takes as a storage operation"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        storage_seconds.observe(time.perf_counter() - started, (operation,))
+
+
+def timed_operation(operation: str):
+    """Decorator form of ``timed``"""
+    labels = (operation,)
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                storage_seconds.observe(time.perf_counter() - started, labels)
+        return wrapper
+    return decorate
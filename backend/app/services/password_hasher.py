@@ -0,0 +1,121 @@
+# backend/app/services/password_hasher.py
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from passlib.hash import pbkdf2_sha256
+
+from app.config import WEB_WORKERS
+from app.services.metrics import registry
+
+# Password hashing configuration: PBKDF2 rounds, worker processes and how
+# many hash/verify calls may wait for a worker before new ones are refused.
+# Every server worker has its own pool, so by default they share the CPUs
+PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 29000))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // WEB_WORKERS)))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 64))
+
+
+class HasherBusy(Exception):
+    """Raised when too many password operations are already waiting"""
+
+
+def _hash(password: str, rounds: int) -> str:
+    # The rounds are encoded in the hash: $pbkdf2-sha256$<rounds>$<salt>$<checksum>
+    return pbkdf2_sha256.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pbkdf2_sha256.verify(password, password_hash)
+
+
+class PasswordHasher:
+    """pbkdf2_sha256 hashing and verification on a dedicated process pool.
+
+    ``hash_async``/``verify_async`` submit from the event loop and await the
+    result, so no thread is held while a hash runs and a burst of logins
+    uses at most ``max_workers`` cores. At most ``max_queue`` calls may
+    wait for a worker; beyond that HasherBusy is raised so the caller can
+    answer 429 instead of queueing without bound. A pool whose worker
+    died is replaced on the next call. ``hash``/``verify`` block until the
+    result is ready, for scripts.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, rounds: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        # Callers hold the lock; a broken pool accepts no more work, so the next call starts a new one
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False)
+
+    def _submit(self, func: Callable, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HasherBusy("Too many authentication requests, please retry")
+            executor = self._pool()
+            try:
+                future = executor.submit(func, *args)
+            except BrokenProcessPool:
+                self._discard_pool(executor)
+                raise
+            self.pending += 1
+        future.add_done_callback(lambda done: self._done(executor, done))
+        return future
+
+    def _done(self, executor: ProcessPoolExecutor, future: Future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._discard_pool(executor)
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password, self.rounds))
+
+    async def verify_async(self, password: str, password_hash: str) -> bool:
+        return await asyncio.wrap_future(self._submit(_verify, password, password_hash))
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password, self.rounds).result()
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._submit(_verify, password, password_hash).result()
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when a hash was made with other parameters than the configured ones"""
+        return pbkdf2_sha256.using(rounds=self.rounds).needs_update(password_hash)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_ROUNDS)
+
+registry.function_gauge(
+    "password_hash_pending", "Password hash/verify calls running or waiting for a hashing worker",
+    lambda: {(): password_hasher.pending}
+)
+registry.function_counter(
+    "password_hash_calls_total", "Password hash/verify calls by outcome",
+    lambda: {("completed",): password_hasher.completed, ("rejected",): password_hasher.rejected}, ["outcome"]
+)
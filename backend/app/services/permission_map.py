@@ -0,0 +1,102 @@
+# backend/app/services/permission_map.py
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import PERMISSION_CHECK_INTERVAL
+from app.db.models import PermissionVersion, Role, Permission
+from app.services.auth_db import SessionLocal
+
+
+class PermissionSnapshot(NamedTuple):
+    version: int
+    bits: Mapping[str, int]  # permission name -> single-bit mask
+    roles: Mapping[int, int]  # role_id -> OR of its permission bits
+
+
+class PermissionMap:
+    """Role -> permission sets held in memory as bitsets.
+
+    Every permission gets one bit (ordered by name, as seeded by
+    ``manage.py init-db``) and every role the OR of its permissions' bits,
+    so a check is two dict lookups and an AND. The tables are read into a
+    frozen snapshot that is swapped whole.
+
+    ``bump_version()`` counts a change to roles or permissions in the
+    ``permission_version`` row. Every process compares that row with its
+    snapshot's version at most once per ``check_interval`` seconds and
+    reloads when it moved, so a change made by ``manage.py`` or another
+    worker reaches all of them within that interval.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[PermissionSnapshot] = None
+        self._checked = 0.0  # time.monotonic() of the last version check
+
+    def bump_version(self):
+        """Record a change to roles or permissions for every process"""
+        with SessionLocal() as session:
+            changed = session.execute(
+                update(PermissionVersion).where(PermissionVersion.id == 1).values(version=PermissionVersion.version + 1)
+            ).rowcount
+            if not changed:
+                session.add(PermissionVersion(id=1, version=1))
+            session.commit()
+        # This process checks again on its next use
+        self._checked = 0.0
+
+    def stale(self) -> bool:
+        """True when the next check has to read the database"""
+        return self._snapshot is None or time.monotonic() - self._checked >= self.check_interval
+
+    def snapshot(self) -> PermissionSnapshot:
+        if not self.stale():
+            return self._snapshot
+        with self._lock:
+            if self.stale():
+                with SessionLocal() as session:
+                    version = self._stored_version(session)
+                    if self._snapshot is None or self._snapshot.version != version:
+                        self._snapshot = self._load(session, version)
+                self._checked = time.monotonic()
+            return self._snapshot
+
+    @staticmethod
+    def _stored_version(session: Session) -> int:
+        row = session.get(PermissionVersion, 1)
+        return row.version if row is not None else 0
+
+    @staticmethod
+    def _load(session: Session, version: int) -> PermissionSnapshot:
+        names = sorted(permission.name for permission in session.query(Permission).all())
+        bits = {name: 1 << position for position, name in enumerate(names)}
+
+        roles = {}
+        for role in session.query(Role).all():
+            mask = 0
+            for permission in role.permissions:
+                mask |= bits.get(permission.name, 0)
+            roles[role.role_id] = mask
+
+        return PermissionSnapshot(version, MappingProxyType(bits), MappingProxyType(roles))
+
+    def _current(self) -> PermissionSnapshot:
+        # Callers refresh a stale map off the event loop first (see permission_required);
+        # a check made just after the interval ran out uses that fresh snapshot
+        return self._snapshot if self._snapshot is not None else self.snapshot()
+
+    def role_exists(self, role_id: int) -> bool:
+        return role_id in self._current().roles
+
+    def has_permission(self, role_id: int, permission_name: str) -> bool:
+        snapshot = self._current()
+        return bool(snapshot.roles.get(role_id, 0) & snapshot.bits.get(permission_name, 0))
+
+
+permission_map = PermissionMap(PERMISSION_CHECK_INTERVAL)
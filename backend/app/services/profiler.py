@@ -0,0 +1,167 @@
+# backend/app/services/profiler.py
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import BASE_DIR, PROFILE_INTERVAL, PROFILE_KEEP
+
+# Leaf functions of a thread with nothing to do (worker threads waiting for work).
+# The event loop thread is sampled even when idle, as time spent waiting is part of a request.
+IDLE_LEAVES = {
+    ("thread.py", "_worker"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+# Deepest stack kept per sample; deeper frames are cut at the root end
+MAX_DEPTH = 128
+
+
+def frame_label(code) -> str:
+    path = Path(code.co_filename)
+    try:
+        name = path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        name = path.name
+    # Collapsed stacks separate frames with ";"; readers take the count after the last space
+    return f"{code.co_name} ({name}:{code.co_firstlineno})".replace(";", ",")
+
+
+class Profile:
+    """Stack samples taken while one request was in flight"""
+
+    def __init__(self, profile_id: int, method: str, path: str, thread_id: int):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.thread_id = thread_id
+        self.started = datetime.now().isoformat()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        self.status = None
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def finish(self, status: Optional[int]):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        self.status = status
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+        }
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks (``root;...;leaf count`` lines), as flamegraph.pl and speedscope read them"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Statistical profiler for individual requests.
+
+    While at least one profile is active, a background thread wakes every
+    ``interval`` seconds and records the stack of every busy thread, so a
+    profile shows both the event loop and the storage I/O threads working
+    for it. The sampled request is not slowed down beyond the sampler's
+    share of the GIL. Stacks are not told apart by request: profiles that
+    overlap in time each receive every sample taken meanwhile.
+
+    Finished profiles are kept in a ring buffer of the last ``keep``.
+    """
+
+    def __init__(self, interval: float, keep: int):
+        self.interval = interval
+        self.keep = keep
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._active: Dict[int, Profile] = {}
+        self._finished: deque = deque(maxlen=self.keep)
+        self._ids = itertools.count(1)
+        self._thread = None
+
+    def start(self, method: str, path: str) -> Profile:
+        """Begin profiling a request handled on the calling thread"""
+        with self._lock:
+            profile = Profile(next(self._ids), method, path, threading.get_ident())
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+        return profile
+
+    def stop(self, profile: Profile, status: Optional[int]):
+        with self._lock:
+            self._active.pop(profile.id, None)
+            profile.finish(status)
+            self._finished.append(profile)
+
+    def profiles(self) -> List[Dict]:
+        """Summaries of the kept profiles, newest first"""
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._finished)]
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            for profile in self._finished:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                while not self._active:
+                    self._wake.wait()
+                active = list(self._active.values())
+
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            loop_ids = {profile.thread_id for profile in active}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if thread_id not in loop_ids and (Path(code.co_filename).name, code.co_name) in IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)).replace(";", ","))
+                stacks.append(";".join(reversed(labels)))
+
+            with self._lock:
+                for profile in active:
+                    if profile.id not in self._active:
+                        # Stopped meanwhile; its stacks may already be read
+                        continue
+                    profile.samples += 1
+                    profile.stacks.update(stacks)
+            time.sleep(self.interval)
+
+    def _after_fork(self):
+        # The sampler thread does not survive fork; the child starts its own when needed
+        self._reset()
+
+
+profiler = SamplingProfiler(PROFILE_INTERVAL, PROFILE_KEEP)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=profiler._after_fork)
@@ -0,0 +1,102 @@
+# backend/app/services/retrieval.py
+import asyncio
+from typing import Dict, List, Sequence, Tuple
+
+from app.config import RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL
+from app.services.cache import TTLCache
+from app.services.document_store import document_store
+from app.services.ingestion import ingestion_queue
+from app.services.io_pool import io_pool
+from app.services.text_index import chunk_docs, document_group, make_snippet, text_index, tokenize
+from app.services.vector_index import vector_index
+
+# Damping constant of reciprocal rank fusion: score = sum(1 / (RRF_K + rank))
+RRF_K = 60
+# Each scorer ranks this many times k candidates before fusion
+CANDIDATE_FACTOR = 4
+
+# Results per (blob SHA-256, normalized query, k); a changed file has a new SHA
+retrieval_cache = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+
+
+def normalize_query(query: str) -> str:
+    """Queries differing only in case, spacing, punctuation or Unicode form share a key"""
+    return " ".join(tokenize(query))
+
+
+def ensure_indexed(sha256: str):
+    """Index chunks ingested before the keyword or vector index existed"""
+    if not text_index.has_group(document_group(sha256)):
+        text_index.set_group(document_group(sha256), chunk_docs(sha256))
+    if not vector_index.has(sha256):
+        vector_index.add(sha256, [text for _, text in chunk_docs(sha256)])
+
+
+def keyword_ranking(sha256: str, query: str, depth: int) -> List[int]:
+    return [chunk for _, _, chunk in text_index.search(query, depth, groups=[document_group(sha256)])]
+
+
+def vector_ranking(sha256: str, query: str, depth: int) -> List[int]:
+    return [chunk for _, _, chunk in vector_index.search([query], depth, sha256)[0]]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int) -> List[Tuple[int, float]]:
+    """Fuse ranked lists of chunk numbers into the ``k`` best ``(chunk, score)``"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            scores[chunk] = scores.get(chunk, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def build_snippets(sha256: str, query: str, fused: List[Tuple[int, float]],
+                   rankings: Sequence[Sequence[int]]) -> List[Dict]:
+    found = {chunk["chunk"]: chunk for chunk in ingestion_queue.read_chunks(sha256, [number for number, _ in fused])}
+    keyword, vector = ({number: rank for rank, number in enumerate(ranking, start=1)} for ranking in rankings)
+    results = []
+    for number, score in fused:
+        chunk = found.get(number)
+        if chunk is None:
+            continue
+        results.append({
+            "chunk": number,
+            "page": chunk["page"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "snippet": make_snippet(chunk["text"], query),
+            "score": round(score, 6),
+            "keyword_rank": keyword.get(number),
+            "vector_rank": vector.get(number),
+        })
+    return results
+
+
+async def retrieve(sha256: str, query: str, k: int) -> Tuple[List[Dict], bool]:
+    """Hybrid keyword + vector retrieval over one blob's chunks.
+
+    Both scorers run at the same time on the I/O pool and their rankings
+    are fused with RRF. Returns ``(results, served_from_cache)``.
+    """
+    key = (sha256, normalize_query(query), k)
+    cached = retrieval_cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    await io_pool.run(ensure_indexed, sha256)
+    depth = k * CANDIDATE_FACTOR
+    rankings = await asyncio.gather(
+        io_pool.run(keyword_ranking, sha256, query, depth),
+        io_pool.run(vector_ranking, sha256, query, depth),
+    )
+    fused = reciprocal_rank_fusion(rankings, k)
+    results = await io_pool.run(build_snippets, sha256, query, fused, rankings)
+    retrieval_cache.set(key, results)
+    return results, False
+
+
+def invalidate(sha256: str):
+    """Drop the cached results of a blob"""
+    retrieval_cache.invalidate(lambda key, _: key[0] == sha256)
+
+
+document_store.blob_removed_listeners.append(invalidate)
@@ -0,0 +1,346 @@
+# backend/app/services/sqlite_conversation_store.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services import json_codec
+from app.services.conversation_index import summarize_conversation
+from app.services.conversation_storage import (
+    META_FIELDS,
+    ConversationStorage,
+    SummaryIndex,
+    VersionConflict,
+    normalize_message_ids,
+)
+from app.services.metrics import timed_operation
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    last_message TEXT,
+    timestamp TEXT NOT NULL DEFAULT '',
+    pdf_file TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    last_message_id TEXT,
+    is_empty INTEGER NOT NULL DEFAULT 1,
+    version INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS conversations_timestamp ON conversations (timestamp, id);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS deleted_conversations (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+SUMMARY_COLUMNS = "id, title, last_message, timestamp, pdf_file, message_count, last_message_id, is_empty, version"
+
+UPSERT_CONVERSATION = """
+INSERT INTO conversations (id, title, last_message, timestamp, pdf_file, message_count, last_message_id, is_empty, version, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title, last_message = excluded.last_message, timestamp = excluded.timestamp,
+    pdf_file = excluded.pdf_file, message_count = excluded.message_count, last_message_id = excluded.last_message_id,
+    is_empty = excluded.is_empty, version = excluded.version, extra = excluded.extra
+"""
+
+# Top-level conversation keys with columns of their own; others are kept in ``extra``
+STORED_KEYS = ("id", "title", "lastMessage", "timestamp", "pdf_file", "messages", "version")
+
+# Conversations written per transaction by import_conversations
+IMPORT_BATCH_SIZE = 500
+
+
+def _encode(value) -> str:
+    # Stored as TEXT so the database stays readable with the sqlite3 shell
+    return json_codec.dumps(value).decode("utf-8")
+
+
+def _entry(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "lastMessage": row["last_message"],
+        "timestamp": row["timestamp"] or None,
+        "pdf_file": row["pdf_file"],
+        "message_count": row["message_count"],
+        "last_message_id": row["last_message_id"],
+        "is_empty": bool(row["is_empty"]),
+        "version": row["version"],
+    }
+
+
+def _summary_values(entry: Dict, extra: Optional[str]) -> Tuple:
+    timestamp = entry.get("timestamp")
+    return (
+        entry["id"], entry.get("title"), entry.get("lastMessage"),
+        "" if timestamp is None else str(timestamp), entry.get("pdf_file"),
+        entry.get("message_count", 0), entry.get("last_message_id"),
+        int(bool(entry.get("is_empty", True))), entry.get("version", 0), extra,
+    )
+
+
+class SQLiteSummaryIndex(SummaryIndex):
+    """Summary index read straight from the conversations table.
+
+    Pages walk the ``(timestamp, id)`` index backwards from the cursor,
+    so listing costs the rows returned, not the number of conversations.
+    """
+
+    # Rows fetched per query while a filtered page is being filled
+    SCAN_BATCH = 64
+
+    def __init__(self, store: "SQLiteConversationStore"):
+        self.store = store
+
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        row = self.store._connection().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return _entry(row) if row else None
+
+    def list_entries(self) -> List[Dict]:
+        rows = self.store._connection().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM conversations ORDER BY timestamp DESC, id DESC"
+        ).fetchall()
+        return [_entry(row) for row in rows]
+
+    def page(self, limit: int, before: Optional[Tuple[str, str]] = None, include=None) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        conn = self.store._connection()
+        batch = limit + 1 if include is None else max(limit + 1, self.SCAN_BATCH)
+        key = tuple(before) if before is not None else None
+        items = []
+        while True:
+            if key is None:
+                rows = conn.execute(
+                    f"SELECT {SUMMARY_COLUMNS} FROM conversations ORDER BY timestamp DESC, id DESC LIMIT ?", (batch,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {SUMMARY_COLUMNS} FROM conversations WHERE (timestamp, id) < (?, ?) "
+                    "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                    (key[0], key[1], batch),
+                ).fetchall()
+            for row in rows:
+                if len(items) == limit:
+                    # Older entries remain; the last one returned marks the cursor
+                    return items, key
+                entry = _entry(row)
+                key = (row["timestamp"], row["id"])
+                if include is None or include(entry):
+                    items.append(entry)
+            if len(rows) < batch:
+                return items, None
+
+
+class SQLiteConversationStore(ConversationStorage):
+    """Conversation storage backend: a SQLite database in WAL mode.
+
+    ``conversations`` holds one row per conversation with the summary
+    fields the list endpoint needs as columns (indexed on ``(timestamp,
+    id)``), and ``messages`` one row per message keyed by conversation
+    and position. Appends insert only the new message rows and update
+    the summary in the same transaction, and a full write replaces the
+    message rows with one batched insert. WAL lets readers run alongside
+    the single writer, across threads and worker processes; each thread
+    of each process opens its own connection.
+    """
+
+    def __init__(self, db_path: Path):
+        super().__init__(Path(f"{db_path}.locks"))
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index = SQLiteSummaryIndex(self)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Commits are durable once they return, as with the fsynced JSON backend
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def exists(self, conversation_id: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone() is not None
+
+    def version(self, conversation_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT version FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return row["version"] if row else None
+
+    @timed_operation("conversation.read")
+    def read(self, conversation_id: str) -> Optional[Dict]:
+        conn = self._connection()
+        # One read transaction, so the summary and the messages match
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT * FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            if row is None:
+                return None
+            messages = [
+                json_codec.loads(data) for (data,) in conn.execute(
+                    "SELECT data FROM messages WHERE conversation_id = ? ORDER BY position", (conversation_id,)
+                )
+            ]
+        finally:
+            conn.execute("COMMIT")
+
+        conversation = json_codec.loads(row["extra"]) if row["extra"] else {}
+        conversation.update({
+            "id": row["id"],
+            "title": row["title"],
+            "lastMessage": row["last_message"],
+            "timestamp": row["timestamp"] or None,
+            "messages": messages,
+            "pdf_file": row["pdf_file"],
+            "version": row["version"],
+        })
+        return normalize_message_ids(conversation)
+
+    def iter_conversations(self) -> Iterable[Dict]:
+        ids = [row["id"] for row in self._connection().execute("SELECT id FROM conversations")]
+        for conversation_id in ids:
+            conversation = self.read(conversation_id)
+            if conversation is not None:
+                yield conversation
+
+    def _store(self, conn: sqlite3.Connection, conversation: Dict):
+        extra = {key: value for key, value in conversation.items() if key not in STORED_KEYS}
+        conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation["id"],))
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, position, data) VALUES (?, ?, ?)",
+            [(conversation["id"], position, _encode(msg)) for position, msg in enumerate(conversation.get("messages") or [])],
+        )
+        conn.execute(UPSERT_CONVERSATION, _summary_values(summarize_conversation(conversation), _encode(extra) if extra else None))
+
+    @timed_operation("conversation.write")
+    def write(self, conversation: Dict, expected_version: Optional[int] = None) -> Dict:
+        conversation_id = conversation["id"]
+        with self.locks(conversation_id):
+            with self._transaction() as conn:
+                self.check_version(conversation_id, expected_version)
+                version = self.version(conversation_id)
+                if version is None:
+                    # Re-created after a delete: continue from the deleted conversation's version
+                    row = conn.execute("SELECT version FROM deleted_conversations WHERE id = ?", (conversation_id,)).fetchone()
+                    version = row["version"] if row else 0
+                    conn.execute("DELETE FROM deleted_conversations WHERE id = ?", (conversation_id,))
+                conversation["version"] = version + 1
+                self._store(conn, conversation)
+            for listener in self.written_listeners:
+                listener(conversation)
+        return conversation
+
+    @timed_operation("conversation.append")
+    def append(self, conversation_id: str, messages: List[Dict], fields: Optional[Dict] = None,
+               expected_version: Optional[int] = None) -> Optional[Dict]:
+        fields = {key: value for key, value in (fields or {}).items() if key in META_FIELDS}
+        with self.locks(conversation_id):
+            with self._transaction() as conn:
+                row = conn.execute(
+                    f"SELECT {SUMMARY_COLUMNS}, extra FROM conversations WHERE id = ?", (conversation_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if expected_version is not None and row["version"] != expected_version:
+                    raise VersionConflict(row["version"])
+
+                entry = dict(_entry(row), **fields)
+                conn.executemany(
+                    "INSERT INTO messages (conversation_id, position, data) VALUES (?, ?, ?)",
+                    [(conversation_id, entry["message_count"] + offset, _encode(msg)) for offset, msg in enumerate(messages)],
+                )
+                entry["message_count"] += len(messages)
+                entry["version"] += 1
+                if messages:
+                    entry["last_message_id"] = str(messages[-1].get("id"))
+                    entry["is_empty"] = entry["is_empty"] and all(
+                        not msg.get("content") or msg.get("content").strip() == "" for msg in messages
+                    )
+                conn.execute(UPSERT_CONVERSATION, _summary_values(entry, row["extra"]))
+
+            if messages:
+                for listener in self.appended_listeners:
+                    listener(conversation_id, messages)
+            return entry
+
+    @timed_operation("conversation.delete")
+    def delete(self, conversation_id: str, expected_version: Optional[int] = None):
+        with self.locks(conversation_id):
+            with self._transaction() as conn:
+                self.check_version(conversation_id, expected_version)
+                # Keep the last version so a conversation re-created with this ID never reuses it
+                conn.execute(
+                    "INSERT OR REPLACE INTO deleted_conversations (id, version) "
+                    "SELECT id, version FROM conversations WHERE id = ?", (conversation_id,)
+                )
+                conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+            for listener in self.deleted_listeners:
+                listener(conversation_id)
+
+    def import_conversations(self, conversations: Iterable[Dict], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """Copy conversations in as they are, versions included (one-shot migration).
+
+        Existing rows with the same IDs are replaced, so an interrupted
+        import can simply be run again. Listeners are not called.
+        """
+        count = 0
+        batch = []
+        for conversation in conversations:
+            batch.append(conversation)
+            if len(batch) >= batch_size:
+                count += self._import_batch(batch)
+                batch = []
+        if batch:
+            count += self._import_batch(batch)
+        return count
+
+    def import_deleted_versions(self, deleted: Iterable[Tuple[str, int]]) -> int:
+        """Record the last versions of conversations deleted in another store, so
+        one re-created here continues after them (one-shot migration)"""
+        rows = list(deleted)
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO deleted_conversations (id, version) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET version = MAX(version, excluded.version)",
+                rows,
+            )
+        return len(rows)
+
+    def _import_batch(self, conversations: List[Dict]) -> int:
+        with self._transaction() as conn:
+            for conversation in conversations:
+                conversation.setdefault("version", 0)
+                self._store(conn, conversation)
+        return len(conversations)
@@ -0,0 +1,389 @@
+# backend/app/services/text_index.py
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import TEXT_INDEX_PATH
+from app.services.document_store import document_store
+from app.services.file_lock import FileLock, JournalTail
+from app.services.ingestion import ingestion_queue
+
+# BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rewrite the journal once it holds this many more records than live groups
+COMPACT_SLACK = 64
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# A searchable unit: (key within its group, text)
+Doc = Tuple[object, str]
+
+
+def fold_diacritics(token: str) -> str:
+    """Strip accents and tone marks, e.g. ``phở`` -> ``pho``, ``đường`` -> ``duong``"""
+    decomposed = unicodedata.normalize("NFD", token.replace("đ", "d"))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """NFC-normalize and casefold ``text`` and split it into word tokens.
+
+    NFC makes precomposed and combining-mark spellings of the same
+    Vietnamese letter compare equal.
+    """
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).casefold())
+
+
+def analyze(text: str) -> Tuple[int, Dict[str, int]]:
+    """Return ``(token count, {term: frequency})`` for indexing ``text``.
+
+    Accented tokens are indexed both as written and with diacritics folded,
+    so a query typed without accents finds them while an accented query
+    only matches the exact spelling.
+    """
+    tokens = tokenize(text)
+    counts: Dict[str, int] = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+        folded = fold_diacritics(token)
+        if folded != token:
+            counts[folded] = counts.get(folded, 0) + 1
+    return len(tokens), counts
+
+
+def make_snippet(text: str, query: str, width: int = 240) -> str:
+    """Cut a window of ``text`` around the first word that matches ``query``"""
+    terms = set(tokenize(query))
+    start = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        word = unicodedata.normalize("NFC", match.group()).casefold()
+        if word in terms or fold_diacritics(word) in terms:
+            start = max(match.start() - width // 4, 0)
+            break
+    snippet = text[start:start + width].strip()
+    return ("…" if start else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+class TextIndex:
+    """Incrementally maintained BM25 inverted index.
+
+    Documents belong to groups (``conversation:<id>`` holds one document per
+    message, ``document:<sha256>`` one per chunk) that are replaced,
+    extended or dropped as a whole. Documents are numbered in insertion
+    order, and each term's postings are two ``array('I')`` columns of
+    document numbers and term frequencies, so they are compact and sorted.
+    Dropped documents are only flagged dead and skipped when scoring.
+    Searches score against NumPy copies of the per-document lengths and
+    live flags, made once after each change rather than per query.
+
+    Changes are journaled as JSON Lines (``set``/``add``/``drop`` records
+    with per-document term counts) and replayed on first use. The journal
+    is compacted, and dead documents purged from the postings, once it
+    outgrows the live groups. Without a journal the index is rebuilt once
+    from ``sources``, callables yielding ``(group, docs)`` pairs. Worker
+    processes sharing the journal write under a file lock and apply each
+    other's records before every access.
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.sources: List[Callable[[], Iterable[Tuple[str, Sequence[Doc]]]]] = []
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._tail = JournalTail(self.index_path)
+        self._file_lock = FileLock(self.index_path.with_suffix(".lock"))
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._keys: List[Tuple[str, object]] = []
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._groups: Dict[str, List[int]] = {}
+        self._live_docs = 0
+        self._live_length = 0
+        self._journal_records = 0
+        # (alive, lengths) as NumPy arrays; None once a document is added or dropped
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock, self._file_lock:
+            if self._loaded:
+                return
+            if self.index_path.exists():
+                self._replay()
+            else:
+                self._rebuild()
+            self._loaded = True
+
+    def _replay(self):
+        self._reset()
+        for record in self._tail.read_all():
+            self._apply(record)
+            self._journal_records += 1
+
+    def _refresh(self):
+        """Apply records other processes appended; callers hold the lock"""
+        records = self._tail.read_new()
+        if records is None:
+            self._replay()
+            return
+        for record in records:
+            self._apply(record)
+            self._journal_records += 1
+
+    def _apply(self, record: Dict):
+        group = record["group"]
+        if record["op"] in ("set", "drop"):
+            self._drop(group)
+        if record["op"] in ("set", "add"):
+            for key, length, counts in record["docs"]:
+                self._add(group, key, length, counts)
+
+    def _add(self, group: str, key, length: int, counts: Dict[str, int]):
+        number = len(self._keys)
+        self._keys.append((group, key))
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._groups.setdefault(group, []).append(number)
+        self._arrays = None
+        self._live_docs += 1
+        self._live_length += length
+        for term, frequency in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("I"))
+            postings[0].append(number)
+            postings[1].append(frequency)
+
+    def _drop(self, group: str):
+        for number in self._groups.pop(group, ()):
+            self._arrays = None
+            self._alive[number] = 0
+            self._live_docs -= 1
+            self._live_length -= self._lengths[number]
+
+    def _write(self, record: Dict):
+        # Callers hold both locks and have refreshed
+        self._apply(record)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._tail.mark()
+        self._journal_records += 1
+        dead = len(self._keys) - self._live_docs
+        if self._journal_records > 2 * len(self._groups) + COMPACT_SLACK or dead > self._live_docs + COMPACT_SLACK:
+            self._compact()
+
+    def _snapshot(self) -> List[Dict]:
+        docs: Dict[int, Dict[str, int]] = {}
+        for number, alive in enumerate(self._alive):
+            if alive:
+                docs[number] = {}
+        for term, (numbers, frequencies) in self._postings.items():
+            for number, frequency in zip(numbers, frequencies):
+                if number in docs:
+                    docs[number][term] = frequency
+        return [
+            {
+                "op": "set",
+                "group": group,
+                "docs": [[self._keys[n][1], self._lengths[n], docs[n]] for n in numbers],
+            }
+            for group, numbers in self._groups.items()
+        ]
+
+    def _write_snapshot(self, records: List[Dict]):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self._tail.header())
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+        self._tail.mark()
+
+    def compact(self):
+        """Renumber the live documents and rewrite the journal as one record per group"""
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            records = self._snapshot()
+            self._reset()
+            for record in records:
+                self._apply(record)
+            self._journal_records = len(records)
+            self._write_snapshot(records)
+
+    def rebuild(self):
+        """Rebuild the index from its sources (full scan)"""
+        with self._lock, self._file_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._reset()
+            records = []
+            for source in self.sources:
+                for group, docs in source():
+                    record = {"op": "set", "group": group, "docs": _analyze_docs(docs)}
+                    self._apply(record)
+                    records.append(record)
+            self._journal_records = len(records)
+            self._write_snapshot(records)
+
+    def has_group(self, group: str) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            self._refresh()
+            return group in self._groups
+
+    def set_group(self, group: str, docs: Sequence[Doc]):
+        """Replace every document of a group"""
+        record = {"op": "set", "group": group, "docs": _analyze_docs(docs)}
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._write(record)
+
+    def add_docs(self, group: str, docs: Sequence[Doc]):
+        """Add documents to a group, keeping the ones it has"""
+        record = {"op": "add", "group": group, "docs": _analyze_docs(docs)}
+        if not record["docs"]:
+            return
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._write(record)
+
+    def drop_group(self, group: str):
+        self._ensure_loaded()
+        with self._lock, self._file_lock:
+            self._refresh()
+            if group in self._groups:
+                self._write({"op": "drop", "group": group})
+
+    def search(self, query: str, k: int, prefix: Optional[str] = None,
+               groups: Optional[Iterable[str]] = None) -> List[Tuple[float, str, object]]:
+        """Return the ``k`` best ``(score, group, key)`` matches for ``query`` by BM25.
+
+        Only documents in ``groups``, or in groups starting with ``prefix``,
+        are returned when either is given.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        self._ensure_loaded()
+        with self._lock:
+            self._refresh()
+            if not terms or not self._live_docs:
+                return []
+            keys = self._keys
+            count = len(keys)
+            total = self._live_docs
+            average_length = self._live_length / total
+            if self._arrays is None:
+                self._arrays = (
+                    np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool),
+                    np.array(self._lengths, dtype=np.float32),
+                )
+            # Never changed in place, so scoring can use them after the lock is released
+            alive, lengths = self._arrays
+            postings = [
+                (np.array(self._postings[term][0], dtype=np.int64), np.array(self._postings[term][1], dtype=np.float32))
+                for term in terms if term in self._postings
+            ]
+            allowed = None
+            if groups is not None or prefix is not None:
+                selected = groups if groups is not None else [g for g in self._groups if g.startswith(prefix)]
+                allowed = np.zeros(count, dtype=bool)
+                for group in selected:
+                    allowed[self._groups.get(group, [])] = True
+
+        scores = np.zeros(count, dtype=np.float32)
+        for numbers, frequencies in postings:
+            live = alive[numbers]
+            numbers, frequencies = numbers[live], frequencies[live]
+            # Document frequency counts live documents across all groups, so
+            # a group filter narrows the results without changing the scores
+            idf = math.log(1 + (total - len(numbers) + 0.5) / (len(numbers) + 0.5))
+            if allowed is not None:
+                selected = allowed[numbers]
+                numbers, frequencies = numbers[selected], frequencies[selected]
+            if not len(numbers):
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[numbers] / average_length)
+            scores[numbers] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(float(scores[n]), *keys[n]) for n in matched]
+
+
+def _analyze_docs(docs: Sequence[Doc]) -> List[list]:
+    analyzed = []
+    for key, text in docs:
+        length, counts = analyze(text or "")
+        if length:
+            analyzed.append([key, length, counts])
+    return analyzed
+
+
+def conversation_group(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}"
+
+
+def document_group(sha256: str) -> str:
+    return f"document:{sha256}"
+
+
+def message_docs(messages: Optional[Sequence[Dict]]) -> List[Doc]:
+    """One searchable document per message, keyed by message ID"""
+    return [(str(msg.get("id")), msg.get("content") or "") for msg in messages or []]
+
+
+def chunk_docs(sha256: str) -> List[Doc]:
+    return [(chunk["chunk"], chunk["text"]) for chunk in ingestion_queue.read_chunks(sha256)]
+
+
+def track_conversations(store):
+    """Index a ConversationStore's messages and follow its changes"""
+    text_index.sources.append(lambda: (
+        (conversation_group(conversation["id"]), message_docs(conversation.get("messages")))
+        for conversation in store.iter_conversations()
+    ))
+    store.written_listeners.append(
+        lambda conversation: text_index.set_group(conversation_group(conversation["id"]), message_docs(conversation.get("messages")))
+    )
+    store.appended_listeners.append(
+        lambda conversation_id, messages: text_index.add_docs(conversation_group(conversation_id), message_docs(messages))
+    )
+    store.deleted_listeners.append(lambda conversation_id: text_index.drop_group(conversation_group(conversation_id)))
+
+
+def _index_chunks(sha256: str):
+    if not text_index.has_group(document_group(sha256)):
+        text_index.set_group(document_group(sha256), chunk_docs(sha256))
+
+
+text_index = TextIndex(TEXT_INDEX_PATH)
+text_index.sources.append(lambda: (
+    (document_group(path.stem), chunk_docs(path.stem)) for path in ingestion_queue.chunk_dir.glob("*.jsonl")
+))
+ingestion_queue.completed_listeners.append(_index_chunks)
+document_store.blob_removed_listeners.append(lambda sha256: text_index.drop_group(document_group(sha256)))
@@ -0,0 +1,255 @@
+# backend/app/services/vector_index.py
+import heapq
+import json
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import EMBEDDING_DIM, VECTOR_DIR
+from app.services.document_store import document_store
+from app.services.file_lock import FileLock, file_signature
+from app.services.ingestion import ingestion_queue
+
+# Rows scored per matrix product, so a scan never materializes all scores
+SEARCH_BLOCK_ROWS = 65536
+# Texts embedded per batch while appending a document
+EMBED_BATCH_SIZE = 1024
+# Dead rows left by removed documents are compacted away past this share
+COMPACT_DEAD_RATIO = 0.5
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Maps a batch of texts to a float32 matrix of shape (len(texts), dim)
+EmbeddingFunction = Callable[[Sequence[str], int], np.ndarray]
+
+
+def hashing_embedding(texts: Sequence[str], dim: int) -> np.ndarray:
+    """Deterministic hashing-vectorizer embedding.
+
+    Lowercased words and word bigrams are hashed with CRC32 into ``dim``
+    signed buckets, counts are log-scaled and rows L2-normalized, so a dot
+    product is the cosine similarity. Needs no model and gives the same
+    vectors in every process.
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            matrix[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """Chunk embeddings in one append-only float32 matrix on disk.
+
+    Each blob's chunks occupy a contiguous run of rows, recorded in
+    ``manifest.json`` as ``{sha256: [first_row, row_count]}``; row ``i`` of
+    a run is chunk ``i`` of that blob. Adding a document appends its rows
+    to the end of the file, and searches read the file through a NumPy
+    memory map, so the index is never loaded or rebuilt as a whole.
+
+    Removing a document only drops its run from the manifest. Once dead
+    rows pass COMPACT_DEAD_RATIO the live runs are copied to a new matrix
+    file, which keeps memory maps held by running searches valid.
+
+    Worker processes share the index: appends and removals hold a file
+    lock, and each process reloads the manifest (and remaps the matrix)
+    once another one has replaced it.
+    """
+
+    def __init__(self, index_dir: Path, dim: int, embed: EmbeddingFunction = hashing_embedding):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.index_dir / "manifest.json"
+        self.dim = dim
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._signature = None
+        self._matrix = None
+        self._matrix_generation = None
+        self._file_lock = FileLock(self.index_dir / "manifest.lock")
+        # Appends run on one background thread, in submission order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-index")
+
+    def _embedding_name(self) -> str:
+        return getattr(self.embed, "__name__", type(self.embed).__name__)
+
+    def _load(self, reload: bool = False) -> Dict:
+        # add/remove reread the manifest under the file lock whatever its signature
+        signature = file_signature(self.manifest_path)
+        if reload or self._manifest is None or signature != self._signature:
+            manifest = None
+            if signature is not None:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self._signature = signature
+            if manifest is None or manifest["dim"] != self.dim or manifest["embedding"] != self._embedding_name():
+                # Vectors from another embedding are not comparable; start over
+                # and let documents be re-indexed on their next search
+                manifest = {
+                    "dim": self.dim,
+                    "embedding": self._embedding_name(),
+                    "generation": (manifest or {}).get("generation", 0) + 1,
+                    "rows": 0,
+                    "segments": {},
+                }
+                self._manifest = manifest
+                with self._file_lock:
+                    self._save()
+                    self._remove_stale_files()
+            else:
+                self._manifest = manifest
+        return self._manifest
+
+    def _save(self):
+        # Callers hold the file lock
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self._signature = file_signature(self.manifest_path)
+
+    def _matrix_path(self, generation: int) -> Path:
+        return self.index_dir / f"embeddings-{generation}.f32"
+
+    def _remove_stale_files(self):
+        current = self._matrix_path(self._manifest["generation"])
+        for path in self.index_dir.glob("embeddings-*.f32"):
+            if path != current:
+                try:
+                    path.unlink()
+                except OSError:
+                    # Still mapped by a search (Windows); removed on a later pass
+                    pass
+
+    def _mapped(self) -> Optional[np.ndarray]:
+        # Callers hold the lock; the returned map stays usable after release
+        manifest = self._load()
+        if manifest["rows"] == 0:
+            return None
+        if (self._matrix is None or self._matrix.shape[0] != manifest["rows"]
+                or self._matrix_generation != manifest["generation"]):
+            self._matrix = np.memmap(
+                self._matrix_path(manifest["generation"]), dtype=np.float32, mode="r",
+                shape=(manifest["rows"], self.dim),
+            )
+            self._matrix_generation = manifest["generation"]
+        return self._matrix
+
+    def has(self, sha256: str) -> bool:
+        with self._lock:
+            return sha256 in self._load()["segments"]
+
+    def add(self, sha256: str, texts: Sequence[str]):
+        """Embed a blob's chunk texts and append them as a new run of rows.
+
+        Embedding runs before the locks are taken, so searches and other
+        processes' appends only wait for the rows to be written.
+        """
+        if not texts or self.has(sha256):
+            return
+        batches = [
+            np.ascontiguousarray(self.embed(texts[offset:offset + EMBED_BATCH_SIZE], self.dim), dtype=np.float32)
+            for offset in range(0, len(texts), EMBED_BATCH_SIZE)
+        ]
+        with self._lock, self._file_lock:
+            manifest = self._load(reload=True)
+            if sha256 in manifest["segments"]:
+                return
+            first_row = manifest["rows"]
+            matrix_path = self._matrix_path(manifest["generation"])
+            with open(matrix_path, "ab") as f:
+                # Drop rows written by an append that never reached the manifest
+                f.truncate(first_row * self.dim * 4)
+                for vectors in batches:
+                    f.write(vectors.tobytes())
+            manifest["segments"][sha256] = [first_row, len(texts)]
+            manifest["rows"] = first_row + len(texts)
+            self._save()
+
+    def schedule(self, sha256: str, load_texts: Callable[[], Sequence[str]]):
+        """Index a blob on the background writer thread"""
+        self._writer.submit(lambda: self.has(sha256) or self.add(sha256, load_texts()))
+
+    def shutdown(self):
+        """Finish the appends already scheduled"""
+        self._writer.shutdown(wait=True)
+
+    def remove(self, sha256: str):
+        with self._lock, self._file_lock:
+            manifest = self._load(reload=True)
+            if manifest["segments"].pop(sha256, None) is None:
+                return
+            live = sum(count for _, count in manifest["segments"].values())
+            if manifest["rows"] and (manifest["rows"] - live) / manifest["rows"] > COMPACT_DEAD_RATIO:
+                self._compact()
+            else:
+                self._save()
+
+    def _compact(self):
+        manifest = self._manifest
+        matrix = self._mapped()
+        generation = manifest["generation"] + 1
+        segments = {}
+        rows = 0
+        with open(self._matrix_path(generation), "wb") as f:
+            for sha256, (first_row, count) in manifest["segments"].items():
+                f.write(np.ascontiguousarray(matrix[first_row:first_row + count]).tobytes())
+                segments[sha256] = [rows, count]
+                rows += count
+        manifest.update(generation=generation, rows=rows, segments=segments)
+        self._matrix = None
+        self._save()
+        self._remove_stale_files()
+
+    def search(self, queries: Sequence[str], k: int, sha256: Optional[str] = None) -> List[List[Tuple[float, str, int]]]:
+        """Top-``k`` chunks by cosine similarity for each query.
+
+        Searches one blob when ``sha256`` is given, otherwise every indexed
+        blob. All queries are scored together, one block of rows per matrix
+        product, and only the best ``k`` rows of each block are kept, found
+        with ``argpartition`` instead of sorting every score. Returns, per
+        query, ``(score, sha256, chunk)`` tuples best first.
+        """
+        query_vectors = np.ascontiguousarray(self.embed(queries, self.dim), dtype=np.float32)
+        with self._lock:
+            matrix = self._mapped()
+            segments = self._load()["segments"]
+            if sha256 is not None:
+                segments = {sha256: segments[sha256]} if sha256 in segments else {}
+            runs = list(segments.items())
+
+        candidates = [[] for _ in queries]
+        if matrix is None or k <= 0:
+            return candidates
+        for run_sha, (first_row, count) in runs:
+            for offset in range(0, count, SEARCH_BLOCK_ROWS):
+                block = matrix[first_row + offset:first_row + min(offset + SEARCH_BLOCK_ROWS, count)]
+                scores = block @ query_vectors.T
+                keep = min(k, len(block))
+                top = np.argpartition(-scores, keep - 1, axis=0)[:keep]
+                for column, rows in enumerate(top.T):
+                    candidates[column].extend(
+                        (float(scores[row, column]), run_sha, offset + int(row)) for row in rows
+                    )
+        return [heapq.nlargest(k, found) for found in candidates]
+
+
+vector_index = VectorIndex(VECTOR_DIR, EMBEDDING_DIM)
+ingestion_queue.completed_listeners.append(
+    lambda sha256: vector_index.schedule(
+        sha256, lambda: [chunk["text"] for chunk in ingestion_queue.read_chunks(sha256)]
+    )
+)
+document_store.blob_removed_listeners.append(vector_index.remove)
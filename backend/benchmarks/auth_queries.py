@@ -0,0 +1,91 @@
+# backend/benchmarks/auth_queries.py
+"""Database queries and latency per auth request (register, login, /me).
+
+Run from the backend directory against a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/auth_bench.db python -m benchmarks.auth_queries --users 200
+
+Every statement sent to the database is counted, so the numbers show
+round trips per request rather than ORM calls.
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.models import User
+from app.main import app
+from app.services.auth_db import engine
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def measure(counter, call):
+    before = counter.count
+    started = time.perf_counter()
+    response = call()
+    elapsed = time.perf_counter() - started
+    assert response.status_code < 400, response.json()
+    return counter.count - before, elapsed, response.json()
+
+
+def summarize(samples):
+    queries = [q for q, _ in samples]
+    latencies = [t for _, t in samples]
+    return {
+        "requests": len(samples),
+        "queries_per_request": round(statistics.mean(queries), 2),
+        "max_queries": max(queries),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    User.metadata.create_all(engine)
+    counter = QueryCounter(engine)
+    client = TestClient(app)
+    samples = {"register": [], "login": [], "me": []}
+    run = uuid.uuid4().hex[:8]
+
+    for i in range(args.users):
+        credentials = {"email": f"bench-{run}-{i}@example.com", "password": "benchmark-password"}
+        queries, elapsed, _ = measure(counter, lambda: client.post(
+            "/api/auth/register", json=dict(credentials, fullName=f"Bench {i}")
+        ))
+        samples["register"].append((queries, elapsed))
+
+        queries, elapsed, body = measure(counter, lambda: client.post("/api/auth/login", json=credentials))
+        samples["login"].append((queries, elapsed))
+
+        headers = {"Authorization": f"Bearer {body['token']}"}
+        queries, elapsed, _ = measure(counter, lambda: client.get("/api/auth/me", headers=headers))
+        samples["me"].append((queries, elapsed))
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    print(f"{'endpoint':>9} {'queries/req':>12} {'max':>4} {'mean ms':>8}")
+    for name, result in results.items():
+        print(f"{name:>9} {result['queries_per_request']:>12} {result['max_queries']:>4} {result['mean_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "auth_queries", "users": args.users, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# backend/benchmarks/compare.py
+"""Compare two result files written with ``--json`` by the same benchmark.
+
+Run from the backend directory:
+
+    python -m benchmarks.compare before.json after.json
+
+Rows are matched by ``name`` (or by the first key of each row for the
+older benchmarks) and every numeric metric is printed with its change.
+"""
+import argparse
+import json
+from typing import Dict, List
+
+
+def row_key(row: Dict) -> str:
+    if "name" in row:
+        return str(row["name"])
+    first = next(iter(row))
+    return f"{first}={row[first]}"
+
+
+def index_rows(results) -> Dict[str, Dict]:
+    # auth_queries keeps its rows in a dict keyed by endpoint
+    if isinstance(results, dict):
+        return {name: row for name, row in results.items()}
+    return {row_key(row): row for row in results}
+
+
+def compare(before: Dict, after: Dict) -> List[tuple]:
+    rows = []
+    old_rows, new_rows = index_rows(before["results"]), index_rows(after["results"])
+    for key, new in new_rows.items():
+        old = old_rows.get(key)
+        if old is None:
+            continue
+        for metric, value in new.items():
+            previous = old.get(metric)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+                continue
+            change = (value - previous) / previous * 100 if previous else None
+            rows.append((key, metric, previous, value, change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    if before.get("benchmark") != after.get("benchmark"):
+        raise SystemExit(f"Different benchmarks: {before.get('benchmark')} and {after.get('benchmark')}")
+
+    print(f"{'row':>28} {'metric':>22} {'before':>11} {'after':>11} {'change':>8}")
+    for key, metric, previous, value, change in compare(before, after):
+        shown = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{key:>28} {metric:>22} {previous:>11} {value:>11} {shown:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# backend/benchmarks/data.py
+"""Synthetic conversations and PDFs for the benchmarks.
+
+Run from the backend directory:
+
+    python -m benchmarks.data --conversations 1000 --messages 20 --pdfs 20
+    python -m benchmarks.data --clean
+
+Conversations are written through the configured conversation storage
+(CONVERSATION_BACKEND), so the summary and search indexes follow them, and
+PDFs are written to UPLOAD_DIR as ``{id}.pdf``, where ``/documents/{id}``
+serves them. Everything generated carries the ``--prefix`` in its ID, and
+``--clean`` removes exactly that. The same ``--seed`` gives the same data.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from app.config import UPLOAD_DIR
+
+DEFAULT_PREFIX = "bench-"
+
+# Message text in the style of the sample conversations
+QUESTIONS = [
+    "Việt Nam nằm ở đâu trên bản đồ thế giới?",
+    "Hãy tóm tắt nội dung chính của tài liệu này.",
+    "Chương 2 nói về những phương pháp nghiên cứu nào?",
+    "Các số liệu trong bảng 3 có ý nghĩa gì?",
+    "Tác giả đưa ra kết luận gì ở phần cuối?",
+    "Giải thích thuật ngữ “chuyển đổi số” được dùng trong bài.",
+]
+ANSWER_SENTENCES = [
+    "Dựa vào ngữ cảnh được cung cấp, câu trả lời cho câu hỏi là như sau.",
+    "Việt Nam nằm ở phía đông của bán đảo Đông Dương thuộc khu vực Đông Nam Á.",
+    "Lãnh thổ Việt Nam có hình chữ S, trải dài từ vĩ độ 8°27′N đến 23°23′N.",
+    "Tài liệu trình bày quy trình thu thập, làm sạch và phân tích dữ liệu.",
+    "Nhóm tác giả kết hợp khảo sát định lượng với phỏng vấn sâu.",
+    "Kết quả cho thấy mức độ hài lòng tăng 12,5% so với năm trước.",
+    "Phần kết luận nhấn mạnh vai trò của đào tạo nguồn nhân lực.",
+    "Tuy nhiên, tài liệu không đề cập đến chi phí triển khai cụ thể.",
+]
+# PDF text uses the standard Helvetica font, which has no Vietnamese glyphs
+PDF_SENTENCES = [
+    "Viet Nam nam o phia dong cua ban dao Dong Duong.",
+    "Lanh tho Viet Nam co hinh chu S, trai dai tu Bac vao Nam.",
+    "Chuong 2 trinh bay phuong phap nghien cuu va thu thap du lieu.",
+    "Bang 3 tong hop ket qua khao sat tai 63 tinh thanh.",
+    "Ket luan: chuyen doi so can di kem dao tao nguon nhan luc.",
+    "The report describes data collection, cleaning and analysis.",
+]
+
+BASE_TIME = datetime(2025, 5, 19, 8, 0, 0)
+
+
+def conversation_id(prefix: str, number: int) -> str:
+    return f"{prefix}{number:06d}"
+
+
+def document_id(prefix: str, number: int) -> str:
+    return f"{prefix}doc-{number:04d}"
+
+
+def make_answer(rng: random.Random) -> str:
+    return " ".join(rng.sample(ANSWER_SENTENCES, rng.randint(2, 5)))
+
+
+def make_messages(rng: random.Random, count: int, start: datetime) -> List[Dict]:
+    messages = []
+    for number in range(count):
+        user_turn = number % 2 == 0
+        messages.append({
+            "id": str(int(start.timestamp() * 1000) + number),
+            "role": "user" if user_turn else "assistant",
+            "content": rng.choice(QUESTIONS) if user_turn else make_answer(rng),
+            "timestamp": (start + timedelta(seconds=30 * number)).isoformat() + "Z",
+        })
+    return messages
+
+
+def make_conversation(rng: random.Random, prefix: str, number: int, messages: int,
+                      pdf_file: str = None) -> Dict:
+    start = BASE_TIME + timedelta(minutes=7 * number)
+    conversation_messages = make_messages(rng, messages, start)
+    return {
+        "id": conversation_id(prefix, number),
+        "title": conversation_messages[0]["content"][:60] if conversation_messages else "New Conversation",
+        "lastMessage": conversation_messages[-1]["content"] if conversation_messages else "",
+        "timestamp": (start + timedelta(seconds=30 * messages)).isoformat() + "Z",
+        "messages": conversation_messages,
+        "pdf_file": pdf_file,
+    }
+
+
+def _pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(rng: random.Random, lines: int = 40) -> bytes:
+    """A one-page PDF of ``lines`` lines of text that pypdf can extract"""
+    stream = "BT /F1 11 Tf 50 800 Td 16 TL " + " ".join(
+        f"({_pdf_text(rng.choice(PDF_SENTENCES))}) '" for _ in range(lines)
+    ) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return pdf
+
+
+def generate(conversations: int, messages: int, pdfs: int, seed: int = 0, prefix: str = DEFAULT_PREFIX) -> Dict:
+    """Write the synthetic data set; returns the IDs written"""
+    from app.routes.conversations import conversation_store
+
+    rng = random.Random(seed)
+    document_ids = []
+    for number in range(pdfs):
+        path = Path(UPLOAD_DIR) / f"{document_id(prefix, number)}.pdf"
+        path.write_bytes(make_pdf(rng))
+        document_ids.append(document_id(prefix, number))
+
+    conversation_ids = []
+    for number in range(conversations):
+        # Every tenth conversation has a PDF attached, as uploads from the chat page do
+        pdf_file = None
+        if document_ids and number % 10 == 0:
+            pdf_file = str(Path(UPLOAD_DIR) / f"{document_ids[number // 10 % len(document_ids)]}.pdf")
+        conversation = make_conversation(rng, prefix, number, messages, pdf_file)
+        conversation_store.write(conversation)
+        conversation_ids.append(conversation["id"])
+
+    return {"conversations": conversation_ids, "documents": document_ids}
+
+
+def clean(prefix: str = DEFAULT_PREFIX) -> Dict:
+    """Remove the conversations and PDFs whose IDs start with ``prefix``"""
+    from app.routes.conversations import conversation_store
+
+    conversation_ids = [
+        entry["id"] for entry in conversation_store.index.list_entries() if entry["id"].startswith(prefix)
+    ]
+    for conversation_id in conversation_ids:
+        conversation_store.delete(conversation_id)
+
+    paths = list(Path(UPLOAD_DIR).glob(f"{prefix}*.pdf"))
+    for path in paths:
+        path.unlink()
+    return {"conversations": len(conversation_ids), "documents": len(paths)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per conversation")
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="ID prefix of everything generated")
+    parser.add_argument("--clean", action="store_true", help="remove the generated data instead")
+    args = parser.parse_args()
+
+    if args.clean:
+        removed = clean(args.prefix)
+        print(f"Removed {removed['conversations']} conversations and {removed['documents']} PDFs")
+        return
+
+    written = generate(args.conversations, args.messages, args.pdfs, args.seed, args.prefix)
+    print(f"Wrote {len(written['conversations'])} conversations of {args.messages} messages "
+          f"and {len(written['documents'])} PDFs")
+
+
+if __name__ == "__main__":
+    main()
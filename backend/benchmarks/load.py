@@ -0,0 +1,221 @@
+# backend/benchmarks/load.py
+"""Throughput and latency percentiles of the API routes, driven in-process.
+
+Fill the stores first, then run from the backend directory:
+
+    python -m benchmarks.data --conversations 1000 --messages 20 --pdfs 20
+    python -m benchmarks.load --requests 500 --concurrency 16 --json load.json
+
+Requests go through the ASGI app in this process (no sockets), from
+``--concurrency`` tasks at once, so the numbers cover routing, validation,
+storage and serialization but not the network. Each scenario runs on its
+own and reports requests per second and p50/p95/p99 latency. Auth
+scenarios run when the auth routes are mounted; point DATABASE_URL at a
+scratch database for them.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from app.config import UPLOAD_DIR
+from app.main import app
+from benchmarks.data import DEFAULT_PREFIX, make_answer, make_pdf
+
+Scenario = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(share * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Fixtures:
+    """IDs of the generated data, and what the scenarios create along the way"""
+
+    def __init__(self, prefix: str):
+        from app.routes.conversations import conversation_index
+
+        self.conversation_ids = [
+            entry["id"] for entry in conversation_index.list_entries() if entry["id"].startswith(prefix)
+        ]
+        self.document_ids = [path.stem for path in Path(UPLOAD_DIR).glob(f"{prefix}*.pdf")]
+        self.uploaded_ids = []
+        self.users = []
+
+
+def conversation_scenarios(fixtures: Fixtures) -> Dict[str, Scenario]:
+    ids = fixtures.conversation_ids
+
+    async def list_page(client, rng):
+        return await client.get("/conversations/", params={"limit": 50})
+
+    async def list_all(client, rng):
+        return await client.get("/conversations/")
+
+    async def get(client, rng):
+        return await client.get(f"/conversations/{rng.choice(ids)}")
+
+    async def append(client, rng):
+        message = {"id": uuid.uuid4().hex, "role": "assistant", "content": make_answer(rng),
+                   "timestamp": "2025-05-19T08:00:00Z"}
+        return await client.post(f"/conversations/{rng.choice(ids)}/messages", json={"messages": [message]})
+
+    async def update_title(client, rng):
+        return await client.put(f"/conversations/{rng.choice(ids)}", json={"title": f"Cập nhật {rng.random():.6f}"})
+
+    return {
+        "conversations.list_page": list_page,
+        "conversations.list_all": list_all,
+        "conversations.get": get,
+        "conversations.append": append,
+        "conversations.update_title": update_title,
+    }
+
+
+def document_scenarios(fixtures: Fixtures) -> Dict[str, Scenario]:
+    scenarios = {}
+
+    async def upload(client, rng):
+        response = await client.post(
+            "/documents/upload", files={"file": ("benchmark.pdf", make_pdf(rng), "application/pdf")}
+        )
+        if response.status_code == 200:
+            fixtures.uploaded_ids.append(response.json()["id"])
+        return response
+
+    scenarios["documents.upload"] = upload
+
+    if fixtures.document_ids:
+        async def get(client, rng):
+            return await client.get(f"/documents/{rng.choice(fixtures.document_ids)}")
+
+        scenarios["documents.get"] = get
+    return scenarios
+
+
+def auth_scenarios(fixtures: Fixtures) -> Dict[str, Scenario]:
+    if not any(getattr(route, "path", "").startswith("/api/auth") for route in app.routes):
+        return {}
+    run = uuid.uuid4().hex[:8]
+
+    async def register(client, rng):
+        credentials = {"email": f"bench-{run}-{len(fixtures.users)}-{rng.random():.9f}@example.com",
+                       "password": "benchmark-password"}
+        response = await client.post("/api/auth/register", json=dict(credentials, fullName="Người dùng thử"))
+        if response.status_code < 400:
+            fixtures.users.append(credentials)
+        return response
+
+    async def login(client, rng):
+        return await client.post("/api/auth/login", json=rng.choice(fixtures.users))
+
+    async def me(client, rng):
+        response = await client.post("/api/auth/login", json=rng.choice(fixtures.users))
+        token = response.json()["token"]
+        return await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    # login and me need the users registered first; scenarios run in this order
+    return {"auth.register": register, "auth.login": login, "auth.me_after_login": me}
+
+
+# Scenarios that log in as a user auth.register created
+USER_SCENARIOS = ("auth.login", "auth.me_after_login")
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int,
+                       seed: int) -> Dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(number):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + number)
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await scenario(client, rng)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run(args) -> List[Dict]:
+    fixtures = Fixtures(args.prefix)
+    if not fixtures.conversation_ids:
+        raise SystemExit(f"No conversations with the prefix {args.prefix!r}; run benchmarks.data first")
+
+    scenarios = {}
+    for group in (conversation_scenarios, document_scenarios, auth_scenarios):
+        scenarios.update(group(fixtures))
+    if args.only:
+        scenarios = {name: scenario for name, scenario in scenarios.items()
+                     if any(name.startswith(selected) for selected in args.only)}
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        try:
+            for name, scenario in scenarios.items():
+                if name in USER_SCENARIOS and not fixtures.users:
+                    print(f"{name:>28} skipped: no users registered (run auth.register with it)")
+                    continue
+                result = dict(name=name, **await run_scenario(client, scenario, args.requests, args.concurrency, args.seed))
+                results.append(result)
+                print(f"{name:>28} {result['requests_per_second']:>9} {result['p50_ms']:>8} "
+                      f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>6}")
+        finally:
+            # Documents uploaded by the benchmark are not part of the data set
+            for document_id in fixtures.uploaded_ids:
+                await client.delete(f"/documents/{document_id}")
+            await app.router.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="ID prefix of the generated data")
+    parser.add_argument("--only", nargs="+", help="run the scenarios whose names start with these")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    print(f"{'scenario':>28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    results = asyncio.run(run(args))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "benchmark": "load",
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
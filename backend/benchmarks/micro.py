@@ -0,0 +1,83 @@
+# backend/benchmarks/micro.py
+"""Microbenchmarks of the conversation helpers on the hot request paths.
+
+Run from the backend directory (``load_conversations`` lists whatever is in
+the configured store, so fill it with ``benchmarks.data`` first):
+
+    python -m benchmarks.micro --json micro.json
+
+Each function is called repeatedly for about ``--seconds`` and reported as
+mean microseconds per call, and per item where it walks messages or
+conversations.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict
+
+from app.models import Conversation, Message
+from app.routes.conversations import load_conversations
+from app.services.conversation_index import is_conversation_empty
+from benchmarks.data import DEFAULT_PREFIX, make_conversation
+
+
+def time_call(function: Callable[[], object], seconds: float) -> float:
+    """Mean seconds per call over at least ``seconds`` of calls"""
+    function()
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def benchmarks(messages: int) -> Dict[str, tuple]:
+    """``{name: (function, items per call)}``"""
+    rng = random.Random(0)
+    conversation = make_conversation(rng, DEFAULT_PREFIX, 0, messages)
+    # Worst case for is_conversation_empty: every message is checked before the answer is known
+    blank = dict(conversation, messages=[dict(msg, content="  ") for msg in conversation["messages"]])
+    message = conversation["messages"][-1]
+    listed = len(load_conversations())
+
+    return {
+        "load_conversations": (load_conversations, max(listed, 1)),
+        "is_conversation_empty": (lambda: is_conversation_empty(conversation), 1),
+        "is_conversation_empty.blank": (lambda: is_conversation_empty(blank), messages),
+        "validate_message": (lambda: Message.model_validate(message), 1),
+        "validate_conversation": (lambda: Conversation.model_validate(conversation), messages),
+        "validate_conversation_json": (lambda: Conversation.model_validate_json(json.dumps(conversation)), messages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100, help="messages in the sample conversation")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each benchmark")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'benchmark':>28} {'us/call':>11} {'items':>6} {'us/item':>9}")
+    for name, (function, items) in benchmarks(args.messages).items():
+        per_call = time_call(function, args.seconds)
+        result = {
+            "name": name,
+            "us_per_call": round(per_call * 1e6, 3),
+            "items": items,
+            "us_per_item": round(per_call * 1e6 / items, 3),
+        }
+        results.append(result)
+        print(f"{name:>28} {result['us_per_call']:>11} {items:>6} {result['us_per_item']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "micro", "messages": args.messages, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/benchmarks/password_hashing.py
+"""Login throughput of the password hashing pool against worker count.
+
+Run from the backend directory:
+
+    python -m benchmarks.password_hashing --logins 400 --rounds 29000
+
+Each step verifies ``--logins`` passwords from ``--clients`` concurrent
+threads, as simultaneous login requests would, with a pool of 1, 2, 4, ...
+workers up to the number of cores.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.password_hasher import PasswordHasher
+
+
+def worker_counts(limit: int):
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+
+def run_step(workers: int, rounds: int, logins: int, clients: int) -> dict:
+    hasher = PasswordHasher(workers, max_queue=logins, rounds=rounds)
+    password_hash = hasher.hash("correct horse battery staple")
+    # Start every worker process before timing
+    for _ in range(workers):
+        hasher.verify("correct horse battery staple", password_hash)
+
+    def login(_):
+        started = time.perf_counter()
+        assert hasher.verify("correct horse battery staple", password_hash)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = sorted(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    hasher._pool().shutdown()
+
+    return {
+        "workers": workers,
+        "logins": logins,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=29000)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent login requests")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'workers':>7} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for workers in worker_counts(args.max_workers):
+        result = run_step(workers, args.rounds, args.logins, args.clients)
+        results.append(result)
+        print(f"{result['workers']:>7} {result['logins_per_second']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "password_hashing", "rounds": args.rounds, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
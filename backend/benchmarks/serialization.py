@@ -0,0 +1,108 @@
+# backend/benchmarks/serialization.py
+"""Per-message cost of decoding, validating and encoding a conversation.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --messages 10 100 1000
+
+For each conversation size, every step of serving ``GET /conversations/{id}``
+is timed on its own and reported in microseconds per message: decoding the
+stored JSON with the standard library and with ``json_codec``, validating
+the dict against the ``Conversation`` model, and encoding the response the
+way FastAPI's ``response_model`` path does (``jsonable_encoder`` then
+``json.dumps``) against ``model_dump_json`` and ``json_codec.dumps``.
+"""
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Conversation
+from app.services import json_codec
+
+SAMPLE_TEXTS = [
+    "Xin chào, bạn có thể tóm tắt tài liệu này không?",
+    "Tài liệu mô tả quy trình xử lý dữ liệu và các bước kiểm tra chất lượng.",
+    "Chương 3 trình bày phương pháp nghiên cứu, gồm khảo sát và phỏng vấn sâu.",
+]
+
+
+def make_conversation(messages: int) -> dict:
+    return {
+        "id": "benchmark",
+        "title": "Tóm tắt tài liệu",
+        "lastMessage": SAMPLE_TEXTS[(messages - 1) % len(SAMPLE_TEXTS)],
+        "timestamp": "2024-05-19T10:00:00",
+        "messages": [
+            {
+                "id": str(1716112800000 + number),
+                "role": "user" if number % 2 == 0 else "assistant",
+                "content": SAMPLE_TEXTS[number % len(SAMPLE_TEXTS)],
+                "timestamp": "2024-05-19T10:00:00",
+            }
+            for number in range(messages)
+        ],
+        "pdf_file": None,
+        "version": 1,
+    }
+
+
+def per_message_us(function, messages: int, seconds: float) -> float:
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return round(elapsed / runs / messages * 1e6, 3)
+
+
+def run_size(messages: int, seconds: float) -> dict:
+    conversation = make_conversation(messages)
+    stored_text = json.dumps(conversation)
+    stored_bytes = json_codec.dumps(conversation)
+    model = Conversation.model_validate(conversation)
+
+    steps = {
+        "decode_json": lambda: json.loads(stored_text),
+        "decode_codec": lambda: json_codec.loads(stored_bytes),
+        "validate_model": lambda: Conversation.model_validate(conversation),
+        "encode_response_model": lambda: json.dumps(
+            jsonable_encoder(model), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8"),
+        "encode_model_dump_json": lambda: model.model_dump_json().encode(),
+        "encode_codec": lambda: json_codec.dumps(conversation),
+    }
+    result = {"messages": messages}
+    for name, function in steps.items():
+        result[name] = per_message_us(function, messages, seconds)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each step")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    codec = "orjson" if json_codec.orjson is not None else "json"
+    results = []
+    columns = ["decode_json", "decode_codec", "validate_model",
+               "encode_response_model", "encode_model_dump_json", "encode_codec"]
+    print(f"microseconds per message (json_codec uses {codec})")
+    print(f"{'messages':>8} " + " ".join(f"{name:>22}" for name in columns))
+    for messages in args.messages:
+        result = run_size(messages, args.seconds)
+        results.append(result)
+        print(f"{messages:>8} " + " ".join(f"{result[name]:>22}" for name in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "serialization", "codec": codec, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
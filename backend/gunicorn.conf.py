@@ -0,0 +1,26 @@
+# backend/gunicorn.conf.py
+# Production server: gunicorn supervising uvicorn workers. Start it with
+# `python serve.py` or `gunicorn -c gunicorn.conf.py app.main:app`.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import WEB_GRACEFUL_TIMEOUT, WEB_HOST, WEB_PORT, WEB_WORKERS
+
+bind = f"{WEB_HOST}:{WEB_PORT}"
+workers = WEB_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork the workers from it, so code
+# and read-only module state are shared copy-on-write. Services that hold
+# threads, sockets or file locks reset them in each child (os.register_at_fork).
+preload_app = True
+
+# On SIGTERM a worker stops accepting connections, finishes its in-flight
+# requests and drains queued background work (the app's shutdown handler)
+# before it is killed. For a graceful code reload send USR2 to start a new
+# master from the new code, then TERM to the old one.
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+timeout = 120
+keepalive = 5
@@ -1,74 +1,109 @@
 # backend/manage.py
+"""Auth database administration.
+
+Run from the backend directory:
+
+    python manage.py create-tables
+    python manage.py init-db
+"""
 import os
 import click
-from flask.cli import FlaskGroup
-from app import create_app
-from app.db.models import db, User, Role, Permission, Profile
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateSchema
 
-app = create_app()
-cli = FlaskGroup(create_app=create_app)
+from app.config import DB_SCHEMA
+from app.db.models import Base, User, Role, Permission, Profile
+from app.services.auth_db import SessionLocal, engine
+
+@click.group()
+def cli():
+    """Auth database administration"""
 
 @cli.command('create-tables')
 def create_tables():
     """Create database tables"""
-    with app.app_context():
-        db.create_all(schema='rag_app')
-        click.echo('Tables created')
+    # On PostgreSQL the tables live in DB_SCHEMA, which connections put first on the search path
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            connection.execute(CreateSchema(DB_SCHEMA, if_not_exists=True))
+
+    # Also creates the unique indexes behind the email lookup at login/registration
+    # and the reset token lookup (ix_users_email, ix_reset_tokens_token)
+    Base.metadata.create_all(engine)
+
+    # create_all skips existing tables; give older ones the nullable columns added since
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                    click.echo(f'Added column {table.name}.{column.name}')
+    click.echo('Tables created')
 
 @cli.command('init-db')
 def init_db():
     """Initialize database with required data"""
     from app.services.auth_service import AuthService
-    
-    with app.app_context():
+    from app.services.permission_map import permission_map
+
+    with SessionLocal() as session:
         # Create roles if they don't exist
         roles = {
             1: 'admin',
             2: 'user',
             3: 'guest'
         }
-        
+
         for role_id, role_name in roles.items():
-            if not Role.query.get(role_id):
+            if not session.get(Role, role_id):
                 role = Role(role_id=role_id, role_name=role_name)
-                db.session.add(role)
-        
+                session.add(role)
+
         # Create permissions
         permissions = [
             'document:read', 'document:write',
             'chat:read', 'chat:write',
             'user:manage'
         ]
-        
+
         for perm_name in permissions:
-            if not Permission.query.filter_by(name=perm_name).first():
+            if not session.query(Permission).filter_by(name=perm_name).first():
                 perm = Permission(name=perm_name)
-                db.session.add(perm)
-        
-        db.session.commit()
-        
+                session.add(perm)
+
+        session.commit()
+
+        # Roles or permissions may have changed; rebuild the permission bitsets
+        permission_map.bump_version()
+
         # Create admin user if it doesn't exist
         admin_email = os.environ.get('ADMIN_EMAIL', 'admin@example.com')
         admin_password = os.environ.get('ADMIN_PASSWORD', 'Admin@123')
-        
-        admin = User.query.filter_by(email=admin_email).first()
+
+        admin = session.query(User).filter_by(email=admin_email).first()
         if not admin:
             admin = User(
                 email=admin_email,
                 password_hash=AuthService.hash_password(admin_password),
                 role_id=1  # Admin role
             )
-            db.session.add(admin)
-            db.session.commit()
-            
-            # Create admin profile
+            session.add(admin)
+
+            # Create the admin profile in the same transaction
+            session.flush()
             profile = Profile(
                 user_id=admin.user_id,
                 full_name='Admin User'
             )
-            db.session.add(profile)
-            db.session.commit()
-            
+            session.add(profile)
+            session.commit()
+
             click.echo(f'Admin user created: {admin_email}')
         else:
-            click.echo(f'Admin user already exists: {admin_email}
\ No newline at end of file
+            click.echo(f'Admin user already exists: {admin_email}')
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,37 @@
+# backend/migrate_conversations.py
+"""Copy the JSON conversation files into the SQLite conversation database.
+
+Run once before switching CONVERSATION_BACKEND to "sqlite", with the
+server stopped. Running it again replaces the copied conversations.
+"""
+import argparse
+from pathlib import Path
+
+from app.config import CONVERSATION_DB_PATH, CONVERSATION_DIR, CONVERSATION_INDEX_PATH
+from app.services.conversation_store import ConversationStore
+from app.services.sqlite_conversation_store import IMPORT_BATCH_SIZE, SQLiteConversationStore
+
+
+def migrate(source_dir: str, db_path: str, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Copy every conversation, and the last versions of deleted ones; returns the number copied"""
+    source = ConversationStore(source_dir, Path(source_dir) / CONVERSATION_INDEX_PATH.name)
+    target = SQLiteConversationStore(db_path)
+    count = target.import_conversations(source.iter_conversations(), batch_size)
+    # A conversation re-created after the switch must not reuse a version
+    target.import_deleted_versions(source.iter_deleted_versions())
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=str(CONVERSATION_DIR), help="JSON conversation directory")
+    parser.add_argument("--db", default=str(CONVERSATION_DB_PATH), help="SQLite database to fill")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="conversations per transaction")
+    args = parser.parse_args()
+
+    count = migrate(args.source, args.db, args.batch_size)
+    print(f"Copied {count} conversations from {args.source} to {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+from app.config import WEB_GRACEFUL_TIMEOUT, WEB_HOST, WEB_PORT, WEB_WORKERS
+
+# Production entry point; run.py and server.py are the single-process development servers
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+
+if __name__ == "__main__":
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        # gunicorn is Unix-only; uvicorn supervises the workers itself, without preloading
+        import uvicorn
+        uvicorn.run(
+            "app.main:app", host=WEB_HOST, port=WEB_PORT, workers=WEB_WORKERS,
+            timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        )
+    else:
+        sys.argv = ["gunicorn", "--config", CONFIG_PATH, "app.main:app"]
+        run()
\ No newline at end of file
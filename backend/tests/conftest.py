@@ -0,0 +1,59 @@
+# backend/tests/conftest.py
+from pathlib import Path
+
+import pytest
+
+from app.services.conversation_storage import ConversationStorage, open_conversation_storage
+
+
+def open_store(backend: str, root: Path) -> ConversationStorage:
+    """A conversation store of ``backend`` under ``root``; stores opened on the same root
+    share their files, as the worker processes of one server do"""
+    conversation_dir = root / "conversations"
+    conversation_dir.mkdir(exist_ok=True)
+    return open_conversation_storage(backend, conversation_dir, conversation_dir / "_index.jsonl", root / "conversations.db")
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request) -> str:
+    return request.param
+
+
+@pytest.fixture
+def store(backend, tmp_path) -> ConversationStorage:
+    return open_store(backend, tmp_path)
+
+
+def make_conversation(conversation_id: str = "c1", contents=("hello", "hi there")) -> dict:
+    """A conversation in the exact shape of the response model"""
+    return {
+        "id": conversation_id,
+        "title": "Greetings",
+        "lastMessage": contents[-1] if contents else "",
+        "timestamp": "2024-05-01T10:00:00",
+        "messages": [
+            {"id": str(position), "role": "user" if position % 2 == 0 else "assistant",
+             "content": content, "timestamp": "2024-05-01T10:00:00"}
+            for position, content in enumerate(contents)
+        ],
+        "pdf_file": None,
+    }
+
+
+@pytest.fixture
+def api(store, monkeypatch):
+    """A client of the app whose conversation routes use ``store``; startup events do not run"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.routes import conversations
+    from app.services.answer_generator import LocalAnswerGenerator
+    from app.services.conversation_cache import conversation_cache
+
+    monkeypatch.setattr(conversations, "conversation_store", store)
+    monkeypatch.setattr(conversations, "conversation_index", store.index)
+    monkeypatch.setattr(conversations, "answer_generator", LocalAnswerGenerator())
+    # Versions of another test's store must not hit
+    conversation_cache.clear()
+    conversation_cache.track(store)
+    return TestClient(app)
@@ -0,0 +1,84 @@
+# backend/tests/test_app.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.auth_service import AuthService, CachedUser, user_cache
+
+ADMIN = CachedUser(user_id=901, email="admin@example.com", role_id=1)
+USER = CachedUser(user_id=902, email="user@example.com", role_id=2)
+
+
+class Recorder:
+    """Stands in for a background service and records its start/stop calls"""
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def __getattr__(self, method):
+        return lambda *args, **kwargs: self.calls.append(f"{self.name}.{method}")
+
+
+@pytest.fixture
+def client():
+    """A client of the app; startup events do not run"""
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def auth_headers():
+    """Authorization headers per role; the users are cached, so no database is needed"""
+    headers = {}
+    for user in (ADMIN, USER):
+        user_cache.set(user.user_id, user)
+        token = AuthService.generate_token(user.user_id, user.email, user.role_id)
+        headers[user.role_id] = {"Authorization": f"Bearer {token}"}
+    yield headers
+    for user in (ADMIN, USER):
+        AuthService.invalidate_user(user.user_id)
+
+
+def test_metrics_are_prometheus_text(client):
+    assert client.get("/").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE http_requests_total counter" in text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert "# TYPE password_hash_calls_total counter" in text
+    assert "# TYPE auth_cache_lookups_total counter" in text
+
+
+def test_profiles_are_for_admins_only(client, auth_headers):
+    assert client.get("/profiles").status_code == 401
+    assert client.get("/profiles", headers={"Authorization": "Bearer nonsense"}).status_code == 401
+
+    refused = client.get("/profiles", headers=auth_headers[USER.role_id])
+    assert refused.status_code == 403
+    assert refused.json()["success"] is False
+    assert client.get("/profiles/1", headers=auth_headers[USER.role_id]).status_code == 403
+
+    response = client.get("/profiles", headers=auth_headers[ADMIN.role_id])
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+    assert client.get("/profiles/999999", headers=auth_headers[ADMIN.role_id]).status_code == 404
+
+
+def test_lifespan_starts_and_drains_background_work(monkeypatch):
+    calls = []
+    for name in ("mail_outbox", "password_hasher", "ingestion_queue", "vector_index", "io_pool"):
+        monkeypatch.setattr(main, name, Recorder(name, calls))
+
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+        assert calls == ["mail_outbox.start"]
+
+    assert calls == [
+        "mail_outbox.start",
+        "password_hasher.shutdown", "mail_outbox.stop",
+        "ingestion_queue.shutdown", "vector_index.shutdown", "io_pool.shutdown",
+    ]
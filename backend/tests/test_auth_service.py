@@ -0,0 +1,58 @@
+# backend/tests/test_auth_service.py
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Role
+from app.services.auth_service import AuthService, token_cache
+from app.services.metrics import registry
+from app.services.password_hasher import password_hasher
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    # As on PostgreSQL, a user must reference an existing role
+    event.listen(engine, "connect", lambda connection, record: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    # Hashing is not under test; skip the process pool
+    async def fake_hash(password):
+        return f"hashed-{password}"
+
+    monkeypatch.setattr(password_hasher, "hash_async", fake_hash)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def register(session, email, password):
+    return asyncio.run(AuthService.register_user(session, email, password))
+
+
+def test_duplicate_email_is_reported(session):
+    session.add(Role(role_id=2, role_name="user"))
+    session.commit()
+
+    assert register(session, "a@example.com", "secret")[:2] == (True, "Registration successful")
+    assert register(session, "a@example.com", "other") == (False, "Email already registered", None)
+
+
+def test_other_integrity_errors_are_not_reported_as_duplicates(session):
+    # No roles: the user row's foreign key fails, not the email index
+    success, message, user = register(session, "a@example.com", "secret")
+
+    assert not success and user is None
+    assert message.startswith("Registration failed: FOREIGN KEY constraint failed")
+
+
+def test_token_cache_lookups_are_exported():
+    token_cache.clear()
+    token = AuthService.generate_token(7, "a@example.com", 2)
+    hits, misses = token_cache.hits, token_cache.misses
+
+    assert AuthService.verify_token_cached(token)["sub"] == 7
+    assert AuthService.verify_token_cached(token)["sub"] == 7
+    assert (token_cache.hits - hits, token_cache.misses - misses) == (1, 1)
+    assert f'auth_cache_lookups_total{{cache="token",result="hit"}} {token_cache.hits}' in registry.render()
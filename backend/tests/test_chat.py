@@ -0,0 +1,171 @@
+# backend/tests/test_chat.py
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from app.routes import conversations
+from app.services import json_codec
+from app.services.answer_generator import (
+    AnswerGenerator,
+    LocalAnswerGenerator,
+    RAGServiceAnswerGenerator,
+    open_answer_generator,
+)
+from tests.conftest import make_conversation
+
+
+def collect(generator, messages):
+    async def run():
+        return [token async for token in generator.stream(messages)]
+    return asyncio.run(run())
+
+
+def events(body: str):
+    """The ``(event, data)`` pairs of a Server-Sent Events body"""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        parsed.append((fields["event"], json_codec.loads(fields["data"])))
+    return parsed
+
+
+def test_local_generator_is_deterministic():
+    messages = [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}, {"role": "user", "content": " why? "}]
+    generator = LocalAnswerGenerator()
+
+    tokens = collect(generator, messages)
+
+    assert tokens == collect(generator, messages)
+    assert len(tokens) > 1
+    assert "".join(tokens) == generator.answer(messages)
+    assert generator.answer(messages).startswith("You asked: why? ")
+    assert "after 2 earlier messages" in generator.answer(messages)
+
+
+@pytest.fixture
+def rag_service():
+    """A stand-in RAG service: ``/ask`` answers from the query, or 500 for "fail" """
+    queries = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+            queries.append((self.path, query))
+            status, body = (500, {"detail": "index not loaded"}) if query == "fail" else (200, {"answer": f"About {query}: it depends."})
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", queries
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_open_answer_generator():
+    generator = open_answer_generator("local", 0.5)
+    assert isinstance(generator, LocalAnswerGenerator)
+    assert generator.delay == 0.5
+    generator = open_answer_generator("rag", rag_url="http://rag:8000/", rag_timeout=5)
+    assert isinstance(generator, RAGServiceAnswerGenerator)
+    assert (generator.url, generator.timeout) == ("http://rag:8000", 5)
+    with pytest.raises(ValueError):
+        open_answer_generator("nonsense")
+
+
+def test_generators_must_implement_stream():
+    with pytest.raises(TypeError):
+        AnswerGenerator()
+
+
+def test_rag_generator_streams_the_service_answer(rag_service):
+    url, queries = rag_service
+    generator = RAGServiceAnswerGenerator(url, 5)
+
+    tokens = collect(generator, [{"role": "user", "content": "hi"}, {"role": "user", "content": "tax rules"}])
+
+    assert "".join(tokens) == "About tax rules: it depends."
+    assert len(tokens) > 1
+    assert queries == [("/ask", "tax rules")]
+
+
+def test_rag_generator_failure_ends_the_chat_with_an_error(api, store, rag_service, monkeypatch):
+    url, _ = rag_service
+    monkeypatch.setattr(conversations, "answer_generator", RAGServiceAnswerGenerator(url, 5))
+    store.write(make_conversation("c1"))
+
+    stream = events(api.post("/conversations/c1/chat", json={"content": "fail"}).text)
+
+    assert [event for event, _ in stream] == ["start", "error"]
+    assert stream[-1][1]["message"] is None
+    # The question is stored; no answer is
+    assert [msg["content"] for msg in store.read("c1")["messages"]][-1] == "fail"
+
+
+def test_chat_streams_and_stores_the_answer(api, store):
+    store.write(make_conversation("c1"))
+
+    response = api.post("/conversations/c1/chat", json={"content": "what now?", "id": "q1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    stream = events(response.text)
+    (start_event, start), *tokens, (done_event, done) = stream
+    assert (start_event, start["question_id"], start["version"]) == ("start", "q1", 2)
+    assert {event for event, _ in tokens} == {"token"}
+    answer = "".join(data["text"] for _, data in tokens)
+    assert done_event == "done"
+    assert done["message"]["id"] == start["answer_id"]
+    assert done["message"]["content"] == answer
+    assert done["version"] == 3
+
+    conversation = store.read("c1")
+    assert conversation["version"] == 3
+    assert [msg["content"] for msg in conversation["messages"]] == ["hello", "hi there", "what now?", answer]
+    assert conversation["lastMessage"] == answer
+    assert answer == LocalAnswerGenerator().answer(conversation["messages"][:3])
+
+
+def test_chat_starts_a_new_conversation(api, store):
+    response = api.post("/conversations/new1/chat", json={"content": "first question", "title": "Fresh"})
+
+    assert response.status_code == 200
+    conversation = store.read("new1")
+    assert conversation["title"] == "Fresh"
+    assert [msg["role"] for msg in conversation["messages"]] == ["user", "assistant"]
+    assert conversation["version"] == 2
+
+
+def test_chat_needs_an_existing_conversation_with_if_match(api, store):
+    response = api.post("/conversations/new1/chat", json={"content": "hello"}, headers={"If-Match": "*"})
+
+    assert response.status_code == 404
+    assert store.read("new1") is None
+
+
+def test_chat_checks_if_match(api, store):
+    store.write(make_conversation("c1"))
+
+    response = api.post("/conversations/c1/chat", json={"content": "hello"}, headers={"If-Match": '"5"'})
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"1"'
+    assert store.read("c1")["version"] == 1
+
+
+def test_chat_rejects_an_empty_question(api, store):
+    response = api.post("/conversations/c1/chat", json={"content": "  "})
+    assert response.status_code == 400
@@ -0,0 +1,92 @@
+# backend/tests/test_conversation_cache.py
+from app.services import json_codec
+from app.services.conversation_cache import CachedConversation, ConversationCache
+from tests.conftest import make_conversation, open_store
+
+
+def stored(store, conversation_id):
+    # What GET caches: the response-shaped conversation at its stored version
+    return store.read(conversation_id)
+
+
+def test_hit_returns_the_cached_body():
+    cache = ConversationCache(1 << 20)
+    conversation = dict(make_conversation(), version=3)
+    cache.put(conversation)
+
+    entry = cache.get("c1", 3)
+    assert entry is not None
+    assert json_codec.loads(entry.body()) == conversation
+    assert cache.stats()["hits"] == 1
+
+
+def test_other_version_is_a_miss():
+    cache = ConversationCache(1 << 20)
+    cache.put(dict(make_conversation(), version=3))
+
+    assert cache.get("c1", 4) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_within_the_byte_budget():
+    size = CachedConversation(dict(make_conversation(), version=1)).size
+    cache = ConversationCache(size * 3)
+    for number in range(3):
+        cache.put(dict(make_conversation(f"c{number}"), version=1))
+    cache.get("c0", 1)
+    cache.put(dict(make_conversation("c3"), version=1))
+
+    assert cache.get("c1", 1) is None
+    assert cache.get("c0", 1) is not None
+    assert cache.bytes <= cache.max_bytes
+    assert cache.stats()["evictions"] == 1
+
+
+def test_conversation_larger_than_the_budget_is_not_kept():
+    cache = ConversationCache(100)
+    entry = cache.put(dict(make_conversation(contents=("x" * 1000,)), version=1))
+
+    assert entry.to_dict()["messages"][0]["content"] == "x" * 1000
+    assert cache.stats()["entries"] == 0
+
+
+def test_older_version_does_not_replace_a_newer_one():
+    cache = ConversationCache(1 << 20)
+    cache.put(dict(make_conversation(), version=2))
+    cache.put(dict(make_conversation(), version=1))
+
+    assert cache.get("c1", 2) is not None
+
+
+def test_store_changes_drop_the_entry(store):
+    cache = ConversationCache(1 << 20)
+    cache.track(store)
+    store.write(make_conversation())
+
+    cache.put(stored(store, "c1"))
+    store.append("c1", [{"id": "9", "role": "user", "content": "more", "timestamp": "t"}])
+    assert cache.stats()["entries"] == 0
+
+    cache.put(stored(store, "c1"))
+    store.write(make_conversation(contents=("edited",)))
+    assert cache.stats()["entries"] == 0
+
+    cache.put(stored(store, "c1"))
+    store.delete("c1")
+    assert cache.stats()["entries"] == 0
+
+
+def test_recreated_conversation_from_another_process_is_not_served(backend, tmp_path):
+    # Two stores on the same files stand for two worker processes; only the first caches
+    worker, other = open_store(backend, tmp_path), open_store(backend, tmp_path)
+    cache = ConversationCache(1 << 20)
+    cache.track(worker)
+
+    worker.write(make_conversation(contents=("OLD",)))
+    cache.put(stored(worker, "c1"))
+    other.delete("c1")
+    other.write(make_conversation(contents=("NEW",)))
+
+    version = worker.version("c1")
+    assert cache.get("c1", version) is None
+    assert stored(worker, "c1")["messages"][0]["content"] == "NEW"
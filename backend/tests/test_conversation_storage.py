@@ -0,0 +1,135 @@
+# backend/tests/test_conversation_storage.py
+"""Both storage backends run through the same checks (see the ``store`` fixture)."""
+import pytest
+
+from app.services.conversation_storage import ConversationStorage, SummaryIndex, VersionConflict
+from tests.conftest import make_conversation
+
+
+def message(message_id, content, role="user"):
+    return {"id": message_id, "role": role, "content": content, "timestamp": "2024-05-01T11:00:00"}
+
+
+def test_interface_cannot_be_instantiated(tmp_path):
+    with pytest.raises(TypeError):
+        ConversationStorage(tmp_path)
+    with pytest.raises(TypeError):
+        SummaryIndex()
+
+    class Partial(ConversationStorage):
+        def exists(self, conversation_id):
+            return False
+
+    with pytest.raises(TypeError):
+        Partial(tmp_path)
+
+
+def test_write_and_read(store):
+    conversation = make_conversation("c1")
+    conversation["messages"][0]["id"] = 7
+
+    stored = store.write(conversation)
+
+    assert stored["version"] == 1
+    assert store.exists("c1") and store.version("c1") == 1
+    read = store.read("c1")
+    assert read == dict(make_conversation("c1"), version=1, messages=[
+        dict(make_conversation("c1")["messages"][0], id="7"), make_conversation("c1")["messages"][1]
+    ])
+    assert store.read("missing") is None and store.version("missing") is None and not store.exists("missing")
+
+
+def test_write_replaces(store):
+    store.write(make_conversation("c1"))
+    store.write(make_conversation("c1", contents=("only",)))
+
+    read = store.read("c1")
+    assert read["version"] == 2
+    assert [msg["content"] for msg in read["messages"]] == ["only"]
+    assert store.index.get("c1")["message_count"] == 1
+
+
+def test_append(store):
+    store.write(make_conversation("c1"))
+
+    entry = store.append("c1", [message("2", "more")], {"lastMessage": "more", "title": "Renamed", "ignored": "x"})
+
+    assert entry["version"] == 2
+    assert entry["message_count"] == 3 and entry["last_message_id"] == "2"
+    read = store.read("c1")
+    assert read["version"] == 2
+    assert read["title"] == "Renamed" and read["lastMessage"] == "more"
+    assert "ignored" not in read
+    assert [msg["content"] for msg in read["messages"]] == ["hello", "hi there", "more"]
+    assert store.append("missing", [message("1", "x")]) is None
+
+
+def test_delete_and_recreate(store):
+    store.write(make_conversation("c1"))
+    store.append("c1", [message("2", "more")])
+
+    store.delete("c1")
+
+    assert store.read("c1") is None and not store.exists("c1")
+    assert store.index.get("c1") is None
+    # Versions continue after the deleted conversation's
+    assert store.write(make_conversation("c1"))["version"] == 3
+
+
+def test_if_match(store):
+    store.write(make_conversation("c1"))
+
+    with pytest.raises(VersionConflict) as conflict:
+        store.write(make_conversation("c1"), expected_version=5)
+    assert conflict.value.current == 1
+    with pytest.raises(VersionConflict):
+        store.append("c1", [message("2", "more")], expected_version=0)
+    with pytest.raises(VersionConflict):
+        store.delete("c1", expected_version=2)
+    assert store.read("c1")["version"] == 1
+
+    assert store.append("c1", [message("2", "more")], expected_version=1)["version"] == 2
+    store.delete("c1", expected_version=2)
+    assert not store.exists("c1")
+
+
+def test_paging(store):
+    for number in range(5):
+        conversation = make_conversation(f"c{number}", contents=() if number == 2 else ("hello",))
+        conversation["timestamp"] = f"2024-05-0{number + 1}T10:00:00"
+        store.write(conversation)
+
+    assert [entry["id"] for entry in store.index.list_entries()] == ["c4", "c3", "c2", "c1", "c0"]
+
+    first, cursor = store.index.page(2)
+    assert [entry["id"] for entry in first] == ["c4", "c3"]
+    second, cursor = store.index.page(2, cursor)
+    assert [entry["id"] for entry in second] == ["c2", "c1"]
+    third, cursor = store.index.page(2, cursor)
+    assert [entry["id"] for entry in third] == ["c0"] and cursor is None
+
+    non_empty, cursor = store.index.page(3, include=lambda entry: not entry["is_empty"])
+    assert [entry["id"] for entry in non_empty] == ["c4", "c3", "c1"]
+    rest, cursor = store.index.page(3, cursor, include=lambda entry: not entry["is_empty"])
+    assert [entry["id"] for entry in rest] == ["c0"] and cursor is None
+
+
+def test_iter_conversations(store):
+    store.write(make_conversation("c1"))
+    store.write(make_conversation("c2"))
+    store.append("c2", [message("2", "more")])
+
+    assert {conversation["id"]: conversation["version"] for conversation in store.iter_conversations()} == {"c1": 1, "c2": 2}
+
+
+def test_listeners(store):
+    calls = []
+    store.written_listeners.append(lambda conversation: calls.append(("write", conversation["id"])))
+    store.appended_listeners.append(lambda conversation_id, messages: calls.append(("append", conversation_id, len(messages))))
+    store.deleted_listeners.append(lambda conversation_id: calls.append(("delete", conversation_id)))
+
+    store.write(make_conversation("c1"))
+    store.append("c1", [message("2", "more")])
+    store.delete("c1")
+
+    assert calls == [("write", "c1"), ("append", "c1", 1), ("delete", "c1")]
@@ -0,0 +1,66 @@
+# backend/tests/test_conversations_api.py
+from tests.conftest import make_conversation
+
+
+def write_conversations(store):
+    for number in range(5):
+        conversation = make_conversation(f"c{number}", contents=() if number == 2 else ("hello",))
+        conversation["timestamp"] = f"2024-05-0{number + 1}T10:00:00"
+        store.write(conversation)
+
+
+def test_list_pages_follow_the_next_cursor(api, store):
+    write_conversations(store)
+
+    first = api.get("/conversations/", params={"limit": 2})
+    assert first.status_code == 200
+    assert [item["id"] for item in first.json()] == ["c4", "c3"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    # The empty conversation c2 is not listed
+    second = api.get("/conversations/", params={"limit": 2, "cursor": cursor})
+    assert [item["id"] for item in second.json()] == ["c1", "c0"]
+    assert "X-Next-Cursor" not in second.headers
+
+    whole = api.get("/conversations/")
+    assert [item["id"] for item in whole.json()] == ["c4", "c3", "c1", "c0"]
+    assert "X-Next-Cursor" not in whole.headers
+
+
+def test_list_rejects_bad_paging_parameters(api, store):
+    assert api.get("/conversations/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert api.get("/conversations/", params={"limit": 0}).status_code == 422
+    assert api.get("/conversations/", params={"fields": "id,nonsense"}).status_code == 400
+
+
+def test_list_fields(api, store):
+    write_conversations(store)
+
+    items = api.get("/conversations/", params={"limit": 1, "fields": "title"}).json()
+    assert items == [{"id": "c4", "title": "Greetings"}]
+
+
+def test_get_answers_304_for_the_current_version(api, store):
+    store.write(make_conversation("c1"))
+
+    response = api.get("/conversations/c1")
+    assert response.status_code == 200
+    assert response.json()["messages"][0]["content"] == "hello"
+    etag = response.headers["ETag"]
+
+    cached = api.get("/conversations/c1", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert api.get("/conversations/c1", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+
+    store.append("c1", [{"id": "2", "role": "user", "content": "more", "timestamp": "2024-05-01T10:01:00"}])
+    changed = api.get("/conversations/c1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [msg["content"] for msg in changed.json()["messages"]] == ["hello", "hi there", "more"]
+
+
+def test_get_missing_conversation(api, store):
+    assert api.get("/conversations/missing").status_code == 404
+    assert api.get("/conversations/missing", headers={"If-None-Match": '"1"'}).status_code == 404
@@ -0,0 +1,96 @@
+# backend/tests/test_crash_safety.py
+import os
+
+import pytest
+
+from app.services import file_lock
+from app.services.file_lock import write_atomic
+from tests.conftest import make_conversation, open_store
+
+
+def message(message_id, content):
+    return {"id": message_id, "role": "user", "content": content, "timestamp": "2024-05-01T11:00:00"}
+
+
+def test_replay_skips_records_folded_into_the_snapshot(tmp_path):
+    store = open_store("json", tmp_path)
+    store.write(make_conversation("c1"))
+    store.append("c1", [message("2", "two")])
+    store.append("c1", [message("3", "three")])
+    log = store.log_path("c1").read_bytes()
+
+    # A crash between writing the compacted snapshot and removing the log leaves both
+    store.compact("c1")
+    store.log_path("c1").write_bytes(log)
+
+    for reader in (store, open_store("json", tmp_path)):
+        conversation = reader.read("c1")
+        assert conversation["version"] == 3
+        assert [msg["content"] for msg in conversation["messages"]] == ["hello", "hi there", "two", "three"]
+
+    # Later records still apply after the leftover ones
+    store.append("c1", [message("4", "four")])
+    assert [msg["content"] for msg in store.read("c1")["messages"]][-2:] == ["three", "four"]
+    assert store.read("c1")["version"] == 4
+
+
+def test_torn_last_log_line_is_ignored(tmp_path):
+    store = open_store("json", tmp_path)
+    store.write(make_conversation("c1"))
+    store.append("c1", [message("2", "two")])
+    # An append interrupted mid-write
+    with open(store.log_path("c1"), "ab") as f:
+        f.write(b'{"messages": [{"id": "3", "role": "us')
+
+    conversation = open_store("json", tmp_path).read("c1")
+    assert conversation["version"] == 2
+    assert [msg["content"] for msg in conversation["messages"]][-1] == "two"
+
+    # The next append is not lost in the torn line
+    store.append("c1", [message("3", "three")])
+    conversation = open_store("json", tmp_path).read("c1")
+    assert conversation["version"] == 3
+    assert [msg["content"] for msg in conversation["messages"]][-2:] == ["two", "three"]
+
+
+def test_if_match_mismatch_is_412(api, store):
+    store.write(make_conversation("c1"))
+    assert api.get("/conversations/c1").headers["ETag"] == '"1"'
+
+    response = api.put("/conversations/c1", json={"title": "Renamed"}, headers={"If-Match": '"7"'})
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"1"'
+    assert api.delete("/conversations/c1", headers={"If-Match": '"7"'}).status_code == 412
+    assert api.put("/conversations/c1", json={"title": "Renamed"}, headers={"If-Match": "not-an-etag"}).status_code == 412
+    assert api.put("/conversations/missing", json={"title": "x"}, headers={"If-Match": "*"}).status_code == 412
+    assert store.read("c1")["title"] == "Greetings"
+
+    response = api.put("/conversations/c1", json={"title": "Renamed"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert store.read("c1")["title"] == "Renamed"
+
+
+def test_write_atomic_replaces_the_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old")
+
+    write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_write_atomic_keeps_the_old_content_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old")
+
+    def failing_replace(source, target):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_lock.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["data.json"]
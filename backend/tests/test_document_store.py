@@ -0,0 +1,85 @@
+# backend/tests/test_document_store.py
+import asyncio
+import hashlib
+import io
+import json
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.document_store import DocumentStore
+
+CONTENT = b"%PDF-1.4 same bytes"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    return DocumentStore(tmp_path / "blobs", upload_dir)
+
+
+def upload(store, document_id, content=CONTENT, filename="report.pdf"):
+    return asyncio.run(store.save_upload(UploadFile(io.BytesIO(content), filename=filename), document_id))
+
+
+def refs(store):
+    with open(store.manifest_path, encoding="utf-8") as f:
+        return {sha256: blob["refs"] for sha256, blob in json.load(f)["blobs"].items()}
+
+
+def blobs(store):
+    return sorted(path.name for path in store.blob_dir.glob("*/*.pdf"))
+
+
+def test_same_bytes_are_stored_once(store):
+    first = upload(store, "a", filename="report.pdf")
+    second = upload(store, "b", filename="copy.pdf")
+
+    assert first["sha256"] == second["sha256"] == SHA256
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert refs(store) == {SHA256: 2}
+    assert blobs(store) == [f"{SHA256}.pdf"]
+    assert list(store.tmp_dir.iterdir()) == []
+    assert store.locate("b") == (store.blob_path(SHA256), "b.pdf", f'"{SHA256}"')
+
+
+def test_blob_stays_while_a_copy_references_it(store):
+    removed = []
+    store.blob_removed_listeners.append(removed.append)
+    upload(store, "a")
+    upload(store, "b")
+
+    assert store.release("a")
+    assert refs(store) == {SHA256: 1}
+    assert store.blob_path(SHA256).read_bytes() == CONTENT
+    assert store.get("a") is None
+    assert store.documents_for(SHA256) == ["b"]
+    assert removed == []
+
+    assert store.release("b")
+    assert refs(store) == {}
+    assert blobs(store) == []
+    assert removed == [SHA256]
+    assert not store.release("b")
+
+
+def test_replacing_a_document_releases_its_old_blob(store):
+    upload(store, "a")
+    upload(store, "a", content=b"%PDF-1.4 other bytes")
+
+    other = hashlib.sha256(b"%PDF-1.4 other bytes").hexdigest()
+    assert refs(store) == {other: 1}
+    assert blobs(store) == [f"{other}.pdf"]
+
+
+def test_references_are_shared_between_workers(store):
+    other_worker = DocumentStore(store.blob_dir, store.legacy_dir)
+    upload(store, "a")
+    upload(other_worker, "b")
+    assert refs(store) == {SHA256: 2}
+
+    assert store.release("b")
+    assert other_worker.get("b") is None
+    assert other_worker.blob_path(SHA256).exists()
@@ -0,0 +1,101 @@
+# backend/tests/test_documents.py
+import pytest
+
+from app.services.document_store import DocumentStore
+from app.services.file_responses import parse_range
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    (upload_dir / "old.pdf").write_bytes(CONTENT)
+    (upload_dir / "empty.pdf").write_bytes(b"")
+    return upload_dir
+
+
+@pytest.fixture
+def client(tmp_path, uploads, monkeypatch):
+    """A client of the app whose document routes use a store under ``tmp_path``"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.routes import documents
+
+    store = DocumentStore(tmp_path / "blobs", uploads)
+    monkeypatch.setattr(documents, "document_store", store)
+    return TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("items=0-9", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    for header in ("bytes=100-", "bytes=9-0", "bytes=-0", "bytes=a-b"):
+        with pytest.raises(ValueError):
+            parse_range(header, 100)
+
+
+def test_no_range_of_an_empty_file_is_satisfiable():
+    for header in ("bytes=-10", "bytes=0-", "bytes=0-0"):
+        with pytest.raises(ValueError):
+            parse_range(header, 0)
+
+
+def test_whole_file_and_byte_ranges(client):
+    response = client.get("/documents/old")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+
+    response = client.get("/documents/old", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    response = client.get("/documents/old", headers={"Range": "bytes=-16"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-16:]
+
+
+def test_stale_if_range_sends_the_whole_file(client):
+    response = client.get("/documents/old", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_none_match_answers_304(client):
+    etag = client.get("/documents/old").headers["etag"]
+
+    response = client.get("/documents/old", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    assert client.get("/documents/old", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+    assert client.get("/documents/old", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_unsatisfiable_ranges_answer_416(client):
+    response = client.get("/documents/old", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    response = client.get("/documents/empty", headers={"Range": "bytes=-10"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
+
+
+def test_legacy_file_removed_by_another_worker_is_not_found(tmp_path, uploads, client):
+    assert client.get("/documents/old").status_code == 200
+    other_worker = DocumentStore(tmp_path / "blobs", uploads)
+    assert other_worker.remove_legacy("old")
+
+    assert client.get("/documents/old").status_code == 404
+    assert client.delete("/documents/old").status_code == 404
@@ -0,0 +1,48 @@
+# backend/tests/test_ingestion.py
+import os
+
+from app.services import ingestion
+from app.services.ingestion import IngestionQueue
+
+
+def test_job_is_visible_to_another_worker(tmp_path):
+    # Two queues on one chunk directory stand in for two server worker processes
+    owner = IngestionQueue(tmp_path, 1)
+    other = IngestionQueue(tmp_path, 1)
+    owner.chunks_path("abc").write_text("")
+
+    job = owner.submit("doc1", "abc")
+
+    assert job["status"] == "done"
+    assert other.get(job["id"]) == job
+    assert other.latest_for("doc1") == job
+    assert other.get("missing") is None
+    assert other.latest_for("missing") is None
+
+
+def test_queued_job_of_another_worker_shows_running_while_parsed(tmp_path):
+    queue = IngestionQueue(tmp_path, 1)
+    job = {"id": "j1", "document_id": "doc1", "sha256": "abc", "status": "queued"}
+    queue._save(job)
+    assert queue.get("j1")["status"] == "queued"
+
+    (tmp_path / "abc.jsonl.123.tmp").write_text("")
+    assert queue.get("j1")["status"] == "running"
+
+
+def test_oldest_finished_jobs_are_forgotten(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "MAX_TRACKED_JOBS", 2)
+    queue = IngestionQueue(tmp_path, 1)
+    queue.chunks_path("abc").write_text("")
+
+    first = queue.submit("doc1", "abc")
+    second = queue.submit("doc2", "abc")
+    # Records are pruned by age; keep their order clear of the file system's clock resolution
+    os.utime(queue.job_path(first["id"]), (1, 1))
+    os.utime(queue.job_path(second["id"]), (2, 2))
+    third = queue.submit("doc3", "abc")
+
+    assert queue.get(first["id"]) is None
+    assert queue.latest_for("doc1") is None
+    assert queue.get(second["id"]) is not None
+    assert queue.latest_for("doc3") == third
@@ -0,0 +1,140 @@
+# backend/tests/test_mail_outbox.py
+import socket
+import time
+from contextlib import closing
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services import mail_outbox as outbox_module
+from app.services.mail_outbox import MailOutbox, SMTPPool
+
+REFUSED = "refused@example.com"
+
+
+class Recorder:
+    """aiosmtpd handler keeping every delivered message; refuses REFUSED"""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REFUSED:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.append((envelope.rcpt_tos, envelope.content.decode("utf-8")))
+        return "250 Message accepted"
+
+
+def free_port() -> int:
+    with closing(socket.socket()) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    recorder = Recorder()
+    port = free_port()
+    controller = Controller(recorder, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield recorder, port
+    finally:
+        controller.stop()
+
+
+def bodies(outbox):
+    with closing(outbox._connect()) as conn:
+        return [row["body_html"] for row in conn.execute("SELECT * FROM outbox")]
+
+
+def insert(conn, recipient, body="<p>Hello</p>"):
+    conn.execute(
+        "INSERT INTO outbox (recipient, subject, body_html, next_attempt, created) VALUES (?, ?, ?, ?, ?)",
+        (recipient, "Hello", body, 0, 0),
+    )
+
+
+def statuses(outbox):
+    with closing(outbox._connect()) as conn:
+        return {row["recipient"]: (row["status"], row["attempts"]) for row in conn.execute("SELECT * FROM outbox")}
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_messages_are_delivered_over_one_session(tmp_path, smtp_server):
+    recorder, port = smtp_server
+    outbox = MailOutbox(str(tmp_path / "outbox.db"), SMTPPool("127.0.0.1", port, "", "", False))
+    try:
+        outbox.enqueue("a@example.com", "Hello", "<p>first</p>")
+        outbox.enqueue("b@example.com", "Hello", "<p>second</p>")
+        wait_for(lambda: len(recorder.delivered) == 2)
+        wait_for(lambda: set(statuses(outbox).values()) == {("sent", 1)})
+    finally:
+        outbox.stop()
+
+    assert sorted(rcpt for rcpt, _ in recorder.delivered) == [["a@example.com"], ["b@example.com"]]
+    assert "Subject: Hello" in recorder.delivered[0][1]
+    assert outbox.pool.opened == 1
+    assert bodies(outbox) == ["", ""]
+
+
+def test_refused_recipient_fails_after_its_attempts(tmp_path, smtp_server, monkeypatch):
+    monkeypatch.setattr(outbox_module, "MAIL_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(outbox_module, "MAIL_RETRY_BASE_SECONDS", 0.05)
+    recorder, port = smtp_server
+    outbox = MailOutbox(str(tmp_path / "outbox.db"), SMTPPool("127.0.0.1", port, "", "", False))
+    try:
+        outbox.enqueue(REFUSED, "Hello", "<p>nobody</p>")
+        outbox.enqueue("a@example.com", "Hello", "<p>somebody</p>")
+        wait_for(lambda: statuses(outbox) == {REFUSED: ("failed", 2), "a@example.com": ("sent", 1)})
+    finally:
+        outbox.stop()
+
+    assert [rcpt for rcpt, _ in recorder.delivered] == [["a@example.com"]]
+
+
+def test_message_that_keeps_stopping_the_sender_fails(tmp_path, monkeypatch):
+    # Each claim's lease runs out at once, as if the sender died mid-delivery every time
+    monkeypatch.setattr(outbox_module, "CLAIM_LEASE_SECONDS", 0)
+    monkeypatch.setattr(outbox_module, "MAIL_MAX_ATTEMPTS", 3)
+    outbox = MailOutbox(str(tmp_path / "outbox.db"), SMTPPool("127.0.0.1", 1, "", "", False))
+    with closing(outbox._connect()) as conn:
+        insert(conn, "poison@example.com", "<p>poison</p>")
+        claims = [outbox._claim(conn) for _ in range(4)]
+
+    assert [[row["attempts"] for row in rows] for rows in claims] == [[1], [2], [3], []]
+    assert statuses(outbox) == {"poison@example.com": ("failed", 3)}
+    assert bodies(outbox) == [""]
+
+
+def test_unreachable_server_fails_the_batch_on_one_connect(tmp_path, monkeypatch):
+    pool = SMTPPool("127.0.0.1", 1, "", "", False)
+    connects = []
+
+    def refuse():
+        connects.append(1)
+        raise ConnectionRefusedError("Connection refused")
+
+    monkeypatch.setattr(pool, "_connect", refuse)
+    outbox = MailOutbox(str(tmp_path / "outbox.db"), pool)
+    with closing(outbox._connect()) as conn:
+        for recipient in ("a@example.com", "b@example.com", "c@example.com"):
+            insert(conn, recipient)
+        outbox._send_batch(conn, outbox._claim(conn))
+        rows = conn.execute("SELECT * FROM outbox").fetchall()
+
+    assert len(connects) == 1
+    assert statuses(outbox) == {recipient: ("pending", 1) for recipient in ("a@example.com", "b@example.com", "c@example.com")}
+    assert {row["last_error"] for row in rows} == {"Connection refused"}
+    assert max(row["next_attempt"] for row in rows) - min(row["next_attempt"] for row in rows) < 1
+    assert bodies(outbox) == ["<p>Hello</p>"] * 3
@@ -0,0 +1,38 @@
+# backend/tests/test_migrate_conversations.py
+from migrate_conversations import migrate
+from tests.conftest import make_conversation, open_store
+
+
+def test_copies_conversations_and_deleted_versions(tmp_path):
+    source = open_store("json", tmp_path)
+    source.write(make_conversation("c1"))
+    source.write(make_conversation("c2", contents=("one",)))
+    source.append("c2", [{"id": "1", "role": "assistant", "content": "two", "timestamp": "2024-05-01T11:00:00"}],
+                  {"lastMessage": "two"})
+    source.write(make_conversation("gone"))
+    source.write(make_conversation("gone"))
+    source.delete("gone")
+
+    count = migrate(str(tmp_path / "conversations"), str(tmp_path / "conversations.db"), batch_size=1)
+
+    assert count == 2
+    target = open_store("sqlite", tmp_path)
+    for conversation_id in ("c1", "c2"):
+        assert target.read(conversation_id) == source.read(conversation_id)
+    assert [entry["id"] for entry in target.index.list_entries()] == [entry["id"] for entry in source.index.list_entries()]
+    assert target.read("gone") is None
+    # Re-created after the switch, a deleted conversation still gets a new version
+    assert target.write(make_conversation("gone"))["version"] == 3
+
+
+def test_running_again_replaces_the_copies(tmp_path):
+    source = open_store("json", tmp_path)
+    source.write(make_conversation("c1"))
+    migrate(str(tmp_path / "conversations"), str(tmp_path / "conversations.db"))
+
+    source.write(make_conversation("c1", contents=("changed",)))
+    assert migrate(str(tmp_path / "conversations"), str(tmp_path / "conversations.db")) == 1
+
+    read = open_store("sqlite", tmp_path).read("c1")
+    assert read["version"] == 2
+    assert [msg["content"] for msg in read["messages"]] == ["changed"]
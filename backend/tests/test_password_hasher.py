@@ -0,0 +1,71 @@
+# backend/tests/test_password_hasher.py
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.metrics import registry
+from app.services.password_hasher import HasherBusy, PasswordHasher
+
+ROUNDS = 1000
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(1, 0, ROUNDS)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify_on_the_event_loop(hasher):
+    async def run():
+        password_hash = await hasher.hash_async("correct horse")
+        return await asyncio.gather(hasher.verify_async("correct horse", password_hash),
+                                    hasher.verify_async("wrong", password_hash))
+
+    hasher.max_queue = 4
+    assert asyncio.run(run()) == [True, False]
+    assert hasher.pending == 0 and hasher.completed == 3
+
+
+def test_calls_beyond_the_queue_are_refused(hasher):
+    # One worker and no queue: a second call while the first runs is refused
+    running = hasher._submit(time.sleep, 0.5)
+    with pytest.raises(HasherBusy):
+        hasher._submit(time.sleep, 0)
+    running.result()
+    assert hasher.rejected == 1
+    assert hasher.pending == 0
+    hasher._submit(time.sleep, 0).result()
+
+
+def test_a_broken_pool_is_replaced(hasher):
+    # The worker process dies mid-call
+    with pytest.raises(BrokenProcessPool):
+        hasher._submit(os._exit, 1).result()
+
+    assert hasher.pending == 0
+    assert hasher.verify("secret", hasher.hash("secret"))
+
+
+def test_a_failed_submit_is_not_counted(hasher, monkeypatch):
+    executor = hasher._pool()
+
+    def broken_submit(*args):
+        raise BrokenProcessPool("a worker died")
+
+    monkeypatch.setattr(executor, "submit", broken_submit)
+    with pytest.raises(BrokenProcessPool):
+        hasher._submit(time.sleep, 0)
+
+    assert hasher.pending == 0
+    assert hasher._executor is None
+    hasher._submit(time.sleep, 0).result()
+
+
+def test_counts_are_exported():
+    text = registry.render()
+    assert "password_hash_pending " in text
+    assert 'password_hash_calls_total{outcome="rejected"}' in text
@@ -0,0 +1,85 @@
+# backend/tests/test_text_index.py
+import unicodedata
+
+import pytest
+
+from app.services.text_index import TextIndex
+
+
+def keys(found):
+    return [(group, key) for _, group, key in found]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TextIndex(tmp_path / "text_index.jsonl")
+
+
+def test_search_follows_changes(index):
+    index.set_group("document:a", [(0, "alpha beta"), (1, "gamma")])
+
+    assert keys(index.search("alpha", 5)) == [("document:a", 0)]
+    assert keys(index.search("gamma", 5)) == [("document:a", 1)]
+
+    index.add_docs("document:b", [(0, "alpha alpha")])
+    assert keys(index.search("alpha", 5)) == [("document:b", 0), ("document:a", 0)]
+
+    index.drop_group("document:b")
+    assert keys(index.search("alpha", 5)) == [("document:a", 0)]
+
+
+def test_bm25_ordering(index):
+    index.set_group("document:a", [
+        (0, "alpha filler filler filler filler filler"),
+        (1, "alpha filler"),
+        (2, "alpha alpha filler"),
+        (3, "alpha rare"),
+        (4, "unrelated words"),
+    ])
+
+    # More occurrences beat fewer, a shorter document beats a longer one,
+    # and a match on a rare term outweighs a common one
+    assert keys(index.search("alpha", 5)) == [("document:a", 2), ("document:a", 1), ("document:a", 3), ("document:a", 0)]
+    assert keys(index.search("alpha rare", 5))[0] == ("document:a", 3)
+    assert keys(index.search("alpha", 2)) == [("document:a", 2), ("document:a", 1)]
+
+
+def test_group_filter_does_not_change_scores(index):
+    index.set_group("conversation:c1", [("m1", "alpha"), ("m2", "alpha"), ("m3", "beta")])
+    index.set_group("document:a", [(0, "alpha beta")])
+
+    unfiltered = {(group, key): score for score, group, key in index.search("alpha beta", 5)}
+    filtered = index.search("alpha beta", 5, prefix="document:")
+    assert keys(filtered) == [("document:a", 0)]
+    assert filtered[0][0] == pytest.approx(unfiltered[("document:a", 0)])
+    assert index.search("alpha", 5, groups=["conversation:c1"])[0][0] == pytest.approx(unfiltered[("conversation:c1", "m1")])
+    assert len(index.search("alpha", 5)) == 3
+
+
+def test_unaccented_query_matches_accented_text(index):
+    index.set_group("document:a", [(0, "Phở bò Hà Nội"), (1, "pho mai")])
+
+    assert sorted(keys(index.search("pho", 5))) == [("document:a", 0), ("document:a", 1)]
+    assert keys(index.search("phở", 5)) == [("document:a", 0)]
+    assert keys(index.search("ha noi", 5)) == [("document:a", 0)]
+    assert keys(index.search("HÀ NỘI", 5)) == [("document:a", 0)]
+    assert keys(index.search("duong", 5)) == []
+
+
+def test_decomposed_spelling_matches_precomposed(index):
+    index.set_group("document:a", [(0, unicodedata.normalize("NFD", "đường phố"))])
+    index.set_group("document:b", [(0, "đường phố")])
+
+    query = unicodedata.normalize("NFD", "phố")
+    assert sorted(keys(index.search(query, 5))) == [("document:a", 0), ("document:b", 0)]
+    assert sorted(keys(index.search("duong", 5))) == [("document:a", 0), ("document:b", 0)]
+
+
+def test_changes_from_another_process_are_searched(tmp_path):
+    first = TextIndex(tmp_path / "text_index.jsonl")
+    second = TextIndex(tmp_path / "text_index.jsonl")
+    first.set_group("document:a", [(0, "alpha")])
+    assert keys(second.search("alpha", 5)) == [("document:a", 0)]
+
+    first.drop_group("document:a")
+    assert second.search("alpha", 5) == []
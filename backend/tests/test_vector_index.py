@@ -0,0 +1,48 @@
+# backend/tests/test_vector_index.py
+import threading
+
+from app.services.vector_index import VectorIndex, hashing_embedding
+
+DIM = 64
+
+
+def test_search_does_not_wait_for_an_embedding(tmp_path):
+    embedding = threading.Event()
+    release = threading.Event()
+
+    def slow_embedding(texts, dim):
+        # Documents take their time; queries embed at once
+        if texts[0].startswith("slow"):
+            embedding.set()
+            release.wait(5)
+        return hashing_embedding(texts, dim)
+
+    index = VectorIndex(tmp_path, DIM, slow_embedding)
+    index.add("a", ["alpha beta", "gamma delta"])
+    adding = threading.Thread(target=index.add, args=("b", ["slow alpha", "slow beta"]))
+    adding.start()
+    try:
+        assert embedding.wait(5)
+        # Still embedding "b": searches answer from what is indexed
+        [found] = index.search(["alpha beta"], 1)
+        assert [(sha, chunk) for _, sha, chunk in found] == [("a", 0)]
+        assert not index.has("b")
+    finally:
+        release.set()
+        adding.join()
+
+    assert index.has("b")
+    [found] = index.search(["slow beta"], 1)
+    assert [(sha, chunk) for _, sha, chunk in found] == [("b", 1)]
+
+
+def test_a_blob_is_appended_once_across_processes(tmp_path):
+    first = VectorIndex(tmp_path, DIM)
+    second = VectorIndex(tmp_path, DIM)
+
+    first.add("a", ["alpha", "beta"])
+    second.add("a", ["alpha", "beta"])
+    second.add("b", ["gamma"])
+
+    assert first.search(["gamma"], 1)[0][0][1:] == ("b", 0)
+    assert first._load(reload=True)["rows"] == 3
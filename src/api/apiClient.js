@@ -55,6 +55,47 @@ export const updateConversation = async (id, data) => {
   return response.data;
 };
 
+// Ask a question in a conversation and stream the answer as Server-Sent Events.
+// onEvent(event, data) is called for "start", each "token", then "done" or "error";
+// the server stores the question and the answer, so the history is never sent back.
+export const streamChat = async (id, content, { messageId, title, onEvent, signal } = {}) => {
+  const response = await fetch(`${API_URL}/conversations/${id}/chat`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ content, id: messageId, title }),
+    signal,
+  });
+
+  if (!response.ok) {
+    const result = await response.json().catch(() => ({}));
+    throw new Error(`${result.detail || 'Failed to get answer.'} (Status: ${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line; the last piece may still be incomplete
+    const blocks = buffer.split('\n\n');
+    buffer = blocks.pop();
+    for (const block of blocks) {
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      onEvent?.(event, data ? JSON.parse(data) : null);
+    }
+  }
+};
+
 export const deleteConversation = async (id) => {
   const response = await apiClient.delete(`/conversations/${id}`);
   return response.data;
@@ -3,8 +3,6 @@ import { useState, useEffect } from 'react';
 import ChatInterface from '../components/features/ChatInterface';
 import useStore from '../store/useStore';
 
-const API_BASE_URL = 'http://127.0.0.1:8000';
-
 const ChatPage = () => {
   const [isLoading, setIsLoading] = useState(false);
   // isPdfReady prop is assumed true for now, or handled by routing/global state
@@ -28,58 +26,11 @@ const ChatPage = () => {
       return;
     }
 
-    const userMessage = {
-      id: Date.now(),
-      role: 'user',
-      content: messageContent,
-      timestamp: new Date().toISOString()
-    };
-    store.addMessage(userMessage);
-
+    // The question and the streamed answer are added to the conversation by the store,
+    // which also reports errors in the chat
     setIsLoading(true);
-
     try {
-      const response = await fetch(`${API_BASE_URL}/ask`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ query: messageContent }),
-      });
-
-      const result = await response.json();
-
-      if (response.ok) {
-        const assistantMessage = {
-          id: Date.now() + 1, // Ensure unique ID
-          role: 'assistant',
-          content: result.answer,
-          timestamp: new Date().toISOString(),
-          // sources: result.sources, // If API provides sources in the future
-        };
-        store.addMessage(assistantMessage);
-      } else {
-        // Display error to the user, e.g., by adding an error message to the chat
-        const errorMessage = {
-          id: Date.now() + 1,
-          role: 'system', // Or 'error' if you have specific styling
-          content: `Error: ${result.detail || 'Failed to get answer.'} (Status: ${response.status})`,
-          timestamp: new Date().toISOString(),
-        };
-        store.addMessage(errorMessage);
-        console.error('API Error:', result.detail || response.statusText);
-        // alert(`Error: ${result.detail || 'Failed to get answer.'}`);
-      }
-    } catch (error) {
-      console.error('Network error:', error);
-      const networkErrorMessage = {
-        id: Date.now() + 1,
-        role: 'system',
-        content: `Network Error: ${error.message || 'Could not connect to server.'}`,
-        timestamp: new Date().toISOString(),
-      };
-      store.addMessage(networkErrorMessage);
-      // alert(`Network Error: ${error.message || 'Could not connect to server.'}`);
+      await store.sendChatMessage(messageContent);
     } finally {
       setIsLoading(false);
     }
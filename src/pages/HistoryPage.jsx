@@ -24,7 +24,7 @@ const HistoryPage = () => {
   const {
     conversations,
     fetchConversations,
-    setCurrentConversation,
+    fetchConversation,
     deleteConversation,
     isLoading,
     error,
@@ -50,8 +50,9 @@ const HistoryPage = () => {
     }
   }, [searchTerm, conversations]);
 
-  const handleConversationClick = (conversation) => {
-    setCurrentConversation(conversation);
+  const handleConversationClick = async (conversation) => {
+    // The list only carries summaries; load the full conversation first
+    await fetchConversation(conversation.id);
     navigate("/chat");
   };
 
@@ -6,6 +6,7 @@ import {
   createConversation, 
   updateConversation, 
   deleteConversation,
+  streamChat,
   deleteDocument
 } from '../api/apiClient';
 import i18n from '../i18n';
@@ -18,6 +19,29 @@ const isConversationEmpty = (conversation) => {
     conversation.messages.every(msg => !msg.content || msg.content.trim() === '');
 };
 
+// Helper applying a change to a conversation, both as the current one and in the list
+const changeConversation = (state, id, change) => {
+  const current = state.currentConversation?.id === id ? state.currentConversation : null;
+  const listed = state.conversations.find(conv => conv.id === id);
+  const updated = change(current || listed);
+  const conversations = listed
+    ? state.conversations.map(conv => (conv.id === id ? updated : conv))
+    : [...state.conversations, updated];
+
+  return {
+    conversations,
+    currentConversation: current ? updated : state.currentConversation
+  };
+};
+
+// Helper replacing (or, with null, removing) one message of a conversation
+const replaceMessage = (conversation, messageId, message) => ({
+  ...conversation,
+  messages: message
+    ? conversation.messages.map(msg => (msg.id === messageId ? message : msg))
+    : conversation.messages.filter(msg => msg.id !== messageId)
+});
+
 const useStore = create((set, get) => ({
   // Dashboard stats
   stats: {
@@ -150,9 +174,11 @@ const useStore = create((set, get) => ({
     }
   },
   
-  // Add message to current conversation
-  addMessage: async (message) => {
-    if (!get().currentConversation) return;
+  // Add a message to the current conversation on this client only (e.g. an error notice);
+  // questions and answers are stored by the server through sendChatMessage
+  addMessage: (message) => {
+    const conversation = get().currentConversation;
+    if (!conversation) return;
     
     // Skip empty messages
     if (!message.content || message.content.trim() === '') {
@@ -160,47 +186,85 @@ const useStore = create((set, get) => ({
       return;
     }
     
-    const updatedConversation = {
-      ...get().currentConversation,
-      messages: [...get().currentConversation.messages, message],
-      lastMessage: message.content,
+    set((state) => changeConversation(state, conversation.id, (conv) => ({
+      ...conv,
+      messages: [...conv.messages, message]
+    })));
+  },
+  
+  // Ask a question in the current conversation; the answer streams into it token by token.
+  // The server appends both messages (starting the conversation if it is new), so only the
+  // question is sent, never the whole history.
+  sendChatMessage: async (content) => {
+    const conversation = get().currentConversation;
+    if (!conversation || !content || content.trim() === '') return;
+    
+    const id = conversation.id;
+    const question = {
+      id: String(Date.now()),
+      role: 'user',
+      content,
       timestamp: new Date().toISOString()
     };
+    let answerId = null;
     
-    set((state) => {
-      const updatedConversations = state.conversations.map(conv => 
-        conv.id === updatedConversation.id ? updatedConversation : conv
-      );
-      
-      if (!updatedConversations.some(conv => conv.id === updatedConversation.id)) {
-        updatedConversations.push(updatedConversation);
-      }
-      
-      return {
-        currentConversation: updatedConversation,
-        conversations: updatedConversations,
-        stats: {
-          ...state.stats,
-          queryCount: message.role === 'user' ? state.stats.queryCount + 1 : state.stats.queryCount
-        }
-      };
-    });
+    set((state) => ({
+      ...changeConversation(state, id, (conv) => ({
+        ...conv,
+        messages: [...conv.messages, question],
+        lastMessage: content,
+        timestamp: question.timestamp
+      })),
+      stats: { ...state.stats, queryCount: state.stats.queryCount + 1 }
+    }));
     
-    // Don't update empty conversations in the API
-    if (isConversationEmpty(updatedConversation)) {
-      console.log('Skipping API update for empty conversation');
-      return;
-    }
+    const finishAnswer = (message, version) => set((state) => changeConversation(state, id, (conv) => ({
+      ...replaceMessage(conv, answerId, message),
+      ...(message ? { lastMessage: message.content, timestamp: message.timestamp } : {}),
+      version
+    })));
+    
+    // Shown in this conversation only, even if another one was opened meanwhile
+    const reportError = (detail) => set((state) => changeConversation(state, id, (conv) => ({
+      ...conv,
+      messages: [...conv.messages, {
+        id: `${question.id}-error`,
+        role: 'system',
+        content: `Error: ${detail}`,
+        timestamp: new Date().toISOString()
+      }]
+    })));
+    
+    const onEvent = (event, data) => {
+      if (event === 'start') {
+        answerId = data.answer_id;
+        const answer = { id: answerId, role: 'assistant', content: '', timestamp: new Date().toISOString() };
+        set((state) => changeConversation(state, id, (conv) => ({
+          ...conv,
+          messages: [...conv.messages, answer],
+          version: data.version
+        })));
+      } else if (event === 'token') {
+        set((state) => changeConversation(state, id, (conv) => ({
+          ...conv,
+          messages: conv.messages.map(msg => (
+            msg.id === answerId ? { ...msg, content: msg.content + data.text } : msg
+          ))
+        })));
+      } else if (event === 'done') {
+        finishAnswer(data.message, data.version);
+      } else if (event === 'error') {
+        // What was generated before the failure is stored; say that the answer stopped
+        finishAnswer(data.message, data.version);
+        reportError(data.detail);
+      }
+    };
     
-    // Update conversation in the API
     try {
-      await updateConversation(updatedConversation.id, {
-        messages: updatedConversation.messages,
-        lastMessage: updatedConversation.lastMessage,
-        timestamp: updatedConversation.timestamp
-      });
+      await streamChat(id, content, { messageId: question.id, title: conversation.title, onEvent });
     } catch (error) {
-      console.error('Error updating conversation with new message:', error);
+      console.error('Error streaming the answer:', error);
+      reportError(error.message || 'Could not connect to server.');
     }
   },
   